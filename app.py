@@ -1,27 +1,76 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
-from services.translator import TranslatorService
-from services.strapi_service import StrapiService
+import os
+import hmac
+import json
+import logging
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, stream_with_context
+from services.job_manager import JobManager
+from services.job_planner import JobPlanner
+from services.webhook_receiver import WebhookReceiver
+from services.strapi_service import StrapiError, StrapiService
 from services.ollama_service import OllamaService
+from services.translation_memory import translation_memory
+from services.generation_stats import generation_stats
+from services.metadata_cache import metadata_cache
+from services.field_index import field_index
+from services.ollama_pool import ollama_pool
+from services.metrics import metrics
+from services.logging_config import configure_logging
 from config import Config
 
+configure_logging()
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 app.config.from_object(Config)
 
 # Initialize services
-translator_service = TranslatorService()
+job_manager = JobManager()
 strapi_service = StrapiService()
 ollama_service = OllamaService()
 
+# Counters the services already keep are read when /metrics is scraped
+metrics.register_collector(job_manager.collect_metrics)
+metrics.register_collector(translation_memory.collect_metrics)
+metrics.register_collector(ollama_pool.collect_metrics)
+
+# Pick up jobs interrupted by a restart; under the debug reloader only the
+# serving child process runs them, not the watcher that spawns it
+if Config.JOB_RESUME_ON_START and (
+    __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+):
+    job_manager.resume_jobs()
+
+# An open webhook would let anyone who can reach the app queue translation jobs
+if not Config.WEBHOOK_SECRET:
+    logger.warning("WEBHOOK_SECRET is not set; /webhooks/strapi refuses every call until it is")
+
+def cached_content_types():
+    """Localized content types from Strapi, served from the metadata cache"""
+    return metadata_cache.get('content_types', strapi_service.get_content_types)
+
+# Entry edits reported by Strapi webhooks become incremental jobs
+webhook_receiver = WebhookReceiver(job_manager.submit, cached_content_types, strapi_service.source_locale)
+
+def cached_locales():
+    """Locales from Strapi, served from the metadata cache"""
+    return metadata_cache.get('locales', strapi_service.get_available_locales)
+
+def cached_models():
+    """Ollama models, served from the metadata cache"""
+    return metadata_cache.get(
+        'models', ollama_service.get_available_models, ttl=Config.OLLAMA_MODELS_CACHE_TTL
+    )
+
 @app.route('/')
 def index():
     """Main dashboard"""
-    job_status = translator_service.get_job_status()
-    return render_template('index.html', job_status=job_status)
+    job_status = job_manager.get_latest_status()
+    return render_template('index.html', job_status=job_status, error_buffer=Config.JOB_ERROR_BUFFER)
 
 @app.route('/models', methods=['GET'])
 def get_models():
     """Get available Ollama models"""
-    models = ollama_service.get_available_models()
+    models = cached_models()
     return jsonify(models)
 
 @app.route('/config', methods=['GET', 'POST'])
@@ -29,17 +78,21 @@ def config():
     """Configure model mappings"""
     if request.method == 'POST':
         model_mappings = request.json
+        previous_mappings = Config.get_model_mappings()
+        # New jobs load the mappings when they are submitted
         Config.save_model_mappings(model_mappings)
-        # Reload the model mappings in the translator service
-        translator_service.model_mappings = Config.get_model_mappings()
+        # Forget cached translations from models that were replaced for a locale
+        for locale, model_name in previous_mappings.items():
+            if model_mappings.get(locale) != model_name:
+                translation_memory.invalidate_model(model_name, locale)
         return jsonify({"status": "success", "message": "Configuration saved"})
     
     # GET - Show config page or return current config
     if request.headers.get('Accept') == 'application/json':
         return jsonify(Config.get_model_mappings())
     
-    locales = strapi_service.get_available_locales()
-    models = ollama_service.get_available_models()
+    locales = cached_locales()
+    models = cached_models()
     current_mappings = Config.get_model_mappings()
     
     return render_template(
@@ -53,15 +106,24 @@ def config():
 @app.route('/content-types', methods=['GET'])
 def get_content_types():
     """Get available content types from Strapi"""
-    content_types = strapi_service.get_content_types()
-    # debug
-    print(f"content_types: {content_types}")
+    content_types = cached_content_types()
     return jsonify(content_types)
 
+@app.route('/content-types/<content_type>/fields', methods=['GET'])
+def get_translatable_fields(content_type):
+    """List the translatable attribute paths of a content type"""
+    paths = field_index.get_paths(content_type)
+    if paths is None:
+        return jsonify({"status": "error", "message": f"No schema for content type: {content_type}"}), 404
+    return jsonify(paths)
+
 @app.route('/entries/<content_type>', methods=['GET'])
 def get_entries(content_type):
     """Get entries for a content type"""
-    entries = strapi_service.get_entries(content_type)
+    try:
+        entries = strapi_service.get_entries(content_type)
+    except StrapiError as e:
+        return jsonify({"status": "error", "message": str(e)}), 502
     return jsonify(entries)
 
 @app.route('/translate', methods=['GET', 'POST'])
@@ -72,6 +134,7 @@ def translate():
         content_type = data.get('content_type')
         entry_ids = data.get('entry_ids', [])
         target_locales = data.get('target_locales', [])
+        incremental = bool(data.get('incremental', False))
         
         # Validate required fields
         if not content_type or not target_locales:
@@ -80,37 +143,182 @@ def translate():
                 "message": "Missing required fields: content_type, target_locales"
             }), 400
         
-        # If no entry IDs specified, get all entries for the content type
-        if not entry_ids:
-            entries = strapi_service.get_entries(content_type)
-            # Use documentId for Strapi 5
-            entry_ids = [str(entry.get('documentId', entry.get('id'))) for entry in entries]
-        else:
-            # Ensure all entry IDs are strings
-            entry_ids = [str(id) for id in entry_ids]
+        # Ensure all entry IDs are strings; an empty list means all entries,
+        # which the job resolves on its worker
+        entry_ids = [str(id) for id in entry_ids]
         
-        # Trigger batch translation
-        translator_service.batch_translate(content_type, entry_ids, target_locales)
-        return jsonify({"status": "success", "message": "Translation job started"})
+        # Queue batch translation and return right away
+        job_id = job_manager.submit(content_type, entry_ids, target_locales, incremental)
+        return jsonify({
+            "status": "success",
+            "message": "Translation job started",
+            "job_id": job_id
+        }), 202
     
     # GET - Show translation form
-    content_types = strapi_service.get_content_types()
-    # debug
-    print(f"content_types: {content_types}")
-    locales = strapi_service.get_available_locales()
+    content_types = cached_content_types()
+    locales = cached_locales()
     
     return render_template(
         'translate.html', 
         content_types=content_types, 
         locales=locales,
-        source_locale=strapi_service.source_locale
+        source_locale=strapi_service.source_locale,
+        error_buffer=Config.JOB_ERROR_BUFFER
     )
 
+@app.route('/plan', methods=['POST'])
+def plan():
+    """Estimate the work and duration of a translation job without starting it"""
+    data = request.json or {}
+    content_type = data.get('content_type')
+    target_locales = data.get('target_locales', [])
+    if not content_type or not target_locales:
+        return jsonify({
+            "status": "error",
+            "message": "Missing required fields: content_type, target_locales"
+        }), 400
+    
+    entry_ids = [str(id) for id in data.get('entry_ids', [])]
+    try:
+        job_plan = JobPlanner().plan(
+            content_type, entry_ids, target_locales, bool(data.get('incremental', False))
+        )
+    except StrapiError as e:
+        return jsonify({"status": "error", "message": str(e)}), 502
+    return jsonify(job_plan)
+
+@app.route('/webhooks/strapi', methods=['POST'])
+def strapi_webhook():
+    """Receive Strapi entry events and queue the edited entries for translation"""
+    if not Config.WEBHOOK_SECRET:
+        return jsonify({"status": "error", "message": "Webhooks are disabled until WEBHOOK_SECRET is set"}), 403
+    if not hmac.compare_digest(
+        request.headers.get('Authorization', ''), f"Bearer {Config.WEBHOOK_SECRET}"
+    ):
+        return jsonify({"status": "error", "message": "Invalid webhook secret"}), 401
+    
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"status": "error", "message": "Expected a JSON webhook payload"}), 400
+    
+    queued, reason = webhook_receiver.receive(payload)
+    if not queued:
+        return jsonify({"status": "ignored", "message": reason})
+    return jsonify({"status": "success", "message": "Entry queued for translation"}), 202
+
 @app.route('/status', methods=['GET'])
 def status():
-    """Get current job status"""
-    job_status = translator_service.get_job_status()
+    """Get status of the latest job along with all tracked jobs"""
+    job_status = job_manager.get_latest_status()
+    job_status['jobs'] = [
+        {key: job[key] for key in ('job_id', 'content_type', 'status', 'completed', 'total')}
+        for job in job_manager.list_jobs()
+    ]
+    job_status['translation_memory'] = translation_memory.get_stats()
+    job_status['generation'] = generation_stats.get_stats()
+    job_status['ollama_servers'] = ollama_pool.get_stats()
+    job_status['webhooks'] = webhook_receiver.get_stats()
+    job_status['metadata_cache'] = metadata_cache.get_stats()
     return jsonify(job_status)
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Expose request latencies, queue depths and counters for Prometheus"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/cancel/<job_id>', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running job, stopping in-flight generations"""
+    if not job_manager.cancel(job_id):
+        return jsonify({"status": "error", "message": f"No active job: {job_id}"}), 404
+    return jsonify({"status": "success", "message": "Job cancelled"})
+
+@app.route('/retry/<job_id>', methods=['POST'])
+def retry_job(job_id):
+    """Run a finished job's failed units again"""
+    retried = job_manager.retry_failed(job_id)
+    if retried is None:
+        return jsonify({"status": "error", "message": f"No finished job: {job_id}"}), 404
+    if not retried:
+        return jsonify({"status": "success", "message": "No failed units to retry", "retried": 0})
+    return jsonify({"status": "success", "job_id": job_id, "retried": retried}), 202
+
+@app.route('/translation-memory/invalidate', methods=['POST'])
+def invalidate_translation_memory():
+    """Drop cached translations for a model, optionally for one locale"""
+    data = request.json or {}
+    model_name = data.get('model')
+    if not model_name:
+        return jsonify({"status": "error", "message": "Missing required field: model"}), 400
+    
+    removed = translation_memory.invalidate_model(model_name, data.get('locale'))
+    return jsonify({"status": "success", "removed": removed})
+
+@app.route('/metadata/invalidate', methods=['POST'])
+def invalidate_metadata():
+    """Drop cached content types, components, locales and models, or just one of them"""
+    data = request.get_json(silent=True) or {}
+    invalidated = metadata_cache.invalidate(data.get('key'))
+    return jsonify({"status": "success", "invalidated": invalidated})
+
+@app.route('/status/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Get status of a single job"""
+    job_status = job_manager.get_status(job_id)
+    if job_status is None:
+        return jsonify({"status": "error", "message": f"Unknown job: {job_id}"}), 404
+    return jsonify(job_status)
+
+def format_event(event, data, event_id=None):
+    """Format one Server-Sent Event"""
+    lines = f"id: {event_id}\n" if event_id is not None else ''
+    return f"{lines}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/events/<job_id>', methods=['GET'])
+def job_events(job_id):
+    """Stream a job's progress as Server-Sent Events until it finishes"""
+    events = job_manager.get_events(job_id)
+    # Listen from the current position before taking the snapshot so nothing is missed
+    after = events.sequence if events else 0
+    snapshot = job_manager.get_status(job_id)
+    if snapshot is None:
+        return jsonify({"status": "error", "message": f"Unknown job: {job_id}"}), 404
+    
+    # A reconnecting EventSource resumes after the last event it received
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    
+    def generate():
+        nonlocal after
+        if last_event_id is None or events is None:
+            yield format_event('snapshot', snapshot)
+        else:
+            after = last_event_id
+        if events is None:
+            # Only known from the job store, so it is not running here
+            yield format_event('done', snapshot)
+            return
+        
+        while True:
+            new_events, closed = events.wait(after, Config.JOB_EVENTS_KEEPALIVE)
+            for sequence, event, data in new_events:
+                yield format_event(event, data, sequence)
+                after = sequence
+            if closed:
+                # A job pruned from memory since is still in the job store
+                yield format_event('done', job_manager.get_progress(job_id) or job_manager.get_status(job_id))
+                return
+            if new_events:
+                yield format_event('progress', job_manager.get_progress(job_id))
+            else:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5080)
\ No newline at end of file
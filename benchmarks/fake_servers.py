@@ -0,0 +1,315 @@
+"""
+Local stand-ins for Strapi and Ollama used by the benchmark harness
+
+The servers run in a child process so their work does not compete with the
+code being measured. Latency, generation speed, error rates and how many
+generations an Ollama server runs at once are configurable, there can be
+several Ollama servers, and every request is counted; GET /__stats on any
+server returns its counts.
+"""
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from urllib.request import urlopen
+
+CONTENT_TYPE = 'api::article.article'
+API_PATH = 'articles'
+SOURCE_LOCALE = 'en'
+
+WORDS = (
+    'the quick brown fox jumps over lazy dog content translation model entry '
+    'page article section title summary release product feature customer team '
+    'update guide support service price order account security network data'
+).split()
+
+def make_corpus(entries, fields, field_length, seed=0):
+    """
+    Build synthetic source entries
+
+    Args:
+        entries (int): Number of entries
+        fields (int): Text fields per entry
+        field_length (int): Approximate characters per field
+        seed (int): Random seed, so runs are repeatable
+
+    Returns:
+        list: Strapi 5 style entries with documentId and text fields
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(entries):
+        entry = {
+            'id': index + 1,
+            'documentId': f"doc{index}",
+            'locale': SOURCE_LOCALE,
+            'updatedAt': '2024-01-01T00:00:00.000Z'
+        }
+        for field in range(fields):
+            words = []
+            while sum(len(word) + 1 for word in words) < field_length:
+                words.append(rng.choice(WORDS))
+            entry[f"field{field}"] = ' '.join(words).capitalize() + '.'
+        corpus.append(entry)
+    return corpus
+
+class FakeState:
+    """Counters and settings shared by a server's request handlers"""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.random = random.Random(settings.get('seed', 0))
+        self.loaded_model = None
+        # Generations run at once, like OLLAMA_NUM_PARALLEL (0 = no limit)
+        parallel = settings.get('parallel', 0)
+        self.slots = threading.BoundedSemaphore(parallel) if parallel else nullcontext()
+
+    def count(self, name):
+        with self.lock:
+            self.calls[name] += 1
+
+    def load_model(self, model_name):
+        """Track which model is loaded; a switch costs model_load_time like an Ollama load"""
+        with self.lock:
+            switched = model_name != self.loaded_model
+            if switched:
+                self.calls['model_loads'] += 1
+                self.loaded_model = model_name
+        if switched:
+            time.sleep(self.settings.get('model_load_time', 0.0))
+
+    def should_fail(self):
+        with self.lock:
+            return self.random.random() < self.settings.get('error_rate', 0.0)
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Shared plumbing for both fake servers"""
+
+    protocol_version = 'HTTP/1.1'
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def fail_or_wait(self, name):
+        """Count the call, apply latency and maybe fail it; True if it failed"""
+        self.state.count(name)
+        time.sleep(self.state.settings.get('latency', 0.0))
+        if self.state.should_fail():
+            self.state.count(f"{name}_errors")
+            self.send_json(500, {'error': 'injected failure'})
+            return True
+        return False
+
+class FakeStrapiHandler(FakeHandler):
+    """Serves the content type, locales, entries and translation writes"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        settings = self.state.settings
+
+        if url.path == '/__stats':
+            return self.send_json(200, dict(self.state.calls))
+        if url.path == '/api/content-type-builder/content-types':
+            self.state.count('schema')
+            attributes = {field: {'type': 'text'} for field in settings['field_names']}
+            return self.send_json(200, {'data': [{
+                'uid': CONTENT_TYPE,
+                'schema': {
+                    'kind': 'collectionType',
+                    'displayName': 'Article',
+                    'pluginOptions': {'i18n': {'localized': True}},
+                    'attributes': attributes
+                }
+            }]})
+        if url.path == '/api/content-type-builder/components':
+            self.state.count('schema')
+            return self.send_json(200, {'data': []})
+        if url.path == '/api/i18n/locales':
+            self.state.count('locales')
+            return self.send_json(200, [{'code': code, 'name': code} for code in settings['locales']])
+
+        match = re.match(rf'^/api/{API_PATH}/([^/]+)$', url.path)
+        if match:
+            if self.fail_or_wait('get_entry'):
+                return
+            entry = settings['entries_by_id'].get(match.group(1))
+            if entry is None:
+                return self.send_json(404, {'error': 'not found'})
+            return self.send_json(200, {'data': entry})
+
+        if url.path == f"/api/{API_PATH}":
+            if self.fail_or_wait('list_entries'):
+                return
+            entries = settings['entries']
+            ids = [values[0] for key, values in query.items() if key.startswith('filters[documentId][$in]')]
+            if ids:
+                wanted = set(ids)
+                entries = [entry for entry in entries if entry['documentId'] in wanted]
+            page = int(query.get('pagination[page]', ['1'])[0])
+            page_size = int(query.get('pagination[pageSize]', ['25'])[0])
+            return self.send_json(200, {
+                'data': entries[(page - 1) * page_size:page * page_size],
+                'meta': {'pagination': {
+                    'page': page,
+                    'pageSize': page_size,
+                    'pageCount': (len(entries) + page_size - 1) // page_size,
+                    'total': len(entries)
+                }}
+            })
+
+        self.send_json(404, {'error': 'not found'})
+
+    def do_PUT(self):
+        payload = self.read_json()
+        if self.fail_or_wait('write'):
+            return
+        url = urlparse(self.path)
+        entry = dict(payload.get('data', {}))
+        entry['documentId'] = url.path.rsplit('/', 1)[-1]
+        entry['locale'] = parse_qs(url.query).get('locale', [None])[0]
+        self.send_json(200, {'data': entry})
+
+class FakeOllamaHandler(FakeHandler):
+    """Echoes translations back at a configurable number of tokens per second"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/__stats':
+            return self.send_json(200, dict(self.state.calls))
+        if url.path == '/api/tags':
+            self.state.count('tags')
+            return self.send_json(200, {'models': [{'name': name} for name in self.state.settings['models']]})
+        if url.path == '/api/ps':
+            self.state.count('ps')
+            loaded = [self.state.loaded_model] if self.state.loaded_model else []
+            return self.send_json(200, {'models': [{'name': name} for name in loaded]})
+        self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        payload = self.read_json()
+        if urlparse(self.path).path != '/api/generate':
+            return self.send_json(404, {'error': 'not found'})
+        self.state.load_model(payload.get('model'))
+        if not payload.get('prompt'):
+            # Preload request
+            self.state.count('preload')
+            return self.send_json(200, {'done': True})
+        with self.state.slots:
+            self.generate(payload)
+
+    def generate(self, payload):
+        if self.fail_or_wait('generate'):
+            return
+
+        output = self.translate(payload['prompt'], payload.get('format') == 'json')
+        # Roughly four characters per token
+        tokens = [output[index:index + 4] for index in range(0, len(output), 4)] or ['']
+        tokens_per_second = self.state.settings.get('tokens_per_second', 0)
+        delay = 1 / tokens_per_second if tokens_per_second else 0
+
+        if not payload.get('stream', True):
+            time.sleep(delay * len(tokens))
+            return self.send_json(200, {'response': output, 'done': True, 'eval_count': len(tokens)})
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        # Sleep per group of tokens; sleeping per token is too coarse to be accurate
+        group = max(1, len(tokens) // 20)
+        for index in range(0, len(tokens), group):
+            time.sleep(delay * len(tokens[index:index + group]))
+            self.write_chunk({'response': ''.join(tokens[index:index + group]), 'done': False})
+        self.write_chunk({
+            'response': '', 'done': True, 'eval_count': len(tokens),
+            'eval_duration': int(delay * len(tokens) * 1e9), 'prompt_eval_count': len(payload['prompt']) // 4
+        })
+        self.wfile.write(b'0\r\n\r\n')
+
+    def write_chunk(self, payload):
+        data = (json.dumps(payload) + '\n').encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b'\r\n')
+        self.wfile.flush()
+
+    @staticmethod
+    def translate(prompt, json_mode):
+        """Fake a translation by tagging the source text"""
+        if json_mode:
+            batch = json.loads(prompt[prompt.index('{'):])
+            return json.dumps({key: f"[xx] {value}" for key, value in batch.items()})
+        # The text follows the instructions, and may itself span paragraphs
+        return f"[xx] {prompt.split('quotes:' + chr(10) * 2, 1)[-1]}"
+
+def _serve(name, handler_class, settings, ready):
+    state = FakeState(settings)
+    handler = type(handler_class.__name__, (handler_class,), {'state': state})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    ready.put((name, server.server_address[1]))
+    server.serve_forever()
+
+def _serve_all(strapi_settings, ollama_settings, ollama_servers, ready):
+    threading.Thread(
+        target=_serve, args=('strapi', FakeStrapiHandler, strapi_settings, ready), daemon=True
+    ).start()
+    for index in range(ollama_servers):
+        # Each server fails its own share of generations
+        settings = dict(ollama_settings, seed=ollama_settings.get('seed', 0) + index)
+        threading.Thread(
+            target=_serve, args=(f"ollama{index}", FakeOllamaHandler, settings, ready), daemon=True
+        ).start()
+    threading.Event().wait()
+
+def start_servers(strapi_settings, ollama_settings, ollama_servers=1):
+    """
+    Start fake Strapi and Ollama servers in a child process
+
+    Args:
+        strapi_settings (dict): entries, field_names, locales, latency,
+            error_rate, seed
+        ollama_settings (dict): models, latency, tokens_per_second,
+            model_load_time, error_rate, parallel, seed
+        ollama_servers (int): Number of Ollama servers to start
+
+    Returns:
+        tuple: (process, strapi_url, ollama_urls)
+    """
+    strapi_settings = dict(strapi_settings)
+    strapi_settings['entries_by_id'] = {
+        entry['documentId']: entry for entry in strapi_settings['entries']
+    }
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_serve_all, args=(strapi_settings, ollama_settings, ollama_servers, ready), daemon=True
+    )
+    process.start()
+    ports = dict(ready.get(timeout=10) for _ in range(ollama_servers + 1))
+    ollama_urls = [f"http://127.0.0.1:{ports[f'ollama{index}']}" for index in range(ollama_servers)]
+    return process, f"http://127.0.0.1:{ports['strapi']}", ollama_urls
+
+def get_stats(url):
+    """Fetch a fake server's call counts"""
+    with urlopen(f"{url}/__stats") as response:
+        return json.loads(response.read())
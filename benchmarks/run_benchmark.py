@@ -0,0 +1,224 @@
+"""
+Benchmark batch translation against local Strapi and Ollama stand-ins
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmark --entries 200 --locales 3 --output result.json
+
+The fake servers run in a child process. The app is configured through the
+same environment variables as in production, pointed at temporary
+databases, and one batch job is run with TranslatorService.batch_translate.
+The JSON report has throughput, per-unit latency percentiles, upstream call
+counts and peak memory, so runs can be compared across changes.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from benchmarks.fake_servers import CONTENT_TYPE, SOURCE_LOCALE, make_corpus, start_servers, get_stats
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    corpus = parser.add_argument_group('corpus')
+    corpus.add_argument('--entries', type=int, default=100, help='entries to translate')
+    corpus.add_argument('--fields', type=int, default=4, help='text fields per entry')
+    corpus.add_argument('--field-length', type=int, default=200, help='characters per field')
+    corpus.add_argument('--locales', type=int, default=3, help='target locales')
+    corpus.add_argument('--models', type=int, default=2, help='distinct models the locales map to')
+    corpus.add_argument('--seed', type=int, default=0, help='random seed for the corpus and errors')
+
+    upstream = parser.add_argument_group('fake servers')
+    upstream.add_argument('--strapi-latency', type=float, default=0.005, help='seconds per Strapi request')
+    upstream.add_argument('--strapi-error-rate', type=float, default=0.0, help='share of Strapi requests that fail')
+    upstream.add_argument('--ollama-latency', type=float, default=0.02, help='seconds before the first token')
+    upstream.add_argument('--tokens-per-second', type=float, default=2000, help='generation speed (0 = instant)')
+    upstream.add_argument('--model-load-time', type=float, default=0.0, help='seconds to switch models')
+    upstream.add_argument('--ollama-error-rate', type=float, default=0.0, help='share of generations that fail')
+    upstream.add_argument('--ollama-servers', type=int, default=1, help='Ollama servers in the pool')
+    upstream.add_argument('--ollama-parallel', type=int, default=0,
+                          help='generations each Ollama server runs at once (0 = no limit)')
+
+    app = parser.add_argument_group('app settings (exported as environment variables)')
+    app.add_argument('--pipeline', choices=('sync', 'async'), default='sync')
+    app.add_argument('--concurrency', type=int, default=1, help='TRANSLATION_CONCURRENCY')
+    app.add_argument('--no-batch-fields', action='store_true', help='OLLAMA_BATCH_FIELDS=false')
+    app.add_argument('--no-stream', action='store_true', help='OLLAMA_STREAM=false')
+    app.add_argument('--translation-memory', action='store_true', help='keep TRANSLATION_MEMORY_ENABLED on')
+    app.add_argument('--env', action='append', default=[], metavar='NAME=VALUE',
+                     help='any other setting, e.g. --env SCHEDULE_WINDOW=50')
+
+    parser.add_argument('--log-level', default='WARNING', help='LOG_LEVEL for the app while it runs')
+    parser.add_argument('--no-tracemalloc', action='store_true',
+                        help='skip Python allocation tracing, which slows the run down')
+    parser.add_argument('--output', help='write the JSON report here as well as to stdout')
+    return parser.parse_args(argv)
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def configure_environment(args, strapi_url, ollama_urls, workdir, locales, models):
+    """Point the app at the fake servers and temporary state before it is imported"""
+    mappings_path = os.path.join(workdir, 'model_mappings.json')
+    with open(mappings_path, 'w') as f:
+        json.dump({locale: models[index % len(models)] for index, locale in enumerate(locales)}, f)
+
+    os.environ.update({
+        'STRAPI_BASE_URL': strapi_url,
+        'OLLAMA_BASE_URL': ','.join(ollama_urls),
+        'STRAPI_SOURCE_LOCALE': SOURCE_LOCALE,
+        'CONFIG_FILE': mappings_path,
+        'TRANSLATION_MEMORY_PATH': os.path.join(workdir, 'translation_memory.db'),
+        'FINGERPRINT_STORE_PATH': os.path.join(workdir, 'translation_state.db'),
+        'JOB_STORE_PATH': os.path.join(workdir, 'translation_jobs.db'),
+        'TRANSLATION_PIPELINE': args.pipeline,
+        'TRANSLATION_CONCURRENCY': str(args.concurrency),
+        'OLLAMA_BATCH_FIELDS': 'false' if args.no_batch_fields else 'true',
+        'OLLAMA_STREAM': 'false' if args.no_stream else 'true',
+        'TRANSLATION_MEMORY_ENABLED': 'true' if args.translation_memory else 'false'
+    })
+    for setting in args.env:
+        name, _, value = setting.partition('=')
+        os.environ[name] = value
+
+class UnitTimer:
+    """
+    Time each (entry, locale) unit from planning to its final state
+
+    Wraps the translator's planning and unit bookkeeping methods on the
+    instance, so the same measurement works for both pipelines.
+    """
+
+    def __init__(self, translator):
+        self.started = {}
+        self.latencies = []
+        self.lock = threading.Lock()
+        plan_entry, mark_unit = translator._plan_entry, translator._mark_unit
+
+        def timed_plan_entry(content_type, entry_id, source_entry, target_locales, *args):
+            now = time.perf_counter()
+            with self.lock:
+                for target_locale in target_locales:
+                    self.started[(entry_id, target_locale)] = now
+            return plan_entry(content_type, entry_id, source_entry, target_locales, *args)
+
+        def timed_mark_unit(entry_id, target_locale, status, error=None):
+            started = self.started.pop((entry_id, target_locale), None)
+            if started is not None and status == 'completed':
+                with self.lock:
+                    self.latencies.append(time.perf_counter() - started)
+            return mark_unit(entry_id, target_locale, status, error)
+
+        translator._plan_entry = timed_plan_entry
+        translator._mark_unit = timed_mark_unit
+
+def run(args):
+    locales = [f"l{index}" for index in range(args.locales)]
+    models = [f"model-{index}" for index in range(max(1, args.models))]
+    field_names = [f"field{index}" for index in range(args.fields)]
+    corpus = make_corpus(args.entries, args.fields, args.field_length, args.seed)
+
+    process, strapi_url, ollama_urls = start_servers(
+        {
+            'entries': corpus,
+            'field_names': field_names,
+            'locales': [SOURCE_LOCALE] + locales,
+            'latency': args.strapi_latency,
+            'error_rate': args.strapi_error_rate,
+            'seed': args.seed
+        },
+        {
+            'models': models,
+            'latency': args.ollama_latency,
+            'tokens_per_second': args.tokens_per_second,
+            'model_load_time': args.model_load_time,
+            'error_rate': args.ollama_error_rate,
+            'parallel': args.ollama_parallel,
+            'seed': args.seed
+        },
+        args.ollama_servers
+    )
+
+    try:
+        workdir = tempfile.mkdtemp(prefix='translator-benchmark-')
+        configure_environment(args, strapi_url, ollama_urls, workdir, locales, models)
+
+        # Imported only now, because settings are read from the environment at import
+        from services.logging_config import configure_logging
+        from services.translator import TranslatorService
+
+        # Logs go to stderr, so they never mix with the JSON report
+        configure_logging(level=args.log_level)
+
+        translator = TranslatorService()
+        timer = UnitTimer(translator)
+
+        if not args.no_tracemalloc:
+            tracemalloc.start()
+        started = time.perf_counter()
+        translator.batch_translate(CONTENT_TYPE, [], locales)
+        duration = time.perf_counter() - started
+        peak_traced = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+        tracemalloc.stop()
+
+        status = translator.get_job_status()
+        latencies = timer.latencies
+        report = {
+            'settings': vars(args),
+            'duration_seconds': round(duration, 3),
+            'units': {
+                'total': status['total'],
+                'completed': len(latencies),
+                'errors': status['error_count']
+            },
+            'throughput': {
+                'units_per_second': round(len(latencies) / duration, 2) if duration else None,
+                'entries_per_second': round(args.entries / duration, 2) if duration else None
+            },
+            'unit_latency_ms': {
+                name: round(value * 1000, 1) if value is not None else None
+                for name, value in (
+                    ('p50', percentile(latencies, 0.50)),
+                    ('p95', percentile(latencies, 0.95)),
+                    ('p99', percentile(latencies, 0.99)),
+                    ('max', max(latencies) if latencies else None)
+                )
+            },
+            'upstream_calls': {
+                'strapi': get_stats(strapi_url),
+                'ollama': sum((Counter(get_stats(url)) for url in ollama_urls), Counter()),
+                'ollama_per_server': [get_stats(url) for url in ollama_urls]
+            },
+            'memory': {
+                'peak_traced_mb': round(peak_traced / 2**20, 1) if peak_traced is not None else None,
+                # ru_maxrss is in kilobytes on Linux
+                'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+            }
+        }
+    finally:
+        process.terminate()
+    return report
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    return 0 if report['units']['completed'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
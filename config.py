@@ -1,9 +1,12 @@
 import os
 import json
+import logging
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-key')
     
@@ -11,32 +14,210 @@ class Config:
     STRAPI_BASE_URL = os.environ.get('STRAPI_BASE_URL', 'http://localhost:1337')
     STRAPI_API_TOKEN = os.environ.get('STRAPI_API_TOKEN', '')
     STRAPI_SOURCE_LOCALE = os.environ.get('STRAPI_SOURCE_LOCALE', 'en')
+    # Entries per page when listing collections (Strapi caps this at its maxLimit, 100 by default)
+    STRAPI_PAGE_SIZE = int(os.environ.get('STRAPI_PAGE_SIZE', '100'))
+    # Write-back: writer threads, writes per second (0 = no limit), retries of a
+    # failed write with backoff doubling from STRAPI_WRITE_BACKOFF seconds, and
+    # how many writes may wait before translators block
+    STRAPI_WRITE_WORKERS = int(os.environ.get('STRAPI_WRITE_WORKERS', '4'))
+    STRAPI_WRITE_RATE = float(os.environ.get('STRAPI_WRITE_RATE', '0'))
+    STRAPI_WRITE_RETRIES = int(os.environ.get('STRAPI_WRITE_RETRIES', '3'))
+    STRAPI_WRITE_BACKOFF = float(os.environ.get('STRAPI_WRITE_BACKOFF', '1.0'))
+    STRAPI_WRITE_QUEUE_SIZE = int(os.environ.get('STRAPI_WRITE_QUEUE_SIZE', '100'))
     
     # Ollama configuration
+    # One URL, or several separated by commas to spread generations over a pool of servers
     OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
-    
+    # Pool health: seconds between checks, failures before a server is ejected, and for how long
+    OLLAMA_HEALTH_INTERVAL = float(os.environ.get('OLLAMA_HEALTH_INTERVAL', '15'))
+    OLLAMA_EJECT_AFTER = int(os.environ.get('OLLAMA_EJECT_AFTER', '3'))
+    OLLAMA_EJECT_SECONDS = float(os.environ.get('OLLAMA_EJECT_SECONDS', '30'))
+
+    # HTTP clients: timeouts in seconds, pooled connections per host and retry backoff
+    STRAPI_CONNECT_TIMEOUT = float(os.environ.get('STRAPI_CONNECT_TIMEOUT', '5'))
+    STRAPI_READ_TIMEOUT = float(os.environ.get('STRAPI_READ_TIMEOUT', '30'))
+    OLLAMA_CONNECT_TIMEOUT = float(os.environ.get('OLLAMA_CONNECT_TIMEOUT', '5'))
+    OLLAMA_READ_TIMEOUT = float(os.environ.get('OLLAMA_READ_TIMEOUT', '300'))
+    HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', '10'))
+    HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', '3'))
+    HTTP_BACKOFF_FACTOR = float(os.environ.get('HTTP_BACKOFF_FACTOR', '0.5'))
+
+    # Metadata cache TTLs in seconds: Strapi content types/locales, Ollama models,
+    # and how soon to retry after an upstream returned nothing
+    METADATA_CACHE_TTL = float(os.environ.get('METADATA_CACHE_TTL', '300'))
+    OLLAMA_MODELS_CACHE_TTL = float(os.environ.get('OLLAMA_MODELS_CACHE_TTL', '60'))
+    METADATA_CACHE_FAILURE_TTL = float(os.environ.get('METADATA_CACHE_FAILURE_TTL', '10'))
+
+    # Background job configuration
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+    JOB_HISTORY_LIMIT = int(os.environ.get('JOB_HISTORY_LIMIT', '50'))
+    # Durable job and unit state; unfinished jobs resume on start-up
+    JOB_STORE_PATH = os.environ.get('JOB_STORE_PATH', 'translation_jobs.db')
+    JOB_RESUME_ON_START = os.environ.get('JOB_RESUME_ON_START', 'true').lower() == 'true'
+    # Recent errors kept per job, events kept for reconnecting /events streams,
+    # and seconds between keep-alives on those streams
+    JOB_ERROR_BUFFER = int(os.environ.get('JOB_ERROR_BUFFER', '100'))
+    JOB_EVENTS_HISTORY = int(os.environ.get('JOB_EVENTS_HISTORY', '1000'))
+    JOB_EVENTS_KEEPALIVE = float(os.environ.get('JOB_EVENTS_KEEPALIVE', '15'))
+
+    # Concurrency: field/locale fan-out per entry (1 = serial) and Ollama limits per server
+    TRANSLATION_CONCURRENCY = int(os.environ.get('TRANSLATION_CONCURRENCY', '1'))
+    OLLAMA_MAX_CONCURRENCY = int(os.environ.get('OLLAMA_MAX_CONCURRENCY', '4'))
+    OLLAMA_MODEL_CONCURRENCY = int(os.environ.get('OLLAMA_MODEL_CONCURRENCY', '2'))
+    # Per-model overrides, e.g. "llama3:8b=4,mistral=1"
+    OLLAMA_MODEL_CONCURRENCY_OVERRIDES = os.environ.get('OLLAMA_MODEL_CONCURRENCY_OVERRIDES', '')
+
+    # Batch pipeline: 'sync' (threads) or 'async' (asyncio stages with bounded queues)
+    TRANSLATION_PIPELINE = os.environ.get('TRANSLATION_PIPELINE', 'sync').lower()
+    PIPELINE_TRANSLATE_WORKERS = int(os.environ.get('PIPELINE_TRANSLATE_WORKERS', '32'))
+    PIPELINE_WRITE_WORKERS = int(os.environ.get('PIPELINE_WRITE_WORKERS', '4'))
+    PIPELINE_QUEUE_SIZE = int(os.environ.get('PIPELINE_QUEUE_SIZE', '100'))
+
+    # Pack all fields of an entry into one JSON-mode Ollama call per locale
+    OLLAMA_BATCH_FIELDS = os.environ.get('OLLAMA_BATCH_FIELDS', 'true').lower() == 'true'
+    OLLAMA_BATCH_MAX_CHARS = int(os.environ.get('OLLAMA_BATCH_MAX_CHARS', '4000'))
+
+    # Context window in tokens assumed for models without a size in the mappings file
+    # (Ollama's default), and chunks of one long text translated at the same time
+    OLLAMA_CONTEXT_SIZE = int(os.environ.get('OLLAMA_CONTEXT_SIZE', '2048'))
+    OLLAMA_CHUNK_CONCURRENCY = int(os.environ.get('OLLAMA_CHUNK_CONCURRENCY', '2'))
+
+    # Stream generations; stop any whose output exceeds ratio x source length + slack characters
+    OLLAMA_STREAM = os.environ.get('OLLAMA_STREAM', 'true').lower() == 'true'
+    OLLAMA_MAX_OUTPUT_RATIO = float(os.environ.get('OLLAMA_MAX_OUTPUT_RATIO', '3.0'))
+    OLLAMA_MAX_OUTPUT_SLACK = int(os.environ.get('OLLAMA_MAX_OUTPUT_SLACK', '200'))
+
+    # Model scheduling: batches run one model at a time over windows of entries.
+    # keep_alive is sent with every request (e.g. "30m", '' = Ollama's default),
+    # and the next model can be loaded while the current one finishes its window
+    SCHEDULE_WINDOW = int(os.environ.get('SCHEDULE_WINDOW', '100'))
+    OLLAMA_KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE', '')
+    OLLAMA_PRELOAD_NEXT_MODEL = os.environ.get('OLLAMA_PRELOAD_NEXT_MODEL', 'false').lower() == 'true'
+
+    # Translation memory: SQLite cache of previous translations (TTL in seconds, 0 = never expire)
+    TRANSLATION_MEMORY_ENABLED = os.environ.get('TRANSLATION_MEMORY_ENABLED', 'true').lower() == 'true'
+    TRANSLATION_MEMORY_PATH = os.environ.get('TRANSLATION_MEMORY_PATH', 'translation_memory.db')
+    TRANSLATION_MEMORY_MAX_ENTRIES = int(os.environ.get('TRANSLATION_MEMORY_MAX_ENTRIES', '100000'))
+    TRANSLATION_MEMORY_TTL = int(os.environ.get('TRANSLATION_MEMORY_TTL', '0'))
+
+    # Strapi webhooks: secret expected as "Authorization: Bearer <secret>" ('' = webhooks refused),
+    # seconds an entry must go unchanged before it is translated and the longest it waits,
+    # and the target locales (comma-separated, '' = every locale with a model)
+    WEBHOOK_SECRET = os.environ.get('WEBHOOK_SECRET', '')
+    WEBHOOK_DEBOUNCE_SECONDS = float(os.environ.get('WEBHOOK_DEBOUNCE_SECONDS', '30'))
+    WEBHOOK_MAX_DELAY = float(os.environ.get('WEBHOOK_MAX_DELAY', '300'))
+    WEBHOOK_TARGET_LOCALES = os.environ.get('WEBHOOK_TARGET_LOCALES', '')
+
+    # Fingerprints of translated source content, used by incremental jobs
+    FINGERPRINT_STORE_PATH = os.environ.get('FINGERPRINT_STORE_PATH', 'translation_state.db')
+
+    # Logging: level, 'text' or 'json' lines, and 1-in-N sampling of per-request debug messages
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text').lower()
+    LOG_SAMPLE_RATE = int(os.environ.get('LOG_SAMPLE_RATE', '1'))
+
     # Path for storing model mappings
     CONFIG_FILE = os.environ.get('CONFIG_FILE', 'model_mappings.json')
     
     @staticmethod
-    def get_model_mappings():
-        """Get model mappings from config file"""
+    def _load_mappings_file():
+        """Read the model mappings file, including its sections"""
         try:
             if os.path.exists(Config.CONFIG_FILE):
                 with open(Config.CONFIG_FILE, 'r') as f:
                     return json.load(f)
             return {}
         except Exception as e:
-            print(f"Error loading model mappings: {e}")
+            logger.error("Error loading model mappings: %s", e)
             return {}
     
+    @staticmethod
+    def get_model_mappings():
+        """Get the locale -> model mappings from the config file"""
+        return {
+            locale: model_name for locale, model_name in Config._load_mappings_file().items()
+            if isinstance(model_name, str)
+        }
+    
+    @staticmethod
+    def get_derived_locales():
+        """
+        Get the locales produced from another locale's translation
+        
+        Read from the "derived_locales" section of the mappings file, e.g.
+        {"pt-PT": {"from": "pt-BR", "mode": "localize"},
+         "fr-CA": {"from": "fr", "mode": "copy", "overrides": {"e-mail": "courriel"}}}
+        
+        Returns:
+            dict: Locale -> {'from', 'mode', 'overrides'}; mode is 'localize'
+                (a localization pass over the parent's text) or 'copy', and
+                overrides maps text to its replacement in the derived locale
+        """
+        section = Config._load_mappings_file().get('derived_locales')
+        derived = {}
+        for locale, spec in (section.items() if isinstance(section, dict) else ()):
+            if not isinstance(spec, dict) or not isinstance(spec.get('from'), str) or spec['from'] == locale:
+                logger.warning("Ignoring invalid derived locale: %s", locale)
+                continue
+            mode = spec.get('mode', 'localize')
+            overrides = spec.get('overrides') or {}
+            if mode not in ('copy', 'localize') or not isinstance(overrides, dict):
+                logger.warning("Ignoring invalid derived locale: %s", locale)
+                continue
+            derived[locale] = {'from': spec['from'], 'mode': mode, 'overrides': overrides}
+        return derived
+    
+    @staticmethod
+    def get_context_sizes():
+        """
+        Get the context window of each model, in tokens
+        
+        Read from the "context_sizes" section of the mappings file, e.g.
+        {"llama3:8b": 8192}. Models not listed use OLLAMA_CONTEXT_SIZE.
+        
+        Returns:
+            dict: Model name -> context size
+        """
+        section = Config._load_mappings_file().get('context_sizes')
+        sizes = {}
+        for model_name, size in (section.items() if isinstance(section, dict) else ()):
+            if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+                logger.warning("Ignoring invalid context size for %s: %s", model_name, size)
+                continue
+            sizes[model_name] = size
+        return sizes
+    
+    @staticmethod
+    def get_ollama_base_urls():
+        """Split OLLAMA_BASE_URL into the list of Ollama servers"""
+        return [url.strip() for url in Config.OLLAMA_BASE_URL.split(',') if url.strip()]
+    
+    @staticmethod
+    def get_model_concurrency():
+        """Parse per-model concurrency overrides into a dict of model -> limit"""
+        limits = {}
+        for item in Config.OLLAMA_MODEL_CONCURRENCY_OVERRIDES.split(','):
+            # Model names may contain ':' (tags), so split on the last '='
+            model_name, sep, limit = item.strip().rpartition('=')
+            if not sep or not model_name:
+                continue
+            try:
+                limits[model_name] = max(1, int(limit))
+            except ValueError:
+                logger.warning("Ignoring invalid concurrency override: %s", item)
+        return limits
+
     @staticmethod
     def save_model_mappings(mappings):
-        """Save model mappings to config file"""
+        """Save model mappings to config file, keeping sections such as derived_locales"""
+        sections = {
+            key: value for key, value in Config._load_mappings_file().items()
+            if not isinstance(value, str) and key not in mappings
+        }
         try:
             with open(Config.CONFIG_FILE, 'w') as f:
-                json.dump(mappings, f, indent=2)
+                json.dump(dict(mappings, **sections), f, indent=2)
             return True
         except Exception as e:
-            print(f"Error saving model mappings: {e}")
+            logger.error("Error saving model mappings: %s", e)
             return False
\ No newline at end of file
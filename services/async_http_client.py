@@ -0,0 +1,59 @@
+import asyncio
+import aiohttp
+from config import Config
+from services.http_client import RETRY_METHODS
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def create_async_session(connect_timeout, read_timeout, pool_size=None):
+    """
+    Build an aiohttp session with a bounded connection pool and timeouts
+
+    Must be called from inside a running event loop.
+    """
+    connector = aiohttp.TCPConnector(limit=pool_size or Config.HTTP_POOL_SIZE)
+    timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+def _retry_after(response):
+    """Seconds requested by a Retry-After header, if it holds a number"""
+    try:
+        return max(0.0, float(response.headers.get('Retry-After', '')))
+    except ValueError:
+        return None
+
+async def request(session, method, url, max_retries=None, backoff_factor=None, **kwargs):
+    """
+    Send a request, retrying connection errors, 429 and 5xx with exponential backoff
+
+    Mirrors the retry policy of the sync sessions in http_client: Retry-After
+    is honoured, a POST is only resent when it could not connect, and once
+    retries run out the last response is returned so callers can handle the
+    status code themselves. The caller must release
+    the returned response, e.g. with `async with`.
+
+    Returns:
+        aiohttp.ClientResponse: Response of the last attempt
+    """
+    max_retries = max_retries if max_retries is not None else Config.HTTP_MAX_RETRIES
+    backoff_factor = backoff_factor if backoff_factor is not None else Config.HTTP_BACKOFF_FACTOR
+
+    idempotent = method.upper() in RETRY_METHODS
+
+    for attempt in range(max_retries + 1):
+        delay = backoff_factor * (2 ** attempt)
+        try:
+            response = await session.request(method, url, **kwargs)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            # Past the connect, a non-idempotent request may already be running on the server
+            if attempt == max_retries or not (idempotent or isinstance(e, aiohttp.ClientConnectorError)):
+                raise
+            await asyncio.sleep(delay)
+            continue
+
+        if response.status in RETRY_STATUSES and idempotent and attempt < max_retries:
+            retry_after = _retry_after(response)
+            response.release()
+            await asyncio.sleep(retry_after if retry_after is not None else delay)
+            continue
+        return response
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import logging
+import time
+import aiohttp
+from services.async_http_client import request
+from services.ollama_service import OllamaService
+from services.ollama_pool import BackendError, OllamaPool, ollama_pool
+from services.concurrency import ollama_limiter
+from services.generation_stats import generation_stats
+from services.text_chunker import estimate_tokens
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class AsyncOllamaService:
+    """asyncio counterpart of OllamaService used by the async translation pipeline"""
+
+    PROMPT_VERSION = OllamaService.PROMPT_VERSION
+
+    def __init__(self, session, base_url=None, batch_max_chars=None, cancel_event=None, pool=None,
+                 context_sizes=None, limiter=None):
+        self.session = session
+        if pool is None and base_url:
+            pool = OllamaPool(base_url.split(','))
+        self.pool = pool or ollama_pool
+        self.batch_max_chars = batch_max_chars or Config.OLLAMA_BATCH_MAX_CHARS
+        self.stream = Config.OLLAMA_STREAM
+        self.keep_alive = Config.OLLAMA_KEEP_ALIVE
+        self.context_sizes = context_sizes if context_sizes is not None else Config.get_context_sizes()
+        self.chunk_concurrency = max(Config.OLLAMA_CHUNK_CONCURRENCY, 1)
+        self.limiter = limiter or ollama_limiter
+        self.cancel_event = cancel_event
+
+    def _is_cancelled(self):
+        """Check whether the owning job asked to stop generating"""
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    async def generate_translation(self, model_name, source_text, source_lang, target_lang):
+        """
+        Generate translation using Ollama model, in chunks when the text is too long
+
+        Returns:
+            str: Translated text or None if there was an error
+        """
+        try:
+            max_tokens = OllamaService._source_budget(model_name, self.context_sizes)
+            if estimate_tokens(source_text) > max_tokens:
+                return await self._generate_chunks(model_name, source_text, source_lang, target_lang, max_tokens)
+
+            payload = {
+                "model": model_name,
+                "prompt": OllamaService._translation_prompt(source_text, source_lang, target_lang)
+            }
+            response_text = await self._generate(payload, len(source_text), target_lang)
+            if response_text is None:
+                return None
+            return response_text.strip()
+        except Exception as e:
+            logger.error("Error generating translation: %s", e)
+            return None
+
+    async def _generate_chunks(self, model_name, source_text, source_lang, target_lang, max_tokens):
+        """Translate a long text in chunks, see OllamaService.generate_translation"""
+        chunks = OllamaService._split_chunks(model_name, source_text, max_tokens)
+        prompts = OllamaService._chunk_prompts(chunks, source_lang, target_lang)
+
+        async def translate_chunk(index):
+            if prompts[index] is None:
+                return chunks[index][0]
+            async with semaphore:
+                response_text = await self._generate(
+                    {"model": model_name, "prompt": prompts[index]}, len(chunks[index][0]), target_lang
+                )
+            return response_text.strip() if response_text else None
+
+        # The caller holds one slot; chunks beyond the first run only on slots free now
+        wanted = min(self.chunk_concurrency, sum(prompt is not None for prompt in prompts)) - 1
+        with self.limiter.extra_slots(model_name, wanted) as extra:
+            semaphore = asyncio.Semaphore(extra + 1)
+            translated = await asyncio.gather(*(translate_chunk(index) for index in range(len(chunks))))
+        return OllamaService._join_chunks(chunks, translated)
+
+    async def generate_batch_translation(self, model_name, fields, source_lang, target_lang):
+        """
+        Translate several fields in JSON-mode batches with per-field fallback
+
+        Returns:
+            dict: Field name -> translated text, for the fields that succeeded
+        """
+        translations = {}
+        max_tokens = OllamaService._source_budget(model_name, self.context_sizes)
+        for batch in OllamaService._split_batches(fields, self.batch_max_chars, max_tokens):
+            if len(batch) > 1:
+                translations.update(
+                    await self._generate_json_batch(model_name, batch, source_lang, target_lang)
+                )
+
+            # Per-field fallback for single fields and anything the batch missed
+            for field_name, field_value in batch.items():
+                if field_name in translations:
+                    continue
+                translated_text = await self.generate_translation(
+                    model_name, field_value, source_lang, target_lang
+                )
+                if translated_text:
+                    translations[field_name] = translated_text
+        return translations
+
+    async def _generate_json_batch(self, model_name, batch, source_lang, target_lang):
+        """Translate a batch of fields in one JSON-mode request"""
+        try:
+            payload = {
+                "model": model_name,
+                "prompt": OllamaService._batch_prompt(batch, source_lang, target_lang),
+                "format": "json"
+            }
+            response_text = await self._generate(payload, OllamaService._batch_reply_length(batch), target_lang)
+            if response_text is None:
+                return {}
+            return OllamaService._parse_batch_reply(batch, response_text)
+        except Exception as e:
+            logger.error("Error generating batch translation: %s", e)
+            return {}
+
+    async def _generate(self, payload, source_length, target_lang):
+        """
+        Run a generation request, streaming the reply when enabled
+
+        Same behaviour as OllamaService._generate: output length limit,
+        cancellation, time-to-first-token metrics and failover across the
+        servers of the pool.
+
+        Returns:
+            str: Generated text or None if there was an error or it was stopped
+        """
+        model_name = payload['model']
+        if self.keep_alive:
+            payload = dict(payload, keep_alive=self.keep_alive)
+        if model_name in self.context_sizes:
+            payload = dict(payload, options={'num_ctx': self.context_sizes[model_name]})
+        tried = set()
+
+        while len(tried) < len(self.pool.backends):
+            if self._is_cancelled():
+                return None
+            try:
+                with self.pool.route(model_name, tried) as backend:
+                    try:
+                        return await self._generate_on(backend.url, model_name, payload, source_length, target_lang)
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        raise BackendError(e) from e
+            except BackendError as e:
+                tried.add(backend.url)
+                if len(tried) < len(self.pool.backends):
+                    logger.warning("Ollama server %s failed (%s), trying another", backend.url, e)
+                else:
+                    logger.error("Error from Ollama API: %s", e)
+        return None
+
+    async def _generate_on(self, base_url, model_name, payload, source_length, target_lang):
+        """
+        Run a generation on one Ollama server, see _generate
+
+        The request is sent once; if the server fails, _generate moves the
+        generation to another one.
+
+        Raises:
+            BackendError: The server answered with an error
+        """
+        url = f"{base_url}/api/generate"
+        if not self.stream:
+            started_at = time.monotonic()
+            async with await request(self.session, 'POST', url, max_retries=0, json=dict(payload, stream=False)) as response:
+                if response.status != 200:
+                    raise BackendError(f"{response.status}, {(await response.text())[:500]}")
+                data = await response.json(content_type=None)
+            OllamaService._observe_generation(model_name, time.monotonic() - started_at, data.get('eval_count'))
+            return data.get('response', '')
+
+        max_chars = OllamaService._max_output_chars(source_length)
+        started_at = time.monotonic()
+        first_token_at = None
+        parts = []
+        length = 0
+        final = {}
+
+        # Leaving the async with block before the end of the stream closes the connection,
+        # which stops Ollama generating; a stream read to the end goes back to the pool
+        async with await request(self.session, 'POST', url, max_retries=0, json=dict(payload, stream=True)) as response:
+            if response.status != 200:
+                raise BackendError(f"{response.status}, {(await response.text())[:500]}")
+
+            async for line in response.content:
+                line = line.strip()
+                # Anything after the done chunk is only read to reach the end of the stream
+                if final or not line:
+                    continue
+                if self._is_cancelled():
+                    logger.info("Generation with %s cancelled", model_name)
+                    generation_stats.record_aborted(model_name, target_lang)
+                    return None
+
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    raise BackendError(chunk['error'])
+
+                text = chunk.get('response', '')
+                if text and first_token_at is None:
+                    first_token_at = time.monotonic()
+                parts.append(text)
+                length += len(text)
+
+                if length > max_chars:
+                    logger.warning("Stopping generation with %s: output exceeded %s characters", model_name, max_chars)
+                    generation_stats.record_aborted(model_name, target_lang)
+                    return None
+                if chunk.get('done'):
+                    final = chunk
+
+        OllamaService._record_generation(
+            model_name, target_lang, started_at, first_token_at, time.monotonic(), final, len(parts)
+        )
+        return ''.join(parts)
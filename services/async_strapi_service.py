@@ -0,0 +1,116 @@
+import logging
+from services.async_http_client import request
+from services.strapi_service import StrapiError, StrapiService
+from services.metrics import STRAPI_REQUEST_SECONDS, timed
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class AsyncStrapiService:
+    """asyncio counterpart of StrapiService used by the async translation pipeline"""
+
+    def __init__(self, session, strapi_service=None):
+        # Reuse the sync client for its settings and request-building helpers
+        self.strapi_service = strapi_service or StrapiService()
+        self.session = session
+        self.base_url = self.strapi_service.base_url
+        self.headers = self.strapi_service.headers
+        self.source_locale = self.strapi_service.source_locale
+
+    async def iter_entries(self, content_type, locale=None, fields=None, populate=None, page_size=None,
+                           on_total=None, filters=None):
+        """
+        Stream entries for a content type page by page
+
+        Takes the same arguments as StrapiService.iter_entries.
+
+        Yields:
+            dict: Entry data
+
+        Raises:
+            StrapiError: A page could not be fetched
+        """
+        api_path = self.strapi_service._get_api_path(content_type)
+        page_size = page_size or Config.STRAPI_PAGE_SIZE
+        params = self.strapi_service._entries_params(locale, fields, populate, filters)
+        url = f"{self.base_url}/api/{api_path}"
+
+        page = 1
+        while True:
+            params['pagination[page]'] = page
+            params['pagination[pageSize]'] = page_size
+
+            try:
+                with STRAPI_REQUEST_SECONDS.time(operation='list_entries'):
+                    async with await request(self.session, 'GET', url, headers=self.headers, params=params) as response:
+                        if response.status != 200:
+                            raise StrapiError(
+                                f"Failed to fetch entries page {page}: {response.status} {(await response.text())[:500]}"
+                            )
+                        data = await response.json()
+            except StrapiError:
+                raise
+            except Exception as e:
+                raise StrapiError(f"Error fetching entries page {page}: {e}") from e
+
+            entries = data.get('data', [])
+            pagination = data.get('meta', {}).get('pagination', {})
+            if page == 1 and on_total and 'total' in pagination:
+                on_total(pagination['total'])
+
+            for entry in entries:
+                yield entry
+
+            if self.strapi_service._is_last_page(page, page_size, entries, pagination):
+                return
+            page += 1
+
+    async def iter_entries_by_ids(self, content_type, entry_ids, locale=None, chunk_size=None, populate=None):
+        """
+        Fetch many entries by document ID with a filters[documentId][$in] filter
+
+        Yields:
+            tuple: (entry_id, entry) in request order, with entry set to None
+                for IDs Strapi did not return
+        """
+        chunk_size = chunk_size or Config.STRAPI_PAGE_SIZE
+        entry_ids = [str(entry_id) for entry_id in entry_ids]
+
+        for start in range(0, len(entry_ids), chunk_size):
+            chunk = entry_ids[start:start + chunk_size]
+            filters = self.strapi_service._document_id_filters(chunk)
+            found = {}
+            try:
+                async for entry in self.iter_entries(
+                    content_type, locale, populate=populate, page_size=chunk_size, filters=filters
+                ):
+                    found[str(entry.get('documentId'))] = entry
+            except StrapiError as e:
+                # Missing entries fall back to one fetch each, see StrapiService.iter_entries_by_ids
+                logger.error("%s", e)
+                found = {}
+            for entry_id in chunk:
+                yield entry_id, found.get(entry_id)
+
+    @timed(STRAPI_REQUEST_SECONDS, operation='get_entry')
+    async def get_entry(self, content_type, entry_id, locale=None, populate=None):
+        """
+        Fetch a specific entry, see StrapiService.get_entry
+
+        Returns:
+            dict: Entry data or None if it could not be fetched
+        """
+        api_path = self.strapi_service._get_api_path(content_type)
+        url = f"{self.base_url}/api/{api_path}/{entry_id}"
+        params = self.strapi_service._entries_params(locale, populate=populate)
+
+        try:
+            async with await request(self.session, 'GET', url, headers=self.headers, params=params) as response:
+                if response.status != 200:
+                    logger.error("Failed to fetch entry %s: %s", entry_id, response.status)
+                    return None
+                data = await response.json()
+                return data.get('data')
+        except Exception as e:
+            logger.error("Error fetching entry %s: %s", entry_id, e)
+            return None
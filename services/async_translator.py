@@ -0,0 +1,414 @@
+import asyncio
+import logging
+from services.async_http_client import create_async_session
+from services.async_strapi_service import AsyncStrapiService
+from services.async_ollama_service import AsyncOllamaService
+from services.metrics import PIPELINE_QUEUE_DEPTH
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+class _MeteredQueue(asyncio.Queue):
+    """Bounded pipeline queue that reports its length in the queue depth metric"""
+
+    def __init__(self, maxsize, name):
+        super().__init__(maxsize)
+        self.name = name
+
+    def _put(self, item):
+        super()._put(item)
+        PIPELINE_QUEUE_DEPTH.inc(queue=self.name)
+
+    def _get(self):
+        PIPELINE_QUEUE_DEPTH.dec(queue=self.name)
+        return super()._get()
+
+class AsyncTranslatorService:
+    """
+    asyncio pipeline for batch translation
+
+    Entries flow through four stages connected by bounded queues:
+    fetch source -> extract fields -> translate -> write back. Each stage has
+    its own number of workers, and a full queue makes the stage before it
+    wait, so thousands of in-flight units cost coroutines rather than threads.
+    The wrapped TranslatorService supplies the job status, model mappings,
+    translation memory, fingerprints and cancellation.
+    """
+
+    def __init__(self, translator, translate_workers=None, write_workers=None, queue_size=None):
+        self.translator = translator
+        self.translate_workers = translate_workers or Config.PIPELINE_TRANSLATE_WORKERS
+        self.write_workers = write_workers or Config.PIPELINE_WRITE_WORKERS
+        self.queue_size = queue_size or Config.PIPELINE_QUEUE_SIZE
+
+    def batch_translate(self, content_type, entry_ids, target_locales, incremental=False):
+        """Run the pipeline to completion from synchronous code"""
+        return asyncio.run(
+            self.abatch_translate(content_type, entry_ids, target_locales, incremental)
+        )
+
+    async def abatch_translate(self, content_type, entry_ids, target_locales, incremental=False):
+        """
+        Batch translate multiple entries
+
+        Takes the same arguments and returns the same results as
+        TranslatorService.batch_translate.
+        """
+        translator = self.translator
+        if entry_ids:
+            current_job = f"Batch translating {len(entry_ids)} entries of {content_type}"
+        else:
+            current_job = f"Batch translating all entries of {content_type}"
+
+        translator.job_status = {
+            'current_job': current_job,
+            'completed': 0,
+            'total': len(entry_ids) * len(target_locales),
+            'errors': [],
+            'error_count': 0,
+            'current_entry': None,
+            'current_locale': None,
+            'status': 'running'
+        }
+        batch_results = {
+            'content_type': content_type,
+            'entries': []
+        }
+
+        strapi_session = create_async_session(Config.STRAPI_CONNECT_TIMEOUT, Config.STRAPI_READ_TIMEOUT)
+        ollama_session = create_async_session(Config.OLLAMA_CONNECT_TIMEOUT, Config.OLLAMA_READ_TIMEOUT)
+        async with strapi_session, ollama_session:
+            self.strapi_service = AsyncStrapiService(strapi_session, translator.strapi_service)
+            self.ollama_service = AsyncOllamaService(
+                ollama_session, pool=translator.ollama_service.pool,
+                cancel_event=translator.cancel_event, limiter=translator.limiter
+            )
+            # Only one model generates at a time; see _model_turn
+            self.active_model = None
+            self.active_count = 0
+            self.model_turn = asyncio.Condition()
+            # (entry_id, locale) -> [future of its translation, derived locales still to take it]
+            self.pivot_futures = {}
+            # Raised once the pipeline has drained, so the job ends as an error, not completed
+            self.fetch_error = None
+
+            entry_queue = _MeteredQueue(self.queue_size, 'entries')
+            unit_queue = _MeteredQueue(self.queue_size, 'units')
+            write_queue = _MeteredQueue(self.queue_size, 'writes')
+
+            async def extract(item):
+                return await self._extract(content_type, incremental, item)
+
+            async def write(unit):
+                return await self._write(content_type, unit)
+
+            try:
+                await asyncio.gather(
+                    self._fetch(content_type, entry_ids, target_locales, entry_queue, batch_results),
+                    self._stage(entry_queue, extract, 1, unit_queue, self.translate_workers),
+                    self._stage(unit_queue, self._translate, self.translate_workers, write_queue, self.write_workers),
+                    self._stage(write_queue, write, self.write_workers)
+                )
+            finally:
+                translator._abandon_units()
+            if self.fetch_error is not None:
+                raise self.fetch_error
+
+        translator.job_status['status'] = 'cancelled' if translator.is_cancelled() else 'completed'
+        return batch_results
+
+    async def _stage(self, inbox, handler, workers, outbox=None, downstream_workers=0):
+        """
+        Run a stage: workers pull items, handle them and pass results on
+
+        Each handler returns a list of items for the next stage. When every
+        worker has seen the end marker, one end marker is sent per downstream
+        worker.
+        """
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    return
+                try:
+                    produced = await handler(item)
+                except Exception as e:
+                    logger.exception("Error in translation pipeline: %s", e)
+                    self.translator._add_error(f"Pipeline error: {e}")
+                    continue
+                if outbox is not None:
+                    for result in produced:
+                        await outbox.put(result)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        if outbox is not None:
+            for _ in range(downstream_workers):
+                await outbox.put(_DONE)
+
+    async def _fetch(self, content_type, entry_ids, target_locales, outbox, batch_results):
+        """
+        Fetch stage: stream source entries from Strapi into the pipeline
+
+        Entries are collected into windows, and each window is sent one model
+        group at a time, so Ollama loads each model once per window.
+        """
+        translator = self.translator
+        groups = await asyncio.to_thread(translator._model_groups, target_locales)
+        populate = await asyncio.to_thread(translator.field_index.get_populate, content_type)
+
+        def set_total(total):
+            translator.job_status['total'] = total * len(target_locales)
+
+        try:
+            if entry_ids:
+                source_entries = self.strapi_service.iter_entries_by_ids(content_type, entry_ids, populate=populate)
+            else:
+                source_entries = self._stream_source_entries(content_type, populate, set_total)
+
+            # A full window is held back until the next one fills, so the
+            # last model group knows whether another window follows
+            window, ready = [], None
+            async for entry_id, source_entry in source_entries:
+                if translator.is_cancelled():
+                    break
+                results = {'entry_id': entry_id, 'translations': {}}
+                batch_results['entries'].append(results)
+
+                # Entries missing from the bulk response fall back to a single fetch
+                if source_entry is None:
+                    source_entry = await self.strapi_service.get_entry(content_type, entry_id, populate=populate)
+                if not source_entry:
+                    await asyncio.to_thread(
+                        translator._fail_entry, content_type, entry_id,
+                        translator._pending_locales(entry_id, target_locales), results
+                    )
+                    continue
+
+                window.append((entry_id, source_entry, results))
+                if len(window) >= translator.schedule_window:
+                    if ready:
+                        await self._send_window(ready, groups, outbox, True)
+                    ready, window = window, []
+            if ready:
+                await self._send_window(ready, groups, outbox, bool(window))
+            if window:
+                await self._send_window(window, groups, outbox, False)
+        except Exception as e:
+            logger.error("Error fetching source entries: %s", e)
+            self.fetch_error = e
+        finally:
+            # The extract stage has a single worker
+            await outbox.put(_DONE)
+
+    async def _send_window(self, window, groups, outbox, more_windows):
+        """Queue a window of entries for one model group after another"""
+        translator = self.translator
+        for group_index, (model_name, locales) in enumerate(groups):
+            for position, (entry_id, source_entry, results) in enumerate(window):
+                if translator.is_cancelled():
+                    return
+                if position == len(window) - 1:
+                    translator._preload_next_model(groups, group_index, more_windows)
+                await outbox.put((entry_id, source_entry, results, locales))
+
+    async def _stream_source_entries(self, content_type, populate, on_total):
+        """Yield (entry_id, entry) for every entry of the content type"""
+        async for entry in self.strapi_service.iter_entries(content_type, populate=populate, on_total=on_total):
+            # Use documentId for Strapi 5
+            yield str(entry.get('documentId', entry.get('id'))), entry
+
+    async def _extract(self, content_type, incremental, item):
+        """Extract stage: turn an entry into one translation unit per locale of its model group"""
+        translator = self.translator
+        entry_id, source_entry, results, target_locales = item
+        # Take the parents' translations before any locale is dropped, so
+        # every derived locale releases its hold on them
+        parents = {
+            target_locale: self._take_pivot(entry_id, translator.pivots[target_locale]['from'])
+            for target_locale in target_locales if target_locale in translator.pivots
+        }
+        if translator.is_cancelled():
+            return []
+        translator.job_status['current_entry'] = entry_id
+        target_locales = translator._pending_locales(entry_id, target_locales)
+        if not target_locales:
+            return []
+
+        # May fetch the content-type schema and records skipped units in the job store
+        locale_models, locale_fields, extraction = await asyncio.to_thread(
+            translator._plan_entry, content_type, entry_id, source_entry, target_locales, incremental, results
+        )
+        units = []
+        for target_locale, model_name in locale_models.items():
+            unit = {
+                'entry_id': entry_id,
+                'locale': target_locale,
+                'model': model_name,
+                'fields': locale_fields[target_locale],
+                'extraction': extraction,
+                'source_updated_at': source_entry.get('updatedAt'),
+                'results': results,
+                'parent': parents.get(target_locale)
+            }
+            if translator._is_pivot(target_locale):
+                # Resolved with the unit's translations for the locales derived from it
+                unit['translated_future'] = asyncio.get_running_loop().create_future()
+                children = sum(1 for pivot in translator.pivots.values() if pivot['from'] == target_locale)
+                self.pivot_futures[(entry_id, target_locale)] = [unit['translated_future'], children]
+            units.append(unit)
+        return units
+
+    def _take_pivot(self, entry_id, parent_locale):
+        """
+        Get the future of a parent locale's translation for a derived locale
+
+        Returns:
+            asyncio.Future: Resolves to the parent's translated segments, or
+                None when the parent is not translated in this run
+        """
+        key = (entry_id, parent_locale)
+        held = self.pivot_futures.get(key)
+        if held is None:
+            return None
+        held[1] -= 1
+        if held[1] == 0:
+            del self.pivot_futures[key]
+        return held[0]
+
+    async def _acquire_model_turn(self, model_name):
+        """
+        Wait until no other model is generating, then claim the turn
+
+        Units reach the translate stage grouped by model, so a model keeps
+        the turn until its group drains and Ollama does not switch models
+        back and forth.
+        """
+        async with self.model_turn:
+            await self.model_turn.wait_for(lambda: self.active_model in (None, model_name))
+            self.active_model = model_name
+            self.active_count += 1
+
+    async def _release_model_turn(self):
+        """Give up the turn once the last generation of the active model ends"""
+        async with self.model_turn:
+            self.active_count -= 1
+            if self.active_count == 0:
+                self.active_model = None
+                self.model_turn.notify_all()
+
+    async def _translate(self, unit):
+        """Translate stage: fill a unit's translations from memory and Ollama"""
+        translator = self.translator
+        unit['translated'] = {}
+        try:
+            if translator.is_cancelled():
+                return []
+
+            model_name, target_locale = unit['model'], unit['locale']
+            if target_locale in translator.pivots:
+                # Parents are queued ahead of the locales derived from them,
+                # so the parent is already being translated
+                parent_fields = await unit['parent'] if unit['parent'] is not None else {}
+                unit['translated'] = await self._derive_fields(model_name, unit['fields'], target_locale, parent_fields)
+            else:
+                unit['translated'] = await self._translate_fields(model_name, unit['fields'], target_locale)
+            return [unit]
+        finally:
+            if 'translated_future' in unit:
+                unit['translated_future'].set_result(unit['translated'])
+
+    async def _derive_fields(self, model_name, fields, target_locale, parent_fields):
+        """Async counterpart of TranslatorService._derive_fields"""
+        translator = self.translator
+        pivot = translator.pivots[target_locale]
+        parent_texts = {name: parent_fields[name] for name in fields if name in parent_fields}
+        if pivot['mode'] == 'copy':
+            derived = parent_texts
+        else:
+            derived = await self._translate_fields(model_name, parent_texts, target_locale, pivot['from'])
+        derived = translator._apply_overrides(derived, pivot['overrides'])
+
+        rest = {name: value for name, value in fields.items() if name not in parent_texts}
+        if rest:
+            derived.update(await self._translate_fields(model_name, rest, target_locale))
+        return derived
+
+    async def _translate_fields(self, model_name, fields, target_locale, source_locale=None):
+        """
+        Translate fields from memory and Ollama, holding the model's turn and slots
+
+        Returns:
+            dict: Field name -> translated text for the fields that succeeded
+        """
+        translator = self.translator
+        source_locale = source_locale or self.strapi_service.source_locale
+        # The translation memory, fingerprint and job stores are SQLite; keep them off the event loop
+        translations, memory_keys = await asyncio.to_thread(
+            translator._lookup_memory, model_name, fields, target_locale, source_locale
+        )
+        fields = {name: value for name, value in fields.items() if name not in translations}
+
+        if fields:
+            await self._acquire_model_turn(model_name)
+            try:
+                # The limiter is shared with every other job, sync or async
+                async with translator.limiter.aslot(model_name):
+                    if translator.is_cancelled():
+                        return translations
+                    if translator.batch_fields:
+                        generated = await self.ollama_service.generate_batch_translation(
+                            model_name, fields, source_locale, target_locale
+                        )
+                    else:
+                        generated = {}
+                        for field_name, field_value in fields.items():
+                            translated_text = await self.ollama_service.generate_translation(
+                                model_name, field_value, source_locale, target_locale
+                            )
+                            if translated_text:
+                                generated[field_name] = translated_text
+            finally:
+                await self._release_model_turn()
+            await asyncio.to_thread(
+                translator._store_memory, model_name, target_locale, memory_keys, generated, source_locale
+            )
+            translations.update(generated)
+        return translations
+
+    async def _write(self, content_type, unit):
+        """Write stage: hand a unit's translations to the Strapi writer and record the outcome"""
+        translator = self.translator
+        # Don't write partial results once the job is cancelled
+        if translator.is_cancelled():
+            return []
+
+        target_locale = unit['locale']
+        translator.job_status['current_locale'] = target_locale
+        translated_fields = unit['translated']
+        translator._report_missing_fields(target_locale, unit['fields'], translated_fields)
+
+        payload, written = unit['extraction'].rebuild(translated_fields)
+        if payload:
+            # The shared writer coalesces and retries the write; submitting
+            # blocks while its queue is full, so do it off the event loop
+            future = await asyncio.to_thread(
+                translator.writer.submit, translator.strapi_service,
+                content_type, unit['entry_id'], target_locale, payload
+            )
+            result = await asyncio.wrap_future(future)
+            await asyncio.to_thread(
+                translator._record_write,
+                content_type, unit['entry_id'], target_locale, unit['model'], unit['fields'],
+                {segment_id: translated_fields[segment_id] for segment_id in written},
+                result, unit['results'], unit['source_updated_at']
+            )
+        else:
+            await asyncio.to_thread(
+                translator._mark_unit, unit['entry_id'], target_locale, 'failed', "No fields were translated"
+            )
+
+        translator.job_status['completed'] += 1
+        return []
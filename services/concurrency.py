@@ -0,0 +1,142 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from services.metrics import OLLAMA_REQUESTS_IN_FLIGHT
+from config import Config
+
+class ConcurrencyLimiter:
+    """
+    Bound the number of in-flight Ollama calls globally and per model
+
+    The limits are per Ollama server, so they are multiplied by the number
+    of servers in OLLAMA_BASE_URL. Threads take slots with slot() and async
+    pipelines with aslot(); both draw on the same semaphores, so the limits
+    hold across every running job whichever pipeline it uses.
+    """
+
+    def __init__(self, global_limit=None, model_limits=None, default_model_limit=None, servers=None):
+        self.servers = servers or len(Config.get_ollama_base_urls()) or 1
+        self.global_limit = (global_limit or Config.OLLAMA_MAX_CONCURRENCY) * self.servers
+        self.model_limits = model_limits if model_limits is not None else Config.get_model_concurrency()
+        self.default_model_limit = default_model_limit or Config.OLLAMA_MODEL_CONCURRENCY
+        self.global_semaphore = threading.BoundedSemaphore(self.global_limit)
+        self.model_semaphores = {}
+        self.lock = threading.Lock()
+        # (event loop, future) of coroutines waiting for a slot; woken on every release
+        self.async_waiters = []
+
+    def model_limit(self, model_name):
+        """Calls to a model allowed in flight at once, across all servers"""
+        return self.model_limits.get(model_name, self.default_model_limit) * self.servers
+
+    def _get_model_semaphore(self, model_name):
+        """Get or lazily create the semaphore for a model"""
+        with self.lock:
+            semaphore = self.model_semaphores.get(model_name)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.model_limit(model_name))
+                self.model_semaphores[model_name] = semaphore
+            return semaphore
+
+    @contextmanager
+    def slot(self, model_name):
+        """
+        Hold one model slot and one global slot for the duration of a call
+
+        Args:
+            model_name (str): Name of the Ollama model the call goes to
+        """
+        # Take the model slot first so a busy model doesn't hold global slots
+        model_semaphore = self._get_model_semaphore(model_name)
+        model_semaphore.acquire()
+        try:
+            self.global_semaphore.acquire()
+            try:
+                with OLLAMA_REQUESTS_IN_FLIGHT.track(model=model_name):
+                    yield
+            finally:
+                self._release(self.global_semaphore)
+        finally:
+            self._release(model_semaphore)
+
+    @contextmanager
+    def extra_slots(self, model_name, wanted):
+        """
+        Take up to wanted more slots for a model without waiting, for a caller that already holds one
+
+        Waiting here could deadlock callers that each hold a slot and want
+        more, so only slots free right now are taken.
+
+        Yields:
+            int: Number of extra slots taken, possibly 0
+        """
+        model_semaphore = self._get_model_semaphore(model_name)
+        taken = 0
+        while taken < wanted and model_semaphore.acquire(blocking=False):
+            if not self.global_semaphore.acquire(blocking=False):
+                self._release(model_semaphore)
+                break
+            taken += 1
+        OLLAMA_REQUESTS_IN_FLIGHT.inc(taken, model=model_name)
+        try:
+            yield taken
+        finally:
+            OLLAMA_REQUESTS_IN_FLIGHT.dec(taken, model=model_name)
+            for _ in range(taken):
+                self._release(self.global_semaphore)
+                self._release(model_semaphore)
+
+    @asynccontextmanager
+    async def aslot(self, model_name):
+        """asyncio counterpart of slot(); waits without blocking the event loop"""
+        model_semaphore = self._get_model_semaphore(model_name)
+        await self._acquire_async(model_semaphore)
+        try:
+            await self._acquire_async(self.global_semaphore)
+            try:
+                with OLLAMA_REQUESTS_IN_FLIGHT.track(model=model_name):
+                    yield
+            finally:
+                self._release(self.global_semaphore)
+        finally:
+            self._release(model_semaphore)
+
+    async def _acquire_async(self, semaphore):
+        """Take a semaphore from a coroutine, waiting for a release whenever it is exhausted"""
+        loop = asyncio.get_running_loop()
+        while True:
+            waiter = (loop, loop.create_future())
+            # Register before trying, so a release in between still wakes us
+            with self.lock:
+                self.async_waiters.append(waiter)
+            if semaphore.acquire(blocking=False):
+                with self.lock:
+                    self.async_waiters.remove(waiter)
+                return
+            try:
+                await waiter[1]
+            finally:
+                with self.lock:
+                    if waiter in self.async_waiters:
+                        self.async_waiters.remove(waiter)
+
+    def _release(self, semaphore):
+        """Release a semaphore and wake the coroutines waiting for one, on whichever loop they run"""
+        semaphore.release()
+        with self.lock:
+            waiters, self.async_waiters = self.async_waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(self._wake, future)
+            except RuntimeError:
+                # The waiter's loop has closed
+                pass
+
+    @staticmethod
+    def _wake(future):
+        """Resolve a waiting coroutine's future, on its own loop"""
+        if not future.done():
+            future.set_result(None)
+
+# Shared by all translator instances so limits hold across concurrent jobs
+ollama_limiter = ConcurrencyLimiter()
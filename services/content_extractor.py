@@ -0,0 +1,615 @@
+import copy
+import re
+
+# Entry attributes that are never translated or written back
+SYSTEM_FIELDS = {'id', 'documentId', 'locale', 'createdAt', 'updatedAt', 'publishedAt', 'localizations'}
+
+# Keys inside components, dynamic zones and blocks whose strings are not prose
+NESTED_SKIP_KEYS = {
+    'id', 'documentId', '__component', 'type', 'url', 'href', 'slug', 'format',
+    'language', 'level', 'mime', 'hash', 'ext', 'provider', 'locale'
+}
+
+# Blocks node types whose text is kept as-is
+LITERAL_BLOCK_TYPES = {'code', 'image'}
+
+HTML_TAG = re.compile(r'<[a-zA-Z][^>]*>')
+HTML_SPLIT = re.compile(r'(<!--.*?-->|<[^>]+>)', re.S)
+HTML_TAG_NAME = re.compile(r'</?\s*([a-zA-Z0-9]+)')
+# Elements whose content is never translated; inline code becomes a single placeholder
+LITERAL_HTML_ELEMENTS = ('script', 'style', 'code', 'pre')
+# Elements that sit inside a sentence; everything else ends a segment
+INLINE_HTML_ELEMENTS = {
+    'a', 'abbr', 'b', 'bdi', 'bdo', 'br', 'cite', 'code', 'data', 'del', 'dfn', 'em', 'font', 'i',
+    'img', 'ins', 'kbd', 'mark', 'q', 's', 'samp', 'small', 'span', 'strong', 'sub', 'sup', 'time',
+    'u', 'var', 'wbr'
+}
+# Numbered stand-ins for inline markup in the text sent to the model: <1>...</1> and <2/>
+PLACEHOLDER = re.compile(r'<(/?)(\d+)(/?)>')
+MARKDOWN_BLOCK_SPLIT = re.compile(r'(\n[ \t]*\n)')
+MARKDOWN_LINE_MARKER = re.compile(r'^(\s*(?:#{1,6}\s+|[-*+]\s+|\d+[.)]\s+|>\s*)+)')
+MARKDOWN_FENCE = '```'
+
+class Extraction:
+    """
+    Translatable text pulled out of one entry, and how to put it back
+
+    Attributes:
+        segments (dict): Segment ID -> source text. Identical texts share one
+            segment, so each distinct string is translated once per locale.
+        leaves (dict): Field name -> list of (path, pieces, build), where
+            path leads from the field value to a string and pieces rebuild
+            that string from literal text and ('segment', id, markup)
+            references. Inline markup in a segment is replaced by numbered
+            placeholders, and markup maps each placeholder back. build, when
+            set, turns the rebuilt string into the value stored at path,
+            e.g. the children of a blocks paragraph.
+    """
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.segments = {}
+        self.leaves = {}
+        self.segment_ids = {}
+
+    def add_leaf(self, field_name, path, pieces, build=None):
+        """
+        Register a string at path within a field, made of literal and text pieces
+
+        Args:
+            pieces (list): ('literal', text) and ('text', text) pairs; a text
+                piece with placeholders has a third item mapping each one to
+                the markup it stands for
+            build (callable, optional): Called with the rebuilt string and
+                the merged markup to produce the value stored at path
+        """
+        resolved = []
+        for index, (kind, text, *markup) in enumerate(pieces):
+            if kind == 'text':
+                # Segments with the same text share a translation whatever markup they stand for
+                segment_id = self.segment_ids.get(text)
+                if segment_id is None:
+                    # Plain top-level strings keep their field name as the ID
+                    segment_id = _path_id(field_name, path)
+                    if len(pieces) > 1:
+                        segment_id = f"{segment_id}#{index}"
+                    self.segment_ids[text] = segment_id
+                    self.segments[segment_id] = text
+                resolved.append(('segment', segment_id, markup[0] if markup else {}))
+            else:
+                resolved.append((kind, text, None))
+        self.leaves.setdefault(field_name, []).append((path, resolved, build))
+
+    def field_segments(self, field_name):
+        """Get the IDs of the segments a field is built from"""
+        return {
+            text for _, pieces, _ in self.leaves.get(field_name, [])
+            for kind, text, _ in pieces if kind == 'segment'
+        }
+
+    def segments_for_fields_of(self, segment_ids):
+        """
+        Widen a set of segments to every segment of the fields they appear in
+
+        A field is written back as a whole, so all of its segments are needed
+        even when only some of them changed.
+        """
+        segment_ids = set(segment_ids)
+        needed = set()
+        for field_name in self.leaves:
+            field_ids = self.field_segments(field_name)
+            if field_ids & segment_ids:
+                needed |= field_ids
+        return {segment_id: self.segments[segment_id] for segment_id in needed}
+
+    def rebuild(self, translations):
+        """
+        Rebuild the translated value of every field whose segments are all translated
+
+        Args:
+            translations (dict): Segment ID -> translated text
+
+        Returns:
+            tuple: (payload, written) with field name -> rebuilt value for the
+                Strapi update, and the IDs of the segments it contains
+        """
+        payload, written = {}, set()
+        for field_name, leaves in self.leaves.items():
+            field_ids = self.field_segments(field_name)
+            if not field_ids or not field_ids <= translations.keys():
+                continue
+
+            value = _clean_for_write(copy.deepcopy(self.entry[field_name]))
+            for path, pieces, build in leaves:
+                if build is None:
+                    text = ''.join(
+                        _restore_markup(translations[piece], markup) if kind == 'segment' else piece
+                        for kind, piece, markup in pieces
+                    )
+                else:
+                    text = build(
+                        ''.join(translations[piece] if kind == 'segment' else piece for kind, piece, _ in pieces),
+                        {token: item for _, _, markup in pieces for token, item in (markup or {}).items()}
+                    )
+                if not path:
+                    value = text
+                    continue
+                container = value
+                for key in path[:-1]:
+                    container = container[key]
+                container[path[-1]] = text
+            payload[field_name] = value
+            written |= field_ids
+        return payload, written
+
+class ContentExtractor:
+    """
+    Walk an entry and pull out the text that should be translated
+
+    Handles top-level strings, components, dynamic zones (lists of
+    components with a __component key) and Strapi 5 blocks rich text. HTML
+    strings are split at block-level tags and Markdown strings into blocks
+    or list items, so each paragraph is translated whole. Inline HTML tags
+    and the bold, italic and link spans of blocks are sent as numbered
+    placeholders and put back after translation; other markup never
+    reaches the model.
+
+    With a field index from the content-type schema only the indexed
+    attributes are read; without one every value of the entry is scanned.
+    """
+
+    def extract(self, entry, index=None):
+        """
+        Extract the translatable segments of an entry
+
+        Args:
+            entry (dict): Source-locale entry
+            index (dict, optional): Translatable attributes from FieldIndex
+
+        Returns:
+            Extraction: Deduplicated segments and how to rebuild each field
+        """
+        extraction = Extraction(entry)
+        if index is not None:
+            self._extract_indexed(extraction, None, (), entry, index)
+            return extraction
+
+        for field_name, value in entry.items():
+            if field_name in SYSTEM_FIELDS:
+                continue
+            if isinstance(value, str):
+                self._add_string(extraction, field_name, (), value)
+            elif isinstance(value, (dict, list)):
+                self._walk(extraction, field_name, (), value)
+        return extraction
+
+    def _extract_indexed(self, extraction, field_name, path, item, index):
+        """Read the indexed attributes of an entry or component"""
+        for name, spec in index.items():
+            value = item.get(name)
+            if not value:
+                continue
+            # Top-level attributes name the field; nested ones extend the path
+            if field_name is None:
+                self._extract_attribute(extraction, name, (), value, spec)
+            else:
+                self._extract_attribute(extraction, field_name, path + (name,), value, spec)
+
+    def _extract_attribute(self, extraction, field_name, path, value, spec):
+        """Extract one attribute according to its indexed type"""
+        if spec == 'blocks':
+            if isinstance(value, list):
+                for index, node in enumerate(value):
+                    if isinstance(node, dict):
+                        self._walk_block(extraction, field_name, path + (index,), node)
+        elif isinstance(spec, str):
+            if isinstance(value, str):
+                self._add_string(extraction, field_name, path, value)
+        elif 'component' in spec:
+            items = enumerate(value) if isinstance(value, list) else [(None, value)]
+            for index, component in items:
+                if not isinstance(component, dict):
+                    continue
+                component_path = path if index is None else path + (index,)
+                if spec['component'] is None:
+                    self._walk(extraction, field_name, component_path, component)
+                else:
+                    self._extract_indexed(extraction, field_name, component_path, component, spec['component'])
+        elif isinstance(value, list):
+            for index, component in enumerate(value):
+                if not isinstance(component, dict) or component.get('__component') not in spec['dynamiczone']:
+                    continue
+                component_index = spec['dynamiczone'][component['__component']]
+                if component_index is None:
+                    self._walk(extraction, field_name, path + (index,), component)
+                else:
+                    self._extract_indexed(extraction, field_name, path + (index,), component, component_index)
+
+    def _walk(self, extraction, field_name, path, value):
+        """Recurse into components, dynamic zones and blocks"""
+        if isinstance(value, list):
+            for index, item in enumerate(value):
+                if isinstance(item, (dict, list)):
+                    self._walk(extraction, field_name, path + (index,), item)
+            return
+
+        if _is_reference(value):
+            return
+
+        if 'type' in value and ('children' in value or value.get('type') == 'text'):
+            self._walk_block(extraction, field_name, path, value)
+            return
+
+        for key, item in value.items():
+            if key in NESTED_SKIP_KEYS:
+                continue
+            if isinstance(item, str):
+                self._add_string(extraction, field_name, path + (key,), item)
+            elif isinstance(item, (dict, list)):
+                self._walk(extraction, field_name, path + (key,), item)
+
+    def _walk_block(self, extraction, field_name, path, node):
+        """Collect the text of a blocks rich-text node, one segment per paragraph, heading or list item"""
+        if node.get('type') in LITERAL_BLOCK_TYPES:
+            return
+        children = node.get('children') or []
+        if children and all(_is_inline_node(child) for child in children):
+            pieces = _inline_node_pieces(children)
+            if pieces is not None:
+                if any(kind == 'text' for kind, *_ in pieces):
+                    extraction.add_leaf(field_name, path + ('children',), pieces, _build_inline_nodes)
+                return
+        if node.get('type') == 'text':
+            text = node.get('text')
+            if isinstance(text, str) and text.strip():
+                extraction.add_leaf(field_name, path + ('text',), _trimmed_pieces(text))
+            return
+        for index, child in enumerate(node.get('children') or []):
+            if isinstance(child, dict):
+                self._walk_block(extraction, field_name, path + ('children', index), child)
+
+    def _add_string(self, extraction, field_name, path, text):
+        """Add a string leaf, splitting HTML and Markdown so markup stays literal"""
+        if not text.strip():
+            return
+        if HTML_TAG.search(text):
+            pieces = _html_pieces(text)
+        elif '\n' in text:
+            pieces = _markdown_pieces(text)
+        else:
+            pieces = _trimmed_pieces(text)
+        if any(kind == 'text' for kind, *_ in pieces):
+            extraction.add_leaf(field_name, path, pieces)
+
+def _path_id(field_name, path):
+    """Readable segment ID for a path, e.g. body[0].children[1].text"""
+    segment_id = field_name
+    for key in path:
+        segment_id += f"[{key}]" if isinstance(key, int) else f".{key}"
+    return segment_id
+
+def _trimmed_pieces(text, markup=None):
+    """
+    Split surrounding whitespace off a string so only the words are translated
+
+    Args:
+        markup (dict, optional): Placeholder -> markup for the placeholders in text
+    """
+    core = text.strip()
+    if not core:
+        return [('literal', text)]
+    start = text.index(core)
+    pieces = []
+    if start:
+        pieces.append(('literal', text[:start]))
+    pieces.append(('text', core, markup) if markup else ('text', core))
+    if start + len(core) < len(text):
+        pieces.append(('literal', text[start + len(core):]))
+    return pieces
+
+def _html_pieces(text):
+    """
+    Split HTML into literal block-level markup and translatable runs of inline content
+
+    Each run of text and inline tags between block-level tags becomes one
+    segment, with its inline tags replaced by placeholders. Inline code is
+    kept whole as a single placeholder.
+    """
+    pieces = []
+    # Text and ('tag', markup, name) items of the current inline run
+    run = []
+    literal_name, literal_parts, literal_depth = None, [], 0
+    for part in HTML_SPLIT.split(text):
+        if not part:
+            continue
+        if literal_name:
+            # Inside script, style, pre or code: collect until the element closes
+            literal_parts.append(part)
+            tag = HTML_TAG_NAME.match(part) if part.startswith('<') else None
+            if tag and tag.group(1).lower() == literal_name and not part.endswith('/>'):
+                literal_depth += -1 if part.startswith('</') else 1
+            if literal_depth == 0:
+                if literal_name == 'code':
+                    run.append(('tag', ''.join(literal_parts), 'code'))
+                else:
+                    pieces.append(('literal', ''.join(literal_parts)))
+                literal_name, literal_parts = None, []
+            continue
+        if not part.startswith('<'):
+            run.append(part)
+            continue
+        tag = HTML_TAG_NAME.match(part)
+        name = tag.group(1).lower() if tag and not part.startswith('<!') else ''
+        if name in LITERAL_HTML_ELEMENTS and not part.startswith('</') and not part.endswith('/>'):
+            if name != 'code':
+                pieces.extend(_inline_run_pieces(run))
+                run = []
+            literal_name, literal_parts, literal_depth = name, [part], 1
+        elif name in INLINE_HTML_ELEMENTS:
+            run.append(('tag', part, name))
+        else:
+            pieces.extend(_inline_run_pieces(run))
+            run = []
+            pieces.append(('literal', part))
+    if literal_name:
+        # Unclosed literal element: keep the rest as it is
+        pieces.extend(_inline_run_pieces(run))
+        run = [''.join(literal_parts)]
+        pieces.append(('literal', run.pop()))
+    pieces.extend(_inline_run_pieces(run))
+    return pieces
+
+def _inline_run_pieces(run):
+    """
+    Turn a run of text and inline tags into literal edges and one segment
+
+    Whitespace, unpaired tags and tag pairs wrapping the whole run stay
+    literal. Tags in between become placeholders: a pair becomes
+    <n>...</n>, and a tag without a partner in the run becomes <n/>.
+    """
+    def markup_of(items):
+        return ''.join(item if isinstance(item, str) else item[1] for item in items)
+
+    if not any(isinstance(item, str) and item.strip() for item in run):
+        return [('literal', markup_of(run))] if run else []
+
+    pairs = _pair_tags(run)
+
+    def is_edge(index):
+        item = run[index]
+        return not item.strip() if isinstance(item, str) else index not in pairs
+
+    start, end = 0, len(run)
+    while True:
+        while start < end and is_edge(start):
+            start += 1
+        while end > start and is_edge(end - 1):
+            end -= 1
+        if pairs.get(start) != end - 1:
+            break
+        start, end = start + 1, end - 1
+
+    text, markup, numbers, count = '', {}, {}, 0
+    for index in range(start, end):
+        item = run[index]
+        if isinstance(item, str):
+            text += item
+        elif index in numbers:
+            # Closing tag of a pair that was opened earlier in the segment
+            token = f"</{numbers[index]}>"
+        else:
+            count += 1
+            number = count
+            partner = pairs.get(index)
+            if partner is not None and start <= partner < end:
+                numbers[partner] = number
+                token = f"<{number}>"
+            else:
+                token = f"<{number}/>"
+            numbers[index] = number
+        if not isinstance(item, str):
+            markup[token] = item[1]
+            text += token
+
+    pieces = [('literal', markup_of(run[:start]))] if start else []
+    pieces.extend(_trimmed_pieces(text, markup))
+    if end < len(run):
+        pieces.append(('literal', markup_of(run[end:])))
+    return pieces
+
+def _pair_tags(run):
+    """Match the opening and closing inline tags of a run: index -> partner index, both ways"""
+    pairs, stack = {}, []
+    for index, item in enumerate(run):
+        if isinstance(item, str) or item[1].endswith('/>') or item[2] in ('br', 'code', 'img', 'wbr'):
+            continue
+        if item[1].startswith('</'):
+            if stack and run[stack[-1]][2] == item[2]:
+                opening = stack.pop()
+                pairs[opening], pairs[index] = index, opening
+        else:
+            stack.append(index)
+    return pairs
+
+def _kept_placeholders(text, markup):
+    """
+    Find the placeholders of a translated segment that can be restored
+
+    A standalone placeholder is kept once; a pair only when both halves are
+    there once each and nested properly. Anything the model added, dropped
+    or reordered is left out, so the markup stays well formed.
+
+    Returns:
+        set: Start offsets of the placeholders to restore
+    """
+    kept, seen, stack = set(), set(), []
+    for match in PLACEHOLDER.finditer(text):
+        token = match.group(0)
+        if token not in markup or token in seen:
+            continue
+        seen.add(token)
+        closing, number, standalone = match.groups()
+        if standalone:
+            kept.add(match.start())
+        elif not closing:
+            stack.append((number, match.start()))
+        else:
+            for depth in range(len(stack) - 1, -1, -1):
+                if stack[depth][0] == number:
+                    # Openers inside this pair that were never closed are dropped
+                    kept.update((stack[depth][1], match.start()))
+                    del stack[depth:]
+                    break
+    return kept
+
+def _restore_markup(text, markup):
+    """Put the inline markup back in place of the placeholders of a translated segment"""
+    if not markup:
+        return text
+    kept = _kept_placeholders(text, markup)
+    return PLACEHOLDER.sub(lambda match: markup[match.group(0)] if match.start() in kept else '', text)
+
+def _is_inline_node(node):
+    """Check whether a blocks node is part of a line of text"""
+    return isinstance(node, dict) and node.get('type') in ('text', 'link')
+
+def _inline_node_pieces(children):
+    """
+    Encode the inline children of a blocks node as one segment
+
+    Text with marks (bold, italic, ...) and links become placeholder pairs
+    whose markup is the node without its text or children.
+
+    Returns:
+        list: Pieces for Extraction.add_leaf, or None if the text already
+            contains something that looks like a placeholder
+    """
+    markup = {}
+    count = 0
+
+    def encode(nodes):
+        nonlocal count
+        text = ''
+        for node in nodes:
+            if not isinstance(node, dict):
+                continue
+            if node.get('type') == 'link':
+                count += 1
+                number = count
+                inner = encode(node.get('children') or [])
+                if inner is None:
+                    return None
+                template = {key: value for key, value in node.items() if key != 'children'}
+                markup[f"<{number}>"] = markup[f"</{number}>"] = template
+                text += f"<{number}>{inner}</{number}>"
+                continue
+            value = node.get('text') or ''
+            if PLACEHOLDER.search(value):
+                return None
+            if not value:
+                continue
+            if any(value for key, value in node.items() if key not in ('type', 'text')):
+                count += 1
+                markup[f"<{count}>"] = markup[f"</{count}>"] = {
+                    key: value for key, value in node.items() if key != 'text'
+                }
+                text += f"<{count}>{value}</{count}>"
+            else:
+                text += value
+        return text
+
+    text = encode(children)
+    if text is None:
+        return None
+    return _trimmed_pieces(text, markup)
+
+def _build_inline_nodes(text, markup):
+    """Turn a translated blocks segment back into text and link nodes"""
+    kept = _kept_placeholders(text, markup)
+    nodes = []
+    # (siblings, marks, link) for the top level and each open span or link
+    stack = [(nodes, {}, None)]
+
+    def add_text(value):
+        siblings, marks, _ = stack[-1]
+        if value:
+            siblings.append(dict(marks, type='text', text=value))
+
+    position = 0
+    for match in PLACEHOLDER.finditer(text):
+        add_text(text[position:match.start()])
+        position = match.end()
+        if match.start() not in kept:
+            continue
+        template = markup[match.group(0)]
+        if match.group(1):
+            _, _, link = stack.pop()
+            if link is not None and not link['children']:
+                link['children'].append({'type': 'text', 'text': ''})
+        elif template.get('type') == 'link':
+            link = dict(template, children=[])
+            stack[-1][0].append(link)
+            stack.append((link['children'], stack[-1][1], link))
+        else:
+            marks = {key: value for key, value in template.items() if key != 'type'}
+            stack.append((stack[-1][0], dict(stack[-1][1], **marks), None))
+    add_text(text[position:])
+    return nodes or [{'type': 'text', 'text': ''}]
+
+def _markdown_pieces(text):
+    """
+    Split Markdown into translatable blocks
+
+    Paragraphs are translated whole; headings, list items and quotes are
+    translated line by line with their markers kept. Fenced code is literal.
+    """
+    pieces = []
+    in_fence = False
+    for block in MARKDOWN_BLOCK_SPLIT.split(text):
+        if MARKDOWN_BLOCK_SPLIT.fullmatch(block) or in_fence or block.lstrip().startswith(MARKDOWN_FENCE):
+            pieces.append(('literal', block))
+            in_fence ^= block.count(MARKDOWN_FENCE) % 2 == 1
+            continue
+
+        lines = block.split('\n')
+        if not any(MARKDOWN_LINE_MARKER.match(line) for line in lines):
+            pieces.extend(_trimmed_pieces(block))
+            continue
+
+        for index, line in enumerate(lines):
+            if index:
+                pieces.append(('literal', '\n'))
+            marker = MARKDOWN_LINE_MARKER.match(line)
+            if marker:
+                pieces.append(('literal', marker.group(1)))
+                line = line[marker.end():]
+            if line:
+                pieces.extend(_trimmed_pieces(line))
+    return pieces
+
+def _is_reference(value):
+    """Check whether a dict is a media file or a related entry rather than content"""
+    return 'documentId' in value or ('mime' in value and 'url' in value)
+
+def _clean_for_write(value):
+    """
+    Prepare a copied field value for writing to another locale
+
+    Component IDs belong to the source locale, so they are dropped. Media
+    files are sent by ID and related entries by document ID.
+    """
+    if isinstance(value, list):
+        return [_clean_for_write(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if 'type' in value and 'children' in value:
+        # Blocks nodes, including image blocks, are written as they are
+        return value
+    if 'mime' in value and 'url' in value:
+        return value.get('id')
+    if 'documentId' in value:
+        return value['documentId']
+    return {
+        key: _clean_for_write(item) for key, item in value.items()
+        if key != 'id'
+    }
@@ -0,0 +1,180 @@
+import threading
+from services.strapi_service import StrapiService
+from services.metadata_cache import metadata_cache
+
+# Attribute types whose values are prose worth translating
+TRANSLATABLE_TYPES = {'string', 'text', 'richtext', 'blocks'}
+
+class FieldIndex:
+    """
+    Translatable attributes of each content type, built from the Strapi schema
+
+    The index for a content type maps attribute names to their type
+    ('string', 'text', 'richtext' or 'blocks') or, for components and dynamic
+    zones, to the index of the component's own attributes (None when the
+    component's schema is unknown, so its values are scanned instead).
+    Attributes that are not localized, and types such as uid, email or
+    enumeration, are left out. Schemas come from the metadata cache, and an
+    index is only rebuilt when the cached schema changes.
+
+    The schema also gives the populate query entries are fetched with.
+    populate=* stops one level down, so relations, media and components
+    inside components would be missing, and writing the component back
+    would clear them in the target locale.
+    """
+
+    def __init__(self, strapi_service=None, cache=None):
+        self.strapi_service = strapi_service or StrapiService()
+        self.cache = cache or metadata_cache
+        self.indexes = {}
+        self.lock = threading.Lock()
+
+    def get(self, content_type):
+        """
+        Get the translatable-attribute index of a content type
+
+        Args:
+            content_type (str): Content type UID, e.g. 'api::article.article'
+
+        Returns:
+            dict: Attribute name -> type or nested index, or None when the
+                schema is unavailable and extraction should scan the entry
+        """
+        cached = self._schema_entry(content_type)
+        return cached['index'] if cached else None
+
+    def get_populate(self, content_type):
+        """
+        Get the populate query that fetches entries of a content type in full
+
+        Relations and media are populated at every level, and components and
+        dynamic zones down to their innermost attributes.
+
+        Returns:
+            dict: Query parameters such as populate[seo][populate][image],
+                or None when the schema is unavailable and populate=* is used
+        """
+        cached = self._schema_entry(content_type)
+        return cached['populate'] if cached else None
+
+    def _schema_entry(self, content_type):
+        """Build or reuse the index and populate query of a content type"""
+        content_types = self.cache.get('content_types', self.strapi_service.get_content_types)
+        components = self.cache.get('components', self.strapi_service.get_components)
+
+        with self.lock:
+            cached = self.indexes.get(content_type)
+            # The cache hands out the same objects until the schema is refetched
+            if cached and cached['content_types'] is content_types and cached['components'] is components:
+                return cached
+
+        schema = next(
+            (ct.get('schema', {}) for ct in content_types if ct.get('uid') == content_type), None
+        )
+        if schema is None:
+            return None
+
+        component_attributes = {
+            component.get('uid'): component.get('schema', {}).get('attributes', {})
+            for component in components
+        }
+        cached = {
+            'content_types': content_types,
+            'components': components,
+            'index': self._attributes_index(schema.get('attributes', {}), component_attributes),
+            'populate': self._populate_params(schema.get('attributes', {}), component_attributes, 'populate')
+        }
+        with self.lock:
+            self.indexes[content_type] = cached
+        return cached
+
+    def get_paths(self, content_type):
+        """
+        List the translatable attribute paths of a content type
+
+        Returns:
+            list: Paths such as 'title', 'seo.metaTitle' or
+                'sections[shared.quote].body', or None if the schema is unavailable
+        """
+        index = self.get(content_type)
+        if index is None:
+            return None
+        return self._paths(index)
+
+    def _attributes_index(self, attributes, component_attributes, seen=()):
+        """Build the index of a set of attributes, descending into components"""
+        index = {}
+        for name, attribute in attributes.items():
+            localized = attribute.get('pluginOptions', {}).get('i18n', {}).get('localized')
+            if localized is False:
+                # Shared across locales, so never written per locale
+                continue
+
+            kind = attribute.get('type')
+            if kind in TRANSLATABLE_TYPES:
+                index[name] = kind
+            elif kind == 'component':
+                component = self._component_index(attribute.get('component'), component_attributes, seen)
+                if component or component is None:
+                    index[name] = {
+                        'component': component,
+                        'repeatable': bool(attribute.get('repeatable'))
+                    }
+            elif kind == 'dynamiczone':
+                zone = {}
+                for uid in attribute.get('components', []):
+                    component = self._component_index(uid, component_attributes, seen)
+                    if component or component is None:
+                        zone[uid] = component
+                if zone:
+                    index[name] = {'dynamiczone': zone}
+        return index
+
+    def _component_index(self, uid, component_attributes, seen):
+        """Build the index of a component, guarding against cycles"""
+        if uid in seen:
+            return {}
+        if uid not in component_attributes:
+            return None
+        return self._attributes_index(component_attributes[uid], component_attributes, seen + (uid,))
+
+    def _populate_params(self, attributes, component_attributes, prefix, seen=()):
+        """Flatten the populate query of a set of attributes, descending into components"""
+        params = {}
+        for name, attribute in attributes.items():
+            kind = attribute.get('type')
+            key = f"{prefix}[{name}]"
+            if kind in ('relation', 'media'):
+                params[key] = 'true'
+            elif kind == 'component':
+                params.update(self._component_populate(key, attribute.get('component'), component_attributes, seen))
+            elif kind == 'dynamiczone':
+                for uid in attribute.get('components', []):
+                    params.update(self._component_populate(f"{key}[on][{uid}]", uid, component_attributes, seen))
+        return params
+
+    def _component_populate(self, key, uid, component_attributes, seen):
+        """Populate query of one component; an unknown schema gets one level, as with populate=*"""
+        if uid not in component_attributes:
+            return {f"{key}[populate]": '*'}
+        if uid in seen:
+            return {key: 'true'}
+        nested = self._populate_params(component_attributes[uid], component_attributes, f"{key}[populate]", seen + (uid,))
+        return nested or {key: 'true'}
+
+    def _paths(self, index, prefix=''):
+        """Flatten an index into attribute paths"""
+        paths = []
+        for name, spec in index.items():
+            path = f"{prefix}{name}"
+            if isinstance(spec, str):
+                paths.append(path)
+            elif 'component' in spec:
+                paths.extend(self._paths(spec['component'] or {'*': '*'}, f"{path}."))
+            else:
+                for uid, component in spec['dynamiczone'].items():
+                    paths.extend(self._paths(component or {'*': '*'}, f"{path}[{uid}]."))
+        return paths
+
+# Shared by translators and the web routes
+field_index = FieldIndex()
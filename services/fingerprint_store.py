@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class FingerprintStore:
+    """
+    Remember what source content was last translated for each
+    (entry, target locale, field), so incremental jobs can skip unchanged fields
+
+    Each (entry, target locale) that was written in full also keeps a source
+    key: the entry's updatedAt hashed with the model, prompt version and
+    schema. While it still matches, the entry is skipped without extracting
+    or fingerprinting it.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.FINGERPRINT_STORE_PATH
+        self.lock = threading.Lock()
+        self.connection = None
+
+    def _connect(self):
+        """Open the database on first use (caller holds the lock)"""
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS fingerprints (
+                    content_type TEXT NOT NULL,
+                    entry_id TEXT NOT NULL,
+                    target_locale TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    translated_at REAL NOT NULL,
+                    PRIMARY KEY (content_type, entry_id, target_locale, field)
+                )"""
+            )
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS sources (
+                    content_type TEXT NOT NULL,
+                    entry_id TEXT NOT NULL,
+                    target_locale TEXT NOT NULL,
+                    source_key TEXT NOT NULL,
+                    recorded_at REAL NOT NULL,
+                    PRIMARY KEY (content_type, entry_id, target_locale)
+                )"""
+            )
+            self.connection.commit()
+        return self.connection
+
+    @staticmethod
+    def fingerprint(source_text, model_name, prompt_version):
+        """Hash a field's source text together with the model and prompt that translate it"""
+        parts = [source_text, model_name, str(prompt_version)]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def source_key(source_updated_at, model_name, prompt_version, schema=''):
+        """
+        Hash an entry's updatedAt together with what its translation depends on
+
+        Returns:
+            str: Source key, or None when the entry has no updatedAt
+        """
+        if not source_updated_at:
+            return None
+        return FingerprintStore.fingerprint(f"{source_updated_at}\x1f{schema}", model_name, prompt_version)
+
+    def get_source_keys(self, content_type, entry_id):
+        """
+        Get the source keys an entry's locales were last written in full from
+
+        Returns:
+            dict: Target locale -> source key
+        """
+        try:
+            with self.lock:
+                rows = self._connect().execute(
+                    "SELECT target_locale, source_key FROM sources WHERE content_type = ? AND entry_id = ?",
+                    (content_type, entry_id)
+                ).fetchall()
+            return dict(rows)
+        except sqlite3.Error as e:
+            logger.error("Error reading source keys: %s", e)
+            return {}
+
+    def get_fingerprints(self, content_type, entry_id, target_locale):
+        """
+        Get the stored fingerprints for an entry's localization
+
+        Returns:
+            dict: Field name -> fingerprint of the last successfully written source
+        """
+        try:
+            with self.lock:
+                rows = self._connect().execute(
+                    """SELECT field, fingerprint FROM fingerprints
+                    WHERE content_type = ? AND entry_id = ? AND target_locale = ?""",
+                    (content_type, entry_id, target_locale)
+                ).fetchall()
+            return dict(rows)
+        except sqlite3.Error as e:
+            logger.error("Error reading fingerprints: %s", e)
+            return {}
+
+    def record(self, content_type, entry_id, target_locale, fingerprints, source_key=None):
+        """
+        Store fingerprints after a successful write to Strapi
+
+        Args:
+            content_type (str): Content type API ID
+            entry_id (str): Document ID for the entry
+            target_locale (str): Target locale code
+            fingerprints (dict): Field name -> fingerprint
+            source_key (str, optional): Source key from source_key, when the
+                locale is now up to date with the whole entry; without one the
+                stored key is dropped, so the next incremental run checks
+                every field again
+        """
+        now = time.time()
+        try:
+            with self.lock:
+                connection = self._connect()
+                connection.executemany(
+                    """INSERT OR REPLACE INTO fingerprints
+                    (content_type, entry_id, target_locale, field, fingerprint, translated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)""",
+                    [
+                        (content_type, entry_id, target_locale, field, fingerprint, now)
+                        for field, fingerprint in fingerprints.items()
+                    ]
+                )
+                if source_key:
+                    connection.execute(
+                        """INSERT OR REPLACE INTO sources
+                        (content_type, entry_id, target_locale, source_key, recorded_at)
+                        VALUES (?, ?, ?, ?, ?)""",
+                        (content_type, entry_id, target_locale, source_key, now)
+                    )
+                else:
+                    connection.execute(
+                        "DELETE FROM sources WHERE content_type = ? AND entry_id = ? AND target_locale = ?",
+                        (content_type, entry_id, target_locale)
+                    )
+                connection.commit()
+        except sqlite3.Error as e:
+            logger.error("Error writing fingerprints: %s", e)
+
+# Shared by all translator instances
+fingerprint_store = FingerprintStore()
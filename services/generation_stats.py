@@ -0,0 +1,82 @@
+import threading
+
+class GenerationStats:
+    """Running time-to-first-token and throughput figures per model and locale"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def _get(self, model_name, locale):
+        """Get or create the counters for a model/locale pair (caller holds the lock)"""
+        key = (model_name, locale)
+        if key not in self.stats:
+            self.stats[key] = {
+                'requests': 0,
+                'ttft_total': 0.0,
+                'tokens': 0,
+                'eval_seconds': 0.0,
+                'aborted': 0
+            }
+        return self.stats[key]
+
+    def record(self, model_name, locale, ttft, tokens, eval_seconds):
+        """
+        Record a finished generation
+
+        Args:
+            model_name (str): Model that generated the text
+            locale (str): Target locale of the translation
+            ttft (float): Seconds from request to first token
+            tokens (int): Generated tokens
+            eval_seconds (float): Seconds spent generating those tokens
+        """
+        with self.lock:
+            stats = self._get(model_name, locale)
+            stats['requests'] += 1
+            stats['ttft_total'] += ttft
+            stats['tokens'] += tokens
+            stats['eval_seconds'] += eval_seconds
+
+    def record_aborted(self, model_name, locale):
+        """Record a generation stopped early by cancellation or the length limit"""
+        with self.lock:
+            self._get(model_name, locale)['aborted'] += 1
+
+    def get_model_rates(self, model_name):
+        """
+        Average time to first token and tokens per second of a model over all locales
+
+        Returns:
+            dict: avg_ttft_seconds and tokens_per_second, or None until the
+                model has finished a generation
+        """
+        with self.lock:
+            stats = [dict(stats) for (model, _), stats in self.stats.items() if model == model_name]
+        requests = sum(item['requests'] for item in stats)
+        eval_seconds = sum(item['eval_seconds'] for item in stats)
+        if not requests or not eval_seconds:
+            return None
+        return {
+            'avg_ttft_seconds': sum(item['ttft_total'] for item in stats) / requests,
+            'tokens_per_second': sum(item['tokens'] for item in stats) / eval_seconds
+        }
+
+    def get_stats(self):
+        """Get averages per model and locale"""
+        with self.lock:
+            items = [(key, dict(stats)) for key, stats in self.stats.items()]
+        return [
+            {
+                'model': model_name,
+                'locale': locale,
+                'requests': stats['requests'],
+                'aborted': stats['aborted'],
+                'avg_ttft_seconds': round(stats['ttft_total'] / stats['requests'], 3) if stats['requests'] else None,
+                'tokens_per_second': round(stats['tokens'] / stats['eval_seconds'], 1) if stats['eval_seconds'] else None
+            }
+            for (model_name, locale), stats in items
+        ]
+
+# Shared by all Ollama clients
+generation_stats = GenerationStats()
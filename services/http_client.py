@@ -0,0 +1,72 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTP adapter that applies a default (connect, read) timeout to every request"""
+
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+# Idempotent methods, safe to resend once the server may have acted on them
+RETRY_METHODS = frozenset(['GET', 'PUT', 'HEAD', 'OPTIONS'])
+
+def create_session(connect_timeout, read_timeout, pool_size=None, max_retries=None, backoff_factor=None):
+    """
+    Build a keep-alive session with pooled connections, timeouts and retries
+
+    Retries use exponential backoff on connection errors and on 429/5xx
+    responses, honouring Retry-After. Once retries run out, the last response
+    is returned so callers can keep handling status codes themselves. A POST,
+    such as an Ollama generation, is only resent when it never reached the
+    server; after a read timeout or an error status it is not run again.
+
+    Args:
+        connect_timeout (float): Seconds to wait for a connection
+        read_timeout (float): Seconds to wait between bytes of the response
+        pool_size (int, optional): Connections kept open per host
+        max_retries (int, optional): Retries before giving up
+        backoff_factor (float, optional): Base delay for exponential backoff
+
+    Returns:
+        requests.Session: Configured session
+    """
+    pool_size = pool_size or Config.HTTP_POOL_SIZE
+    retry = Retry(
+        total=max_retries if max_retries is not None else Config.HTTP_MAX_RETRIES,
+        backoff_factor=backoff_factor if backoff_factor is not None else Config.HTTP_BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=RETRY_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = TimeoutHTTPAdapter(
+        timeout=(connect_timeout, read_timeout),
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_session(name, connect_timeout, read_timeout, max_retries=None):
+    """Get a session shared by every client of the same upstream service, see create_session"""
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = create_session(connect_timeout, read_timeout, max_retries=max_retries)
+            _sessions[name] = session
+        return session
@@ -0,0 +1,54 @@
+import threading
+from collections import deque
+from config import Config
+
+class JobEvents:
+    """
+    Bounded, numbered log of a job's progress events
+
+    Publishers append events and wake any listeners. Listeners ask for
+    everything after the last sequence number they saw, so a reconnecting
+    client can pick up where it left off as long as the events are still in
+    the buffer. Old events are dropped once the buffer is full.
+    """
+
+    def __init__(self, history=None):
+        self.events = deque(maxlen=history or Config.JOB_EVENTS_HISTORY)
+        self.sequence = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def publish(self, event, data):
+        """
+        Add an event and wake listeners
+
+        Args:
+            event (str): Event name, e.g. 'unit', 'error' or 'status'
+            data (dict): JSON-serializable payload
+        """
+        with self.condition:
+            self.sequence += 1
+            self.events.append((self.sequence, event, data))
+            self.condition.notify_all()
+
+    def close(self):
+        """Mark the job as finished; listeners drain the buffer and stop"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def wait(self, after, timeout=None):
+        """
+        Wait for events newer than a sequence number
+
+        Args:
+            after (int): Last sequence number the listener has seen
+            timeout (float, optional): Seconds to wait before giving up
+
+        Returns:
+            tuple: (events, closed) with a list of (sequence, event, data)
+                tuples, empty on timeout, and whether the job has finished
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.sequence > after or self.closed, timeout)
+            return [item for item in self.events if item[0] > after], self.closed
@@ -0,0 +1,333 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from services.translator import TranslatorService
+from services.job_store import job_store
+from services.logging_config import job_context
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class JobManager:
+    """
+    Run translation jobs in the background on a bounded worker pool
+
+    Jobs and the state of each (entry, locale) unit are persisted in the job
+    store, so unfinished jobs can be resumed after a restart and failed units
+    retried without redoing the rest of the job.
+    """
+
+    def __init__(self, max_workers=None, history_limit=None, store=None):
+        self.max_workers = max_workers or Config.JOB_WORKERS
+        self.history_limit = history_limit or Config.JOB_HISTORY_LIMIT
+        self.store = store or job_store
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='translation-job'
+        )
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, content_type, entry_ids, target_locales, incremental=False):
+        """
+        Queue a translation job and return immediately
+
+        Args:
+            content_type (str): Content type API ID
+            entry_ids (list): Document IDs to translate, or empty for all entries
+            target_locales (list): List of target locale codes
+            incremental (bool): Only translate content changed since the last run
+
+        Returns:
+            str: ID of the queued job
+        """
+        job_id = uuid.uuid4().hex
+        self.store.create_job(job_id, content_type, list(entry_ids), list(target_locales), incremental)
+        self._start(job_id, content_type, entry_ids, target_locales, incremental)
+        return job_id
+
+    def _start(self, job_id, content_type, entry_ids, target_locales, incremental=False,
+               skip_units=None):
+        """Track a job in memory and queue it on the worker pool"""
+        translator = TranslatorService(
+            job_store=self.store, job_id=job_id, skip_units=skip_units
+        )
+        translator.job_status = {
+            'current_job': f"Queued translation of {content_type}",
+            'completed': 0,
+            'total': len(entry_ids) * len(target_locales),
+            'errors': [],
+            'error_count': 0,
+            'current_entry': None,
+            'current_locale': None,
+            'status': 'queued'
+        }
+
+        with self.lock:
+            self.jobs[job_id] = {
+                'job_id': job_id,
+                'content_type': content_type,
+                'target_locales': list(target_locales),
+                'incremental': incremental,
+                'translator': translator,
+                'created_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None
+            }
+            self._prune_finished_jobs()
+
+        self.executor.submit(
+            self._run_job, job_id, content_type, entry_ids, target_locales, incremental
+        )
+
+    def resume_jobs(self):
+        """
+        Requeue jobs that were queued or running when the process stopped
+
+        Units that already finished are skipped, so each job picks up where
+        it left off.
+
+        Returns:
+            list: IDs of the resumed jobs
+        """
+        resumed = []
+        for record in self.store.get_unfinished_jobs():
+            job_id = record['job_id']
+            skip_units = self.store.get_done_units(job_id)
+            logger.info("Resuming translation job %s (%d units already done)", job_id, len(skip_units))
+            # A retry only ever fetched the entries with failed units
+            entry_ids = record['retry_entry_ids'] if record['retry_entry_ids'] is not None else record['entry_ids']
+            self._start(
+                job_id, record['content_type'], entry_ids,
+                record['target_locales'], record['incremental'], skip_units
+            )
+            resumed.append(job_id)
+        return resumed
+
+    def retry_failed(self, job_id):
+        """
+        Run a finished job's failed units again
+
+        Args:
+            job_id (str): Job ID returned by submit()
+
+        Returns:
+            int: Number of units requeued, or None if the job is unknown or
+                still active
+        """
+        # Checked and requeued under the lock, so concurrent retries can't both start the job
+        with self.lock:
+            record = self.store.get_job(job_id)
+            job = self.jobs.get(job_id)
+            if not record or record['status'] in ('queued', 'running'):
+                return None
+            if job and job['finished_at'] is None:
+                return None
+
+            failed = self.store.get_units(job_id, 'failed')
+            if not failed:
+                return 0
+
+            # Only the entries with failed units are fetched; their other units are skipped
+            entry_ids = list(dict.fromkeys(unit['entry_id'] for unit in failed))
+            if not self.store.start_retry(job_id, entry_ids):
+                return None
+        skip_units = self.store.get_done_units(job_id)
+        self._start(
+            job_id, record['content_type'], entry_ids, record['target_locales'],
+            record['incremental'], skip_units
+        )
+        return len(failed)
+
+    def _run_job(self, job_id, content_type, entry_ids, target_locales, incremental=False):
+        """Worker entry point: run the batch and record its outcome"""
+        # Everything the job logs, including its threads and tasks, carries its ID
+        with job_context(job_id):
+            self._run_job_in_context(job_id, content_type, entry_ids, target_locales, incremental)
+
+    def _run_job_in_context(self, job_id, content_type, entry_ids, target_locales, incremental=False):
+        """Run the batch and record its outcome"""
+        job = self.jobs[job_id]
+        translator = job['translator']
+        job['started_at'] = time.time()
+
+        if translator.is_cancelled():
+            translator.job_status['status'] = 'cancelled'
+            job['finished_at'] = time.time()
+            self.store.set_job_status(job_id, 'cancelled')
+            translator.events.close()
+            return
+
+        self.store.set_job_status(job_id, 'running')
+        translator.events.publish('status', {'status': 'running'})
+        logger.info("Started translating %s into %s", content_type, ', '.join(target_locales))
+        try:
+            # With no entry IDs the batch streams every entry from Strapi
+            job['result'] = translator.batch_translate(
+                content_type, entry_ids, target_locales, incremental
+            )
+        except Exception as e:
+            logger.exception("Error running translation job %s: %s", job_id, e)
+            translator.job_status['status'] = 'error'
+            translator._add_error(f"Job failed: {e}")
+        finally:
+            job['finished_at'] = time.time()
+            self.store.set_job_status(job_id, translator.job_status['status'])
+            translator.events.close()
+            logger.info(
+                "Job %s after %.1fs: %d/%d units, %d errors",
+                translator.job_status['status'], job['finished_at'] - job['started_at'],
+                translator.job_status['completed'], translator.job_status['total'],
+                translator.job_status['error_count']
+            )
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job
+
+        Args:
+            job_id (str): Job ID returned by submit()
+
+        Returns:
+            bool: True if the job exists and had not finished yet
+        """
+        job = self.jobs.get(job_id)
+        if not job or job['finished_at'] is not None:
+            return False
+        job['translator'].cancel()
+        return True
+
+    def _prune_finished_jobs(self):
+        """Drop the oldest finished jobs beyond the history limit (caller holds the lock)"""
+        finished = [
+            job for job in self.jobs.values()
+            if job['finished_at'] is not None
+        ]
+        excess = len(finished) - self.history_limit
+        if excess > 0:
+            finished.sort(key=lambda job: job['finished_at'])
+            for job in finished[:excess]:
+                del self.jobs[job['job_id']]
+
+    def _describe(self, job):
+        """Build the public status payload for a job"""
+        status = dict(job['translator'].get_job_status())
+        status.update({
+            'job_id': job['job_id'],
+            'content_type': job['content_type'],
+            'target_locales': job['target_locales'],
+            'incremental': job['incremental'],
+            'created_at': job['created_at'],
+            'started_at': job['started_at'],
+            'finished_at': job['finished_at'],
+            'units': self.store.get_unit_counts(job['job_id'])
+        })
+        return status
+
+    def _describe_stored(self, record):
+        """Build the status payload for a job known only from the job store"""
+        units = self.store.get_unit_counts(record['job_id'])
+        errors = [
+            f"{unit['entry_id']}/{unit['locale']}: {unit['error']}"
+            for unit in self.store.get_units(record['job_id'], 'failed')
+        ]
+        return {
+            'job_id': record['job_id'],
+            'current_job': f"Translation of {record['content_type']}",
+            'content_type': record['content_type'],
+            'target_locales': record['target_locales'],
+            'incremental': record['incremental'],
+            'status': record['status'],
+            'completed': sum(count for state, count in units.items() if state != 'pending'),
+            'total': len(record['entry_ids']) * len(record['target_locales']) or sum(units.values()),
+            'errors': errors[-Config.JOB_ERROR_BUFFER:],
+            'error_count': len(errors),
+            'current_entry': None,
+            'current_locale': None,
+            'created_at': record['created_at'],
+            'started_at': record['started_at'],
+            'finished_at': record['finished_at'],
+            'units': units
+        }
+
+    def get_status(self, job_id):
+        """
+        Get the status of a single job
+
+        Args:
+            job_id (str): Job ID returned by submit()
+
+        Returns:
+            dict: Job status or None if the job is unknown
+        """
+        job = self.jobs.get(job_id)
+        if job:
+            return self._describe(job)
+        # Jobs from before a restart, or pruned from memory, are still on disk
+        record = self.store.get_job(job_id)
+        return self._describe_stored(record) if record else None
+
+    def get_events(self, job_id):
+        """Get the live event log of a job tracked in memory, or None"""
+        job = self.jobs.get(job_id)
+        return job['translator'].events if job else None
+
+    def get_progress(self, job_id):
+        """
+        Get a compact progress summary of a job, without the error list
+
+        Returns:
+            dict: Progress summary or None if the job is unknown
+        """
+        job = self.jobs.get(job_id)
+        if not job:
+            return None
+        status = job['translator'].get_job_status()
+        elapsed = (job['finished_at'] or time.time()) - (job['started_at'] or time.time())
+        progress = {
+            key: status.get(key)
+            for key in ('status', 'current_job', 'completed', 'total', 'error_count',
+                        'current_entry', 'current_locale')
+        }
+        progress['units_per_second'] = round(status['completed'] / elapsed, 2) if elapsed > 0 else 0
+        return progress
+
+    def collect_metrics(self):
+        """Report how many tracked jobs are queued and running to the metrics registry"""
+        counts = {'queued': 0, 'running': 0}
+        with self.lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            status = job['translator'].get_job_status().get('status')
+            if status in counts:
+                counts[status] += 1
+        return [(
+            'translation_jobs', 'gauge',
+            'Translation jobs waiting for a worker or running',
+            [({'status': status}, count) for status, count in counts.items()]
+        )]
+
+    def list_jobs(self):
+        """Get the status of all tracked jobs, newest first"""
+        with self.lock:
+            jobs = sorted(self.jobs.values(), key=lambda job: job['created_at'], reverse=True)
+        return [self._describe(job) for job in jobs]
+
+    def get_latest_status(self):
+        """Get the status of the most recently submitted job"""
+        jobs = self.list_jobs()
+        if jobs:
+            return jobs[0]
+        return {
+            'current_job': None,
+            'completed': 0,
+            'total': 0,
+            'errors': [],
+            'error_count': 0,
+            'current_entry': None,
+            'current_locale': None,
+            'status': 'idle'
+        }
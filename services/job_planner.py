@@ -0,0 +1,266 @@
+import logging
+from collections import Counter
+from services.translator import TranslatorService
+from services.text_chunker import estimate_tokens
+from services.generation_stats import generation_stats
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class JobPlanner:
+    """
+    Estimate what a batch translation job would take, without running it
+
+    The plan walks the same source entries, extraction and incremental
+    checks as a job. For every target locale and model it counts the units,
+    segments, estimated tokens, Ollama requests and Strapi writes. Segments
+    already in the translation memory, or repeated earlier in the job, are
+    forecast as cache hits. Durations come from the throughput each model
+    has shown since the app started. Nothing is sent to Ollama or written
+    to Strapi, and no unit or cache statistics are recorded.
+    """
+
+    def __init__(self, translator=None):
+        self.translator = translator or TranslatorService()
+
+    def plan(self, content_type, entry_ids, target_locales, incremental=False):
+        """
+        Plan a batch translation job
+
+        Args:
+            content_type (str): Content type API ID
+            entry_ids (list): Document IDs to translate; empty means every entry
+            target_locales (list): Target locale codes
+            incremental (bool): Skip entries and fields unchanged since their
+                last successful translation
+
+        Returns:
+            dict: Totals for the job, with per-locale and per-model breakdowns
+        """
+        translator = self.translator
+        strapi_service = translator.strapi_service
+        translator._set_pivots(target_locales)
+        # Fetched as the job would, so nested components are planned too
+        populate = translator.field_index.get_populate(content_type)
+
+        if entry_ids:
+            source_entries = strapi_service.iter_entries_by_ids(content_type, entry_ids, populate=populate)
+        else:
+            source_entries = (
+                (str(entry.get('documentId', entry.get('id'))), entry)
+                for entry in strapi_service.iter_entries(content_type, populate=populate)
+            )
+
+        locales = {}
+        entries, missing_entries = 0, 0
+        # Memory keys of segments the job would translate before reaching them again
+        seen_keys = set()
+        for entry_id, source_entry in source_entries:
+            entries += 1
+            if source_entry is None:
+                # Not in the bulk response; the job fetches these one by one
+                source_entry = strapi_service.get_entry(
+                    content_type, entry_id, strapi_service.source_locale, populate
+                )
+            if not source_entry:
+                missing_entries += 1
+                for target_locale in target_locales:
+                    self._locale_row(locales, target_locale)['skipped']['missing_entry'] += 1
+                continue
+            self._plan_entry(content_type, entry_id, source_entry, target_locales, incremental, locales, seen_keys)
+
+        plan = self._summarize(
+            content_type, target_locales, incremental, entries, missing_entries, locales
+        )
+        logger.info(
+            "Planned %s: %d units to translate, %d Ollama requests, %d Strapi writes",
+            content_type, plan['units']['translate'], plan['ollama_requests'], plan['strapi_writes']
+        )
+        return plan
+
+    def _locale_row(self, locales, target_locale, model_name=None):
+        """Get or create the counters of one target locale"""
+        row = locales.get(target_locale)
+        if row is None:
+            pivot = self.translator.pivots.get(target_locale)
+            row = locales[target_locale] = {
+                'locale': target_locale,
+                'model': model_name,
+                'derived_from': pivot['from'] if pivot else None,
+                'mode': pivot['mode'] if pivot else 'translate',
+                'units': 0,
+                'skipped': Counter(),
+                'segments': 0,
+                'cached_segments': 0,
+                'characters': 0,
+                'input_tokens': 0,
+                'output_tokens': 0,
+                'ollama_requests': 0,
+                'strapi_writes': 0
+            }
+        if model_name:
+            row['model'] = model_name
+        return row
+
+    def _plan_entry(self, content_type, entry_id, source_entry, target_locales, incremental, locales, seen_keys):
+        """
+        Add one entry's work to the per-locale counters
+
+        A localization pass reads the parent locale's translation, which
+        doesn't exist yet; it is counted as a miss, with the source text
+        standing in for the parent's.
+        """
+        translator = self.translator
+        ollama_service = translator.ollama_service
+        _, locale_models, locale_fields, skipped = translator._resolve_entry(
+            content_type, entry_id, source_entry, target_locales, incremental
+        )
+        for target_locale, reason in skipped.items():
+            self._locale_row(locales, target_locale)['skipped'][reason] += 1
+
+        cached_keys, memory_keys = self._memory_forecast(locale_models, locale_fields)
+        for target_locale, model_name in locale_models.items():
+            row = self._locale_row(locales, target_locale, model_name)
+            fields = locale_fields[target_locale]
+            row['units'] += 1
+            row['strapi_writes'] += 1
+            row['segments'] += len(fields)
+
+            pivot = translator.pivots.get(target_locale)
+            if pivot and pivot['mode'] == 'copy':
+                # Copied from the parent's translation; no generation at all
+                continue
+            if not pivot:
+                keys = memory_keys.get(target_locale, {})
+                hits = {name for name, key in keys.items() if key in cached_keys or key in seen_keys}
+                seen_keys.update(keys.values())
+                row['cached_segments'] += len(hits)
+                fields = {name: value for name, value in fields.items() if name not in hits}
+            if not fields:
+                continue
+            requests = ollama_service.estimate_requests(model_name, fields, translator.batch_fields)
+            text_tokens = sum(estimate_tokens(value) for value in fields.values())
+            row['characters'] += sum(len(value) for value in fields.values())
+            row['ollama_requests'] += requests
+            row['input_tokens'] += text_tokens + requests * ollama_service.PROMPT_TOKENS
+            row['output_tokens'] += text_tokens
+
+    def _memory_forecast(self, locale_models, locale_fields):
+        """
+        Build the memory key of every segment a locale translates from the source
+
+        Returns:
+            tuple: (cached_keys, memory_keys) with the keys already in the
+                translation memory and locale -> segment ID -> key
+        """
+        translator = self.translator
+        memory = translator.translation_memory
+        if not memory:
+            return set(), {}
+        memory_keys = {
+            target_locale: {
+                name: memory.make_key(
+                    value, translator.strapi_service.source_locale, target_locale, model_name,
+                    translator.ollama_service.PROMPT_VERSION
+                )
+                for name, value in locale_fields[target_locale].items()
+            }
+            for target_locale, model_name in locale_models.items()
+            if target_locale not in translator.pivots
+        }
+        keys = [key for keys in memory_keys.values() for key in keys.values()]
+        return memory.cached_keys(keys), memory_keys
+
+    def _parallelism(self, model_name):
+        """Generations for a model the job would run at once"""
+        translator = self.translator
+        if translator.pipeline == 'async':
+            workers = Config.PIPELINE_TRANSLATE_WORKERS
+        else:
+            workers = translator.concurrency
+        limiter = translator.limiter
+        return max(min(workers, limiter.model_limit(model_name), limiter.global_limit), 1)
+
+    def _summarize(self, content_type, target_locales, incremental, entries, missing_entries, locales):
+        """Add up the per-locale counters into the plan"""
+        locale_rows = [locales[locale] for locale in target_locales if locale in locales]
+        warnings = []
+
+        models = {}
+        for row in locale_rows:
+            row['skipped'] = dict(row['skipped'])
+            if row['skipped'].get('no_model'):
+                warnings.append(f"No model configured for locale: {row['locale']}")
+            if not row['model']:
+                continue
+            model = models.setdefault(row['model'], {
+                'model': row['model'],
+                'locales': [],
+                'units': 0,
+                'ollama_requests': 0,
+                'input_tokens': 0,
+                'output_tokens': 0
+            })
+            model['locales'].append(row['locale'])
+            for key in ('units', 'ollama_requests', 'input_tokens', 'output_tokens'):
+                model[key] += row[key]
+
+        projected_seconds = 0.0
+        for model in models.values():
+            rates = generation_stats.get_model_rates(model['model'])
+            model['parallel'] = self._parallelism(model['model'])
+            model['avg_ttft_seconds'] = round(rates['avg_ttft_seconds'], 3) if rates else None
+            model['tokens_per_second'] = round(rates['tokens_per_second'], 1) if rates else None
+            if not model['ollama_requests']:
+                model['projected_seconds'] = 0.0
+            elif rates:
+                # Models run one after another; each one's requests share its parallel slots
+                serial_seconds = (
+                    model['ollama_requests'] * rates['avg_ttft_seconds']
+                    + model['output_tokens'] / rates['tokens_per_second']
+                )
+                model['projected_seconds'] = round(serial_seconds / model['parallel'], 1)
+            else:
+                model['projected_seconds'] = None
+                warnings.append(f"No throughput observed yet for model {model['model']}; duration unknown")
+            if projected_seconds is not None and model['projected_seconds'] is not None:
+                projected_seconds += model['projected_seconds']
+            else:
+                projected_seconds = None
+
+        def total(key):
+            return sum(row[key] for row in locale_rows)
+
+        segments = total('segments')
+        # Units a job would fail rather than skip
+        failures = ('no_model', 'missing_entry')
+        failed = sum(row['skipped'].get(reason, 0) for row in locale_rows for reason in failures)
+        skipped = sum(sum(row['skipped'].values()) for row in locale_rows) - failed
+        if missing_entries:
+            warnings.append(f"Entries that could not be fetched: {missing_entries}")
+
+        return {
+            'content_type': content_type,
+            'target_locales': target_locales,
+            'incremental': incremental,
+            'pipeline': self.translator.pipeline,
+            'entries': entries,
+            'units': {
+                'total': entries * len(target_locales),
+                'translate': total('units'),
+                'skipped': skipped,
+                'failed': failed
+            },
+            'segments': segments,
+            'cached_segments': total('cached_segments'),
+            'cache_hit_rate': round(total('cached_segments') / segments, 3) if segments else None,
+            'characters': total('characters'),
+            'input_tokens': total('input_tokens'),
+            'output_tokens': total('output_tokens'),
+            'ollama_requests': total('ollama_requests'),
+            'strapi_writes': total('strapi_writes'),
+            'projected_seconds': round(projected_seconds, 1) if projected_seconds is not None else None,
+            'locales': locale_rows,
+            'models': list(models.values()),
+            'warnings': warnings
+        }
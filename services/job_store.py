@@ -0,0 +1,214 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class JobStore:
+    """
+    Durable record of translation jobs and of every (entry, locale) unit they
+    process, so jobs survive restarts and failed units can be retried alone
+    """
+
+    # Unit states that a resumed job does not need to process again
+    DONE_STATES = ('completed', 'skipped', 'failed')
+
+    def __init__(self, path=None):
+        self.path = path or Config.JOB_STORE_PATH
+        self.lock = threading.Lock()
+        self.connection = None
+
+    def _connect(self):
+        """Open the database on first use (caller holds the lock)"""
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    content_type TEXT NOT NULL,
+                    entry_ids TEXT NOT NULL,
+                    target_locales TEXT NOT NULL,
+                    incremental INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    retry_entry_ids TEXT
+                )"""
+            )
+            # Databases from before retries were recorded lack the retry scope
+            columns = {row['name'] for row in self.connection.execute("PRAGMA table_info(jobs)")}
+            if 'retry_entry_ids' not in columns:
+                self.connection.execute("ALTER TABLE jobs ADD COLUMN retry_entry_ids TEXT")
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS units (
+                    job_id TEXT NOT NULL,
+                    entry_id TEXT NOT NULL,
+                    locale TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, entry_id, locale)
+                )"""
+            )
+            self.connection.commit()
+        return self.connection
+
+    def _execute(self, sql, params=()):
+        """Run a write statement and commit it"""
+        try:
+            with self.lock:
+                connection = self._connect()
+                cursor = connection.execute(sql, params)
+                connection.commit()
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.error("Error writing job store: %s", e)
+            return 0
+
+    def _query(self, sql, params=()):
+        """Run a read query and return its rows as dicts"""
+        try:
+            with self.lock:
+                rows = self._connect().execute(sql, params).fetchall()
+            return [dict(row) for row in rows]
+        except sqlite3.Error as e:
+            logger.error("Error reading job store: %s", e)
+            return []
+
+    def create_job(self, job_id, content_type, entry_ids, target_locales, incremental=False):
+        """Record a newly queued job"""
+        self._execute(
+            """INSERT INTO jobs
+            (job_id, content_type, entry_ids, target_locales, incremental, status, created_at)
+            VALUES (?, ?, ?, ?, ?, 'queued', ?)""",
+            (job_id, content_type, json.dumps(entry_ids), json.dumps(target_locales),
+             int(incremental), time.time())
+        )
+
+    def set_job_status(self, job_id, status):
+        """Update a job's status, stamping when it started or finished"""
+        now = time.time()
+        if status == 'running':
+            self._execute(
+                "UPDATE jobs SET status = ?, started_at = ?, finished_at = NULL WHERE job_id = ?",
+                (status, now, job_id)
+            )
+        elif status in ('completed', 'cancelled', 'error'):
+            self._execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE job_id = ?",
+                (status, now, job_id)
+            )
+        else:
+            self._execute("UPDATE jobs SET status = ? WHERE job_id = ?", (status, job_id))
+
+    def record_unit(self, job_id, entry_id, locale, status, error=None):
+        """
+        Record the outcome of one (entry, locale) unit
+
+        Args:
+            job_id (str): Job the unit belongs to
+            entry_id (str): Document ID of the entry
+            locale (str): Target locale code
+            status (str): 'completed', 'skipped', 'failed' or 'pending'
+            error (str, optional): Why the unit failed
+        """
+        self._execute(
+            """INSERT OR REPLACE INTO units (job_id, entry_id, locale, status, error, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)""",
+            (job_id, entry_id, locale, status, error, time.time())
+        )
+
+    def start_retry(self, job_id, entry_ids):
+        """
+        Requeue a finished job to run its failed units again
+
+        The status check and the change are one statement, so of two retries
+        of the same job only one gets to start it. The entries to fetch are
+        stored with the job, so a resume after a restart keeps to them.
+
+        Args:
+            job_id (str): Job to requeue
+            entry_ids (list): Entries with failed units
+
+        Returns:
+            bool: True if the job was requeued, False if it is unknown or
+                already queued or running
+        """
+        try:
+            with self.lock:
+                connection = self._connect()
+                with connection:
+                    cursor = connection.execute(
+                        """UPDATE jobs SET status = 'queued', retry_entry_ids = ?
+                        WHERE job_id = ? AND status NOT IN ('queued', 'running')""",
+                        (json.dumps(entry_ids), job_id)
+                    )
+                    if not cursor.rowcount:
+                        return False
+                    connection.execute(
+                        """UPDATE units SET status = 'pending', error = NULL, updated_at = ?
+                        WHERE job_id = ? AND status = 'failed'""",
+                        (time.time(), job_id)
+                    )
+                return True
+        except sqlite3.Error as e:
+            logger.error("Error writing job store: %s", e)
+            return False
+
+    def _decode_job(self, row):
+        """Turn a jobs row into a dict with decoded JSON columns"""
+        row['entry_ids'] = json.loads(row['entry_ids'])
+        # Set while a retry runs only the entries with failed units
+        row['retry_entry_ids'] = json.loads(row['retry_entry_ids']) if row.get('retry_entry_ids') else None
+        row['target_locales'] = json.loads(row['target_locales'])
+        row['incremental'] = bool(row['incremental'])
+        return row
+
+    def get_job(self, job_id):
+        """Get a job's stored record, or None if it is unknown"""
+        rows = self._query("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+        return self._decode_job(rows[0]) if rows else None
+
+    def get_unfinished_jobs(self):
+        """Get jobs that were queued or running when the process stopped"""
+        rows = self._query(
+            "SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+        )
+        return [self._decode_job(row) for row in rows]
+
+    def get_units(self, job_id, status=None):
+        """Get a job's units, optionally only those in one state"""
+        if status:
+            return self._query(
+                "SELECT * FROM units WHERE job_id = ? AND status = ? ORDER BY updated_at",
+                (job_id, status)
+            )
+        return self._query(
+            "SELECT * FROM units WHERE job_id = ? ORDER BY updated_at", (job_id,)
+        )
+
+    def get_done_units(self, job_id, states=DONE_STATES):
+        """Get the (entry_id, locale) pairs of a job that are in one of the given states"""
+        placeholders = ', '.join('?' for _ in states)
+        rows = self._query(
+            f"SELECT entry_id, locale FROM units WHERE job_id = ? AND status IN ({placeholders})",
+            (job_id, *states)
+        )
+        return {(row['entry_id'], row['locale']) for row in rows}
+
+    def get_unit_counts(self, job_id):
+        """Count a job's units by state"""
+        rows = self._query(
+            "SELECT status, COUNT(*) AS count FROM units WHERE job_id = ? GROUP BY status",
+            (job_id,)
+        )
+        return {row['status']: row['count'] for row in rows}
+
+# Shared by the job manager and its translators
+job_store = JobStore()
@@ -0,0 +1,141 @@
+import contextvars
+import json
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from config import Config
+
+# ID of the job the current thread or task works for, added to every record
+job_id_var = contextvars.ContextVar('job_id', default=None)
+
+# Pass as extra= on per-request and per-unit messages so they are sampled
+SAMPLED = {'sampled': True}
+
+BEARER_TOKEN = re.compile(r'(Bearer\s+)[^\s\'",}]+', re.IGNORECASE)
+
+# Attributes every LogRecord has; anything else came from extra= and is structured data
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'job_id', 'sampled', 'taskName'
+}
+
+@contextmanager
+def job_context(job_id):
+    """Tag log records emitted inside the block with a job ID"""
+    token = job_id_var.set(job_id)
+    try:
+        yield
+    finally:
+        job_id_var.reset(token)
+
+def in_current_context(func):
+    """
+    Wrap a callable to run in a copy of the caller's context
+
+    Threads start with an empty context, so work handed to a thread or an
+    executor would otherwise lose the job ID of the code that started it.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+class JobContextFilter(logging.Filter):
+    """Add the current job ID to each record as record.job_id"""
+
+    def filter(self, record):
+        record.job_id = job_id_var.get() or '-'
+        return True
+
+class SamplingFilter(logging.Filter):
+    """
+    Let through one in every N records of each high-volume message
+
+    Only records logged with extra=SAMPLED are sampled; the first one of each
+    message always gets through, so nothing disappears entirely.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = max(1, rate)
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if self.rate == 1 or not getattr(record, 'sampled', False):
+            return True
+        key = (record.name, record.msg)
+        with self.lock:
+            count = self.counts.get(key, 0)
+            self.counts[key] = count + 1
+        return count % self.rate == 0
+
+class RedactingFormatter(logging.Formatter):
+    """Text formatter that masks bearer tokens and the configured API token"""
+
+    def __init__(self, *args, secrets=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        # Short values would mask ordinary words
+        self.secrets = [secret for secret in secrets if secret and len(secret) >= 8]
+
+    def redact(self, text):
+        """Mask secrets in a formatted record"""
+        text = BEARER_TOKEN.sub(r'\1[REDACTED]', text)
+        for secret in self.secrets:
+            text = text.replace(secret, '[REDACTED]')
+        return text
+
+    def format(self, record):
+        return self.redact(super().format(record))
+
+class JsonFormatter(RedactingFormatter):
+    """One JSON object per line, with extra= fields as top-level keys"""
+
+    def format(self, record):
+        payload = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'job_id': getattr(record, 'job_id', '-'),
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return self.redact(json.dumps(payload, default=str))
+
+def configure_logging(level=None, log_format=None, sample_rate=None):
+    """
+    Send log records to stderr with job IDs, sampling and redaction
+
+    Args:
+        level (str, optional): Root log level. Defaults to Config.LOG_LEVEL.
+        log_format (str, optional): 'text' or 'json'. Defaults to Config.LOG_FORMAT.
+        sample_rate (int, optional): Keep one in this many sampled records.
+            Defaults to Config.LOG_SAMPLE_RATE.
+    """
+    level = (level or Config.LOG_LEVEL).upper()
+    log_format = log_format or Config.LOG_FORMAT
+    sample_rate = sample_rate or Config.LOG_SAMPLE_RATE
+
+    secrets = [Config.STRAPI_API_TOKEN]
+    if log_format == 'json':
+        formatter = JsonFormatter(secrets=secrets)
+    else:
+        formatter = RedactingFormatter(
+            '%(asctime)s %(levelname)s %(name)s [job %(job_id)s] %(message)s', secrets=secrets
+        )
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(formatter)
+    handler.addFilter(JobContextFilter())
+    handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    # Replace our own handler when called again, e.g. by the debug reloader
+    for existing in list(root.handlers):
+        if getattr(existing, 'translator_handler', False):
+            root.removeHandler(existing)
+    handler.translator_handler = True
+    root.addHandler(handler)
+    root.setLevel(level)
@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from services.metrics import METADATA_CACHE_REQUESTS
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class MetadataCache:
+    """
+    Cache for slow-changing upstream metadata (content types, locales, models)
+
+    Values have a per-key TTL. Concurrent misses for the same key share one
+    load (single-flight), including its failure: if the load raises, every
+    caller waiting on it gets the same exception instead of calling the
+    upstream itself. Once a value expires it is still served while a
+    single background refresh fetches a new one (stale-while-revalidate). An
+    empty result never replaces a non-empty value, so an upstream outage keeps
+    serving the last good data.
+    """
+
+    def __init__(self, default_ttl=None, failure_ttl=None):
+        self.default_ttl = default_ttl or Config.METADATA_CACHE_TTL
+        self.failure_ttl = failure_ttl or Config.METADATA_CACHE_FAILURE_TTL
+        self.entries = {}
+        self.loading = {}
+        self.lock = threading.Lock()
+
+    def get(self, key, loader, ttl=None):
+        """
+        Get a cached value, loading or refreshing it as needed
+
+        Args:
+            key (str): Cache key
+            loader (callable): Fetches the value when it is missing or stale
+            ttl (float, optional): Seconds the value stays fresh
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        ttl = ttl or self.default_ttl
+        now = time.time()
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry['expires_at'] > now:
+                METADATA_CACHE_REQUESTS.inc(key=key, result='hit')
+                return entry['value']
+
+            in_flight = self.loading.get(key)
+            if in_flight is None:
+                in_flight = {'done': threading.Event(), 'value': None, 'error': None}
+                self.loading[key] = in_flight
+                leader = True
+            else:
+                leader = False
+
+        METADATA_CACHE_REQUESTS.inc(key=key, result='stale' if entry is not None else 'miss')
+        if entry is not None:
+            # Serve the stale value; the first caller to notice refreshes it
+            if leader:
+                threading.Thread(
+                    target=self._load, args=(key, loader, ttl, in_flight), daemon=True
+                ).start()
+            return entry['value']
+
+        if leader:
+            self._load(key, loader, ttl, in_flight)
+        else:
+            in_flight['done'].wait()
+        if in_flight['error'] is not None:
+            raise in_flight['error']
+        return in_flight['value']
+
+    def _load(self, key, loader, ttl, in_flight):
+        """Run the loader and store its result or error, then release waiting callers"""
+        try:
+            value = in_flight['value'] = loader()
+            with self.lock:
+                previous = self.entries.get(key)
+                if not value and previous and previous['value']:
+                    # Keep the last good value but retry sooner
+                    previous['expires_at'] = time.time() + self.failure_ttl
+                else:
+                    self.entries[key] = {
+                        'value': value,
+                        'fetched_at': time.time(),
+                        'expires_at': time.time() + (ttl if value else self.failure_ttl)
+                    }
+        except Exception as e:
+            logger.error("Error refreshing cached %s: %s", key, e)
+            in_flight['error'] = e
+        finally:
+            with self.lock:
+                self.loading.pop(key, None)
+            in_flight['done'].set()
+
+    def invalidate(self, key=None):
+        """
+        Drop one cached key, or everything
+
+        Returns:
+            list: Keys that were dropped
+        """
+        with self.lock:
+            if key is None:
+                keys = list(self.entries)
+                self.entries.clear()
+            else:
+                keys = [key] if self.entries.pop(key, None) is not None else []
+        return keys
+
+    def get_stats(self):
+        """Get the age of each cached key"""
+        now = time.time()
+        with self.lock:
+            return {
+                key: {
+                    'age_seconds': round(now - entry['fetched_at'], 1),
+                    'stale': entry['expires_at'] <= now
+                }
+                for key, entry in self.entries.items()
+            }
+
+# Shared by the web routes
+metadata_cache = MetadataCache()
@@ -0,0 +1,305 @@
+import functools
+import inspect
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers fast Strapi reads up to slow generations on large models
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+def _format_value(value):
+    """Format a sample value, writing whole floats without a fraction"""
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+def _format_labels(labels):
+    """Format (name, value) label pairs as {name="value",...}"""
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+class _Metric:
+    """Base for labelled metrics: one value per combination of label values"""
+
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        """Turn label keyword arguments into the key of a value"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """List (suffix, labels, value) tuples for rendering"""
+        with self.lock:
+            items = list(self.values.items())
+        return [('', tuple(zip(self.labelnames, key)), value) for key, value in items]
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. requests served"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """Add to the counter for a set of label values"""
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. items in a queue"""
+
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        """Raise the gauge for a set of label values"""
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        """Lower the gauge for a set of label values"""
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        """Set the gauge for a set of label values"""
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the body of a with block as in progress while it runs"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        """Record one observation for a set of label values"""
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][index] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the body of a with block takes"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def samples(self):
+        with self.lock:
+            items = [(key, dict(state, buckets=list(state['buckets']))) for key, state in self.values.items()]
+        samples = []
+        for key, state in items:
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['buckets']):
+                cumulative += count
+                samples.append(('_bucket', labels + (('le', _format_value(float(bound))),), cumulative))
+            samples.append(('_sum', labels, state['sum']))
+            samples.append(('_count', labels, state['count']))
+        return samples
+
+class MetricsRegistry:
+    """
+    In-process metrics rendered in the Prometheus text exposition format
+
+    Services record into counters, gauges and histograms as they work.
+    Collectors are called at scrape time for figures that other components
+    already keep, such as cache hit counters, so they cost nothing between
+    scrapes.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def _register(self, metric):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        """Create and register a counter"""
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        """Create and register a gauge"""
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """Create and register a histogram"""
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def register_collector(self, collector):
+        """
+        Add a callable that reports metrics at scrape time
+
+        Args:
+            collector (callable): Returns a list of (name, kind, help, samples)
+                tuples, where samples is a list of (labels dict, value)
+        """
+        with self.lock:
+            self.collectors.append(collector)
+
+    def render(self):
+        """Render every metric in the Prometheus text format"""
+        lines = []
+        with self.lock:
+            metrics = list(self.metrics.values())
+            collectors = list(self.collectors)
+
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                logger.error("Error collecting metrics: %s", e)
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+def timed(histogram, **labels):
+    """
+    Decorate a function or coroutine function to observe its duration
+
+    Args:
+        histogram (Histogram): Histogram to record into
+        **labels: Label values for every observation
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with histogram.time(**labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Shared by every service and rendered by GET /metrics
+metrics = MetricsRegistry()
+
+STRAPI_REQUEST_SECONDS = metrics.histogram(
+    'strapi_request_duration_seconds',
+    'Latency of Strapi API requests, including retries',
+    ['operation']
+)
+OLLAMA_GENERATION_SECONDS = metrics.histogram(
+    'ollama_generation_duration_seconds',
+    'Latency of Ollama generation requests',
+    ['model']
+)
+OLLAMA_GENERATION_TOKENS = metrics.histogram(
+    'ollama_generation_tokens',
+    'Tokens generated per Ollama request',
+    ['model'],
+    buckets=(8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+)
+OLLAMA_TEXT_CHUNKS = metrics.counter(
+    'ollama_text_chunks_total',
+    'Chunks that texts too long for the model context were split into',
+    ['model']
+)
+OLLAMA_REQUESTS_IN_FLIGHT = metrics.gauge(
+    'ollama_requests_in_flight',
+    'Ollama calls holding a concurrency slot',
+    ['model']
+)
+TRANSLATION_UNITS = metrics.counter(
+    'translation_units_total',
+    'Entry/locale units finished, by target locale and outcome',
+    ['locale', 'status']
+)
+TRANSLATION_UNITS_IN_FLIGHT = metrics.gauge(
+    'translation_units_in_flight',
+    'Entry/locale units planned but not yet written, skipped or failed'
+)
+PIPELINE_QUEUE_DEPTH = metrics.gauge(
+    'translation_pipeline_queue_depth',
+    'Items waiting in the async pipeline queues',
+    ['queue']
+)
+STRAPI_WRITE_QUEUE_DEPTH = metrics.gauge(
+    'strapi_write_queue_depth',
+    'Writes waiting for a Strapi writer thread, including retries in backoff'
+)
+STRAPI_WRITES_COALESCED = metrics.counter(
+    'strapi_writes_coalesced_total',
+    'Writes merged into a queued write for the same entry and locale'
+)
+STRAPI_WRITE_RETRIES = metrics.counter(
+    'strapi_write_retries_total',
+    'Failed Strapi writes queued again for another attempt'
+)
+WEBHOOK_EVENTS = metrics.counter(
+    'webhook_events_total',
+    'Strapi webhook calls by event and result (queued or ignored)',
+    ['event', 'result']
+)
+WEBHOOK_PENDING_ENTRIES = metrics.gauge(
+    'webhook_pending_entries',
+    'Entries changed through webhooks and waiting out their debounce delay'
+)
+METADATA_CACHE_REQUESTS = metrics.counter(
+    'metadata_cache_requests_total',
+    'Metadata cache lookups by key and result (hit, stale or miss)',
+    ['key', 'result']
+)
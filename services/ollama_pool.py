@@ -0,0 +1,259 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from services.http_client import get_session
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class BackendError(Exception):
+    """An Ollama backend failed a request; the work can move to another backend"""
+
+class OllamaBackend:
+    """Routing state of one Ollama server"""
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.in_flight = 0
+        # Moving average of generation seconds; None until the first one finishes
+        self.latency = None
+        # Consecutive failed requests and health checks
+        self.failures = 0
+        self.ejected_until = 0.0
+        # Models from /api/tags (None until the first check) and /api/ps
+        self.models = None
+        self.loaded = set()
+
+    def is_ejected(self, now=None):
+        """Check whether the backend is sitting out after repeated failures"""
+        return self.ejected_until > (now if now is not None else time.monotonic())
+
+    def to_dict(self):
+        """Routing state for GET /status"""
+        return {
+            'url': self.url,
+            'healthy': not self.is_ejected(),
+            'in_flight': self.in_flight,
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'failures': self.failures,
+            'loaded': sorted(self.loaded)
+        }
+
+class OllamaPool:
+    """
+    Route generations across one or more Ollama servers
+
+    Each generation goes to the backend with the lowest expected wait: its
+    in-flight requests times its observed latency, plus a penalty when it
+    does not have the model loaded yet. Backends that lack the model (per
+    /api/tags) are skipped. After OLLAMA_EJECT_AFTER consecutive failures a
+    backend is ejected for OLLAMA_EJECT_SECONDS; with more than one backend,
+    a background thread checks /api/tags and /api/ps every
+    OLLAMA_HEALTH_INTERVAL seconds.
+    """
+
+    # Seconds added to a backend's score when it would have to load the model first
+    LOAD_PENALTY = 10.0
+    # Weight of the newest generation in the latency moving average
+    LATENCY_SMOOTHING = 0.2
+
+    def __init__(self, base_urls=None, session=None, health_interval=None, eject_after=None, eject_seconds=None):
+        self.backends = [OllamaBackend(url) for url in base_urls or Config.get_ollama_base_urls()]
+        self.session = session or get_session(
+            'ollama', Config.OLLAMA_CONNECT_TIMEOUT, Config.OLLAMA_READ_TIMEOUT
+        )
+        self.health_interval = health_interval or Config.OLLAMA_HEALTH_INTERVAL
+        self.eject_after = eject_after or Config.OLLAMA_EJECT_AFTER
+        self.eject_seconds = eject_seconds or Config.OLLAMA_EJECT_SECONDS
+        self.lock = threading.Lock()
+        self.health_thread = None
+
+    def choose(self, model_name, exclude=()):
+        """
+        Pick the backend for a request and count it as in flight there
+
+        Callers must hand the backend back with release().
+
+        Args:
+            model_name (str): Model the request needs
+            exclude (collection, optional): URLs of backends already tried
+
+        Returns:
+            OllamaBackend: Backend to send the request to
+        """
+        self._start_health_checks()
+        now = time.monotonic()
+        with self.lock:
+            # Fall back to wider sets rather than fail outright
+            candidates = [backend for backend in self.backends if backend.url not in exclude] or self.backends
+            candidates = [backend for backend in candidates if not backend.is_ejected(now)] or candidates
+            candidates = [
+                backend for backend in candidates
+                if backend.models is None or model_name in backend.models
+            ] or candidates
+
+            latencies = [backend.latency for backend in self.backends if backend.latency is not None]
+            default_latency = sum(latencies) / len(latencies) if latencies else 1.0
+
+            def expected_wait(backend):
+                latency = backend.latency if backend.latency is not None else default_latency
+                wait = (backend.in_flight + 1) * latency
+                if model_name not in backend.loaded:
+                    wait += self.LOAD_PENALTY
+                return wait
+
+            backend = min(candidates, key=expected_wait)
+            backend.in_flight += 1
+            return backend
+
+    def release(self, backend, model_name=None, seconds=None, failed=False):
+        """
+        Record the outcome of a request sent to a backend
+
+        Args:
+            backend (OllamaBackend): Backend returned by choose()
+            model_name (str, optional): Model the backend now has loaded
+            seconds (float, optional): Latency to add to the moving average
+            failed (bool): The backend failed the request
+        """
+        with self.lock:
+            backend.in_flight -= 1
+        if failed:
+            self._record_failure(backend)
+            return
+        with self.lock:
+            backend.failures = 0
+            if model_name:
+                backend.loaded.add(model_name)
+            if seconds is not None:
+                if backend.latency is None:
+                    backend.latency = seconds
+                else:
+                    backend.latency += self.LATENCY_SMOOTHING * (seconds - backend.latency)
+
+    @contextmanager
+    def route(self, model_name, exclude=()):
+        """
+        Send one generation through the pool
+
+        The block raises BackendError when the backend failed; the failure
+        is recorded and the error re-raised so the caller can try another.
+
+        Yields:
+            OllamaBackend: Backend to send the generation to
+        """
+        backend = self.choose(model_name, exclude)
+        started_at = time.monotonic()
+        try:
+            yield backend
+        except BackendError:
+            self.release(backend, failed=True)
+            raise
+        except BaseException:
+            self.release(backend)
+            raise
+        else:
+            self.release(backend, model_name, time.monotonic() - started_at)
+
+    def _record_failure(self, backend):
+        """Count a failure and eject the backend once they pile up"""
+        with self.lock:
+            backend.failures += 1
+            was_ejected = backend.is_ejected()
+            eject = len(self.backends) > 1 and backend.failures >= self.eject_after
+            if eject:
+                # Failures while ejected, e.g. health checks, extend the ejection
+                backend.ejected_until = time.monotonic() + self.eject_seconds
+        if eject and not was_ejected:
+            logger.warning(
+                "Ejecting Ollama backend %s for %.0fs after %d failures",
+                backend.url, self.eject_seconds, backend.failures
+            )
+
+    def refresh(self, backend):
+        """
+        Update a backend's available and loaded models
+
+        Returns:
+            bool: True if the backend answered
+        """
+        try:
+            tags = self.session.get(f"{backend.url}/api/tags")
+            ps = self.session.get(f"{backend.url}/api/ps")
+            if tags.status_code != 200 or ps.status_code != 200:
+                raise BackendError(f"status {tags.status_code}/{ps.status_code}")
+            models = [model['name'] for model in tags.json().get('models', [])]
+            loaded = {model['name'] for model in ps.json().get('models', [])}
+        except Exception as e:
+            # An ejected backend fails every check until it comes back
+            log = logger.debug if backend.is_ejected() else logger.error
+            log("Error checking Ollama backend %s: %s", backend.url, e)
+            self._record_failure(backend)
+            return False
+        with self.lock:
+            backend.models = models
+            backend.loaded = loaded
+            backend.failures = 0
+        return True
+
+    def available_models(self):
+        """Refresh every backend in rotation and list the models any of them has"""
+        return self._collect('models')
+
+    def loaded_models(self):
+        """Refresh every backend in rotation and list the models any of them has loaded"""
+        return self._collect('loaded')
+
+    def _collect(self, attribute):
+        """Union of a model attribute over the backends that answered, in backend order"""
+        names = []
+        for backend in self.backends:
+            if backend.is_ejected() or not self.refresh(backend):
+                continue
+            for name in getattr(backend, attribute):
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def _start_health_checks(self):
+        """Start the health check thread on first use, when there is more than one backend"""
+        if len(self.backends) < 2 or self.health_thread is not None:
+            return
+        with self.lock:
+            if self.health_thread is None:
+                self.health_thread = threading.Thread(
+                    target=self._check_health, name='ollama-health', daemon=True
+                )
+                self.health_thread.start()
+
+    def _check_health(self):
+        """Health check thread: refresh every backend, ejected or not"""
+        while True:
+            for backend in self.backends:
+                self.refresh(backend)
+            time.sleep(self.health_interval)
+
+    def get_stats(self):
+        """Routing state of every backend"""
+        with self.lock:
+            return [backend.to_dict() for backend in self.backends]
+
+    def collect_metrics(self):
+        """Report per-backend health and in-flight requests to the metrics registry"""
+        stats = self.get_stats()
+        return [
+            (
+                'ollama_backend_up', 'gauge',
+                'Whether an Ollama backend is in rotation (1) or ejected (0)',
+                [({'backend': backend['url']}, int(backend['healthy'])) for backend in stats]
+            ),
+            (
+                'ollama_backend_requests_in_flight', 'gauge',
+                'Generations in flight on each Ollama backend',
+                [({'backend': backend['url']}, backend['in_flight']) for backend in stats]
+            )
+        ]
+
+# Shared by all Ollama clients so routing sees the load from every job
+ollama_pool = OllamaPool()
@@ -1,26 +1,107 @@
+import json
+import logging
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from services.http_client import get_session
+from services.concurrency import ollama_limiter
+from services.content_extractor import PLACEHOLDER
+from services.generation_stats import generation_stats
+from services.ollama_pool import BackendError, OllamaPool, ollama_pool
+from services.metrics import OLLAMA_GENERATION_SECONDS, OLLAMA_GENERATION_TOKENS, OLLAMA_TEXT_CHUNKS
+from services.text_chunker import context_tail, estimate_tokens, split_text
+from services.logging_config import SAMPLED, in_current_context
 from config import Config
 
+logger = logging.getLogger(__name__)
+
 class OllamaService:
-    def __init__(self, base_url=None):
-        self.base_url = base_url or Config.OLLAMA_BASE_URL
+    # Bump when the translation prompts change so cached translations are not reused
+    PROMPT_VERSION = 2
+    # Context budget per request, in tokens: the prompt's instructions, the end of the
+    # previous chunk carried over for context, and the translation's share of the rest
+    PROMPT_TOKENS = 150
+    CONTEXT_TOKENS = 60
+    OUTPUT_TOKEN_RATIO = 1.5
+    
+    def __init__(self, base_url=None, batch_max_chars=None, session=None, cancel_event=None, pool=None,
+                 context_sizes=None, limiter=None):
+        # Pooled keep-alive session shared by all clients; without HTTP retries, so a failing
+        # server is left to the pool, which moves the generation to another one
+        self.session = session or get_session(
+            'ollama-generate', Config.OLLAMA_CONNECT_TIMEOUT, Config.OLLAMA_READ_TIMEOUT, max_retries=0
+        )
+        # Servers generations are routed across; an explicit base_url gets a pool of its own
+        if pool is None and base_url:
+            pool = OllamaPool(base_url.split(','), session)
+        self.pool = pool or ollama_pool
+        self.batch_max_chars = batch_max_chars or Config.OLLAMA_BATCH_MAX_CHARS
+        self.stream = Config.OLLAMA_STREAM
+        # How long Ollama keeps a model loaded after a request ('' = server default)
+        self.keep_alive = Config.OLLAMA_KEEP_ALIVE
+        # Model -> context window; texts that don't fit are translated in chunks
+        self.context_sizes = context_sizes if context_sizes is not None else Config.get_context_sizes()
+        self.chunk_concurrency = max(Config.OLLAMA_CHUNK_CONCURRENCY, 1)
+        # Callers hold one slot per translation; chunks beyond the first need slots of their own
+        self.limiter = limiter or ollama_limiter
+        # Set by the owning job to stop in-flight generations
+        self.cancel_event = cancel_event
     
     def get_available_models(self):
-        """Fetch all available models from Ollama"""
+        """Fetch the models available on any Ollama server in the pool"""
+        return self.pool.available_models()
+    
+    def get_loaded_models(self):
+        """Fetch the models any Ollama server in the pool has in memory"""
+        return self.pool.loaded_models()
+    
+    def preload_model(self, model_name):
+        """
+        Ask the Ollama server the model's next request would go to to load it
+        
+        Returns:
+            bool: True if the model was loaded
+        """
+        backend = self.pool.choose(model_name)
         try:
-            response = requests.get(f"{self.base_url}/api/tags")
-            if response.status_code == 200:
-                models = response.json().get('models', [])
-                return [model['name'] for model in models]
-            return []
+            response = self.session.post(
+                f"{backend.url}/api/generate",
+                json=self._with_request_options({"model": model_name, "stream": False})
+            )
+            loaded = response.status_code == 200
         except Exception as e:
-            print(f"Error fetching models from Ollama: {e}")
-            return []
+            logger.error("Error preloading model %s: %s", model_name, e)
+            loaded = False
+        self.pool.release(backend, model_name if loaded else None, failed=not loaded)
+        return loaded
+    
+    def _with_request_options(self, payload):
+        """Add the keep_alive hint and the model's context size to a request payload when configured"""
+        if self.keep_alive:
+            payload = dict(payload, keep_alive=self.keep_alive)
+        # Always the same num_ctx for a model, so Ollama never reloads it to resize
+        if payload['model'] in self.context_sizes:
+            payload = dict(payload, options={'num_ctx': self.context_sizes[payload['model']]})
+        return payload
+    
+    @classmethod
+    def _source_budget(cls, model_name, context_sizes):
+        """Estimated tokens of source text that fit in one request to a model"""
+        context_size = context_sizes.get(model_name, Config.OLLAMA_CONTEXT_SIZE)
+        available = context_size - cls.PROMPT_TOKENS - cls.CONTEXT_TOKENS
+        return max(int(available / (1 + cls.OUTPUT_TOKEN_RATIO)), cls.CONTEXT_TOKENS)
     
     def generate_translation(self, model_name, source_text, source_lang, target_lang):
         """
         Generate translation using Ollama model
         
+        A text too long for the model's context window is split into chunks
+        on paragraph and sentence boundaries. Up to OLLAMA_CHUNK_CONCURRENCY
+        chunks are translated at a time, each with the end of the chunk
+        before it as context, and the translations are joined in order. The
+        caller holds one limiter slot for the model; chunks beyond the first
+        only run in parallel on slots that are free.
+        
         Args:
             model_name (str): Name of the Ollama model to use
             source_text (str): Text to translate
@@ -31,24 +112,401 @@ class OllamaService:
             str: Translated text or None if there was an error
         """
         try:
-            prompt = f"""Translate the following text from {source_lang} to {target_lang}. 
-Provide only the translated text without any additional explanations or quotes:
+            max_tokens = self._source_budget(model_name, self.context_sizes)
+            if estimate_tokens(source_text) > max_tokens:
+                return self._generate_chunks(model_name, source_text, source_lang, target_lang, max_tokens)
+            
+            payload = {
+                "model": model_name,
+                "prompt": self._translation_prompt(source_text, source_lang, target_lang)
+            }
+            
+            response_text = self._generate(payload, len(source_text), target_lang)
+            if response_text is None:
+                return None
+            return response_text.strip()
+        except Exception as e:
+            logger.error("Error generating translation: %s", e)
+            return None
+    
+    def _generate_chunks(self, model_name, source_text, source_lang, target_lang, max_tokens):
+        """Translate a long text in chunks that fit the model's context, see generate_translation"""
+        chunks = self._split_chunks(model_name, source_text, max_tokens)
+        prompts = self._chunk_prompts(chunks, source_lang, target_lang)
+        
+        def translate_chunk(index):
+            if prompts[index] is None:
+                return chunks[index][0]
+            response_text = self._generate(
+                {"model": model_name, "prompt": prompts[index]}, len(chunks[index][0]), target_lang
+            )
+            return response_text.strip() if response_text else None
+        
+        wanted = min(self.chunk_concurrency, sum(prompt is not None for prompt in prompts)) - 1
+        with self.limiter.extra_slots(model_name, wanted) as extra:
+            with ThreadPoolExecutor(max_workers=extra + 1) as executor:
+                futures = [
+                    executor.submit(in_current_context(translate_chunk), index) for index in range(len(chunks))
+                ]
+                translated = [future.result() for future in futures]
+        return self._join_chunks(chunks, translated)
+    
+    @staticmethod
+    def _split_chunks(model_name, source_text, max_tokens):
+        """Split a text that doesn't fit the model's context, see text_chunker.split_text"""
+        chunks = split_text(source_text, max_tokens)
+        OLLAMA_TEXT_CHUNKS.inc(len(chunks), model=model_name)
+        logger.debug(
+            "Translating %d characters with %s in %d chunks of up to %d tokens",
+            len(source_text), model_name, len(chunks), max_tokens, extra=SAMPLED
+        )
+        return chunks
+    
+    @classmethod
+    def _chunk_prompts(cls, chunks, source_lang, target_lang):
+        """Build the prompt for each chunk, or None for chunks with nothing to translate"""
+        prompts = []
+        for index, (chunk, _) in enumerate(chunks):
+            if not chunk.strip():
+                prompts.append(None)
+                continue
+            # The end of the previous chunk, so the model sees how this one starts
+            previous = next((text for text, _ in reversed(chunks[:index]) if text.strip()), None)
+            context = context_tail(previous, cls.CONTEXT_TOKENS) if previous else None
+            prompts.append(cls._translation_prompt(chunk, source_lang, target_lang, context))
+        return prompts
+    
+    @staticmethod
+    def _join_chunks(chunks, translated):
+        """Put translated chunks back together with the original separators, or None if any failed"""
+        if any(text is None for text in translated):
+            logger.warning(
+                "Could not translate %d of %d chunks",
+                sum(text is None for text in translated), len(chunks)
+            )
+            return None
+        return ''.join(text + separator for text, (_, separator) in zip(translated, chunks))
+    
+    @staticmethod
+    def _is_localization(source_lang, target_lang):
+        """Check whether two locales are variants of one language, e.g. pt-BR and pt-PT"""
+        return source_lang.split('-')[0].lower() == target_lang.split('-')[0].lower()
+    
+    @staticmethod
+    def _translation_prompt(source_text, source_lang, target_lang, context=None):
+        """
+        Build the prompt for translating a single text
+        
+        Args:
+            context (str, optional): Text just before this one, when it is a
+                chunk of a longer text; shown to the model but not translated
+        """
+        if context:
+            context = f"""It continues a longer text. For context only, the text just before it is:
+\"\"\"{context}\"\"\"
+Do not include that earlier text in your answer.
+"""
+        if OllamaService._is_localization(source_lang, target_lang):
+            return f"""Adapt the following {source_lang} text for {target_lang} readers. Change only the spelling, vocabulary and conventions that differ between them.
+{context or ''}{OllamaService._placeholder_note(source_text)}Provide only the adapted text without any additional explanations or quotes:
+
+{source_text}"""
+        return f"""Translate the following text from {source_lang} to {target_lang}. 
+{context or ''}{OllamaService._placeholder_note(source_text)}Provide only the translated text without any additional explanations or quotes:
 
 {source_text}"""
+    
+    @staticmethod
+    def _placeholder_note(*texts):
+        """Prompt line asking to keep the numbered tags that stand in for inline markup, if any"""
+        if any(PLACEHOLDER.search(text) for text in texts):
+            return "Keep the numbered tags such as <1>, </1> and <2/> exactly as they are, around the words they belong to.\n"
+        return ''
+    
+    @staticmethod
+    def _batch_prompt(batch, source_lang, target_lang):
+        """Build the JSON-mode prompt for translating a batch of fields"""
+        if OllamaService._is_localization(source_lang, target_lang):
+            return f"""Adapt the values of the following JSON object from {source_lang} to {target_lang}, changing only the spelling, vocabulary and conventions that differ between them.
+Keep every key unchanged and do not add or remove keys.
+{OllamaService._placeholder_note(*batch.values())}Respond only with a JSON object mapping each key to its adapted value:
+
+{json.dumps(batch, ensure_ascii=False, indent=2)}"""
+        return f"""Translate the values of the following JSON object from {source_lang} to {target_lang}.
+Keep every key unchanged and do not add or remove keys.
+{OllamaService._placeholder_note(*batch.values())}Respond only with a JSON object mapping each key to its translated value:
+
+{json.dumps(batch, ensure_ascii=False, indent=2)}"""
+    
+    @staticmethod
+    def _batch_reply_length(batch):
+        """Length of a batch as the JSON the model repeats in its reply, keys and quotes included"""
+        return len(json.dumps(batch, ensure_ascii=False, indent=2))
+    
+    @staticmethod
+    def _parse_batch_reply(batch, response_text):
+        """
+        Pull the per-field translations out of a JSON-mode reply
+        
+        Returns:
+            dict: Field name -> translated text for the keys that came back
+                as non-empty strings; empty if the reply couldn't be parsed
+        """
+        try:
+            parsed = json.loads(response_text)
+        except ValueError as e:
+            logger.warning("Could not parse batch translation, falling back to per-field calls: %s", e)
+            return {}
+        if not isinstance(parsed, dict):
+            logger.warning("Batch translation reply is not a JSON object, falling back to per-field calls")
+            return {}
+        
+        return {
+            field_name: parsed[field_name].strip()
+            for field_name in batch
+            if isinstance(parsed.get(field_name), str) and parsed[field_name].strip()
+        }
+    
+    @staticmethod
+    def _max_output_chars(source_length):
+        """Longest output accepted before a generation is treated as runaway"""
+        return int(source_length * Config.OLLAMA_MAX_OUTPUT_RATIO) + Config.OLLAMA_MAX_OUTPUT_SLACK
+    
+    @staticmethod
+    def _record_generation(model_name, target_lang, started_at, first_token_at, finished_at, final, chunk_count):
+        """Record time to first token and throughput for a finished generation"""
+        first_token_at = first_token_at or finished_at
+        if final.get('eval_count') and final.get('eval_duration'):
+            tokens = final['eval_count']
+            eval_seconds = final['eval_duration'] / 1e9
+        else:
+            tokens = chunk_count
+            eval_seconds = finished_at - first_token_at
+        generation_stats.record(
+            model_name, target_lang, first_token_at - started_at, tokens, eval_seconds
+        )
+        OllamaService._observe_generation(model_name, finished_at - started_at, tokens)
+    
+    @staticmethod
+    def _observe_generation(model_name, seconds, tokens):
+        """Record the latency and size of a finished generation in the metrics"""
+        OLLAMA_GENERATION_SECONDS.observe(seconds, model=model_name)
+        if tokens:
+            OLLAMA_GENERATION_TOKENS.observe(tokens, model=model_name)
+    
+    def _generate(self, payload, source_length, target_lang):
+        """
+        Run a generation request, streaming the reply when enabled
+        
+        In streaming mode the NDJSON token stream is read as it arrives, which
+        records time to first token and throughput, and lets the generation be
+        stopped early when the job is cancelled or the output grows past
+        OLLAMA_MAX_OUTPUT_RATIO times the source length.
+        
+        The request goes to the server the pool picks for the model; if that
+        server fails, the generation is started again on another one.
+        
+        Args:
+            payload (dict): /api/generate payload without the stream flag
+            source_length (int): Length of the source text, for the output limit
+            target_lang (str): Target language code, for the metrics
             
+        Returns:
+            str: Generated text or None if there was an error or it was stopped
+        """
+        model_name = payload['model']
+        payload = self._with_request_options(payload)
+        tried = set()
+        
+        while len(tried) < len(self.pool.backends):
+            if self._is_cancelled():
+                return None
+            try:
+                with self.pool.route(model_name, tried) as backend:
+                    try:
+                        return self._generate_on(backend.url, model_name, payload, source_length, target_lang)
+                    except requests.RequestException as e:
+                        raise BackendError(e) from e
+            except BackendError as e:
+                tried.add(backend.url)
+                if len(tried) < len(self.pool.backends):
+                    logger.warning("Ollama server %s failed (%s), trying another", backend.url, e)
+                else:
+                    logger.error("Error from Ollama API: %s", e)
+        return None
+    
+    def _generate_on(self, base_url, model_name, payload, source_length, target_lang):
+        """
+        Run a generation on one Ollama server, see _generate
+        
+        The request is sent once; if the server fails, _generate moves the
+        generation to another one.
+        
+        Raises:
+            BackendError: The server answered with an error
+        """
+        url = f"{base_url}/api/generate"
+        if not self.stream:
+            started_at = time.monotonic()
+            response = self.session.post(url, json=dict(payload, stream=False))
+            if response.status_code != 200:
+                raise BackendError(f"{response.status_code}, {response.text[:500]}")
+            data = response.json()
+            self._observe_generation(model_name, time.monotonic() - started_at, data.get('eval_count'))
+            return data.get('response', '')
+        
+        max_chars = self._max_output_chars(source_length)
+        started_at = time.monotonic()
+        first_token_at = None
+        parts = []
+        length = 0
+        final = {}
+        
+        # Leaving the with block before the end of the stream closes the connection,
+        # which stops Ollama generating; a stream read to the end goes back to the pool
+        with self.session.post(url, json=dict(payload, stream=True), stream=True) as response:
+            if response.status_code != 200:
+                raise BackendError(f"{response.status_code}, {response.text[:500]}")
+            
+            for line in response.iter_lines():
+                # Anything after the done chunk is only read to reach the end of the stream
+                if final or not line:
+                    continue
+                if self._is_cancelled():
+                    logger.info("Generation with %s cancelled", model_name)
+                    generation_stats.record_aborted(model_name, target_lang)
+                    return None
+                
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    raise BackendError(chunk['error'])
+                
+                text = chunk.get('response', '')
+                if text and first_token_at is None:
+                    first_token_at = time.monotonic()
+                parts.append(text)
+                length += len(text)
+                
+                if length > max_chars:
+                    logger.warning("Stopping generation with %s: output exceeded %s characters", model_name, max_chars)
+                    generation_stats.record_aborted(model_name, target_lang)
+                    return None
+                if chunk.get('done'):
+                    final = chunk
+        
+        self._record_generation(
+            model_name, target_lang, started_at, first_token_at, time.monotonic(), final, len(parts)
+        )
+        return ''.join(parts)
+    
+    def _is_cancelled(self):
+        """Check whether the owning job asked to stop generating"""
+        return self.cancel_event is not None and self.cancel_event.is_set()
+    
+    def generate_batch_translation(self, model_name, fields, source_lang, target_lang):
+        """
+        Translate several fields with as few Ollama calls as possible
+        
+        Fields are packed into JSON-mode requests of at most batch_max_chars
+        characters of source text that also fit the model's context window;
+        a field too long for either goes on its own and may be chunked. Any field the model leaves out of the JSON
+        reply, or whose batch can't be parsed, is retried with a per-field call.
+        
+        Args:
+            model_name (str): Name of the Ollama model to use
+            fields (dict): Field name -> text to translate
+            source_lang (str): Source language code (e.g., 'en')
+            target_lang (str): Target language code (e.g., 'fr')
+            
+        Returns:
+            dict: Field name -> translated text, for the fields that succeeded
+        """
+        translations = {}
+        max_tokens = self._source_budget(model_name, self.context_sizes)
+        for batch in self._split_batches(fields, self.batch_max_chars, max_tokens):
+            if len(batch) > 1:
+                translations.update(
+                    self._generate_json_batch(model_name, batch, source_lang, target_lang)
+                )
+            
+            # Per-field fallback for single fields and anything the batch missed
+            for field_name, field_value in batch.items():
+                if field_name in translations:
+                    continue
+                translated_text = self.generate_translation(
+                    model_name, field_value, source_lang, target_lang
+                )
+                if translated_text:
+                    translations[field_name] = translated_text
+        return translations
+    
+    def estimate_requests(self, model_name, fields, batch_fields=True):
+        """
+        Count the generations translating fields would take, without calling Ollama
+        
+        Assumes every batch reply is complete, so no per-field fallbacks.
+        
+        Args:
+            model_name (str): Name of the Ollama model to use
+            fields (dict): Field name -> text to translate
+            batch_fields (bool): Fields are packed into JSON-mode batches
+            
+        Returns:
+            int: Number of /api/generate requests
+        """
+        max_tokens = self._source_budget(model_name, self.context_sizes)
+        
+        def single(text):
+            if estimate_tokens(text) <= max_tokens:
+                return 1
+            return sum(1 for chunk, _ in split_text(text, max_tokens) if chunk.strip())
+        
+        if not batch_fields:
+            return sum(single(value) for value in fields.values())
+        return sum(
+            1 if len(batch) > 1 else single(next(iter(batch.values())))
+            for batch in self._split_batches(fields, self.batch_max_chars, max_tokens)
+        )
+    
+    @staticmethod
+    def _split_batches(fields, max_chars, max_tokens=None):
+        """Split fields into batches whose source text fits the character and token budgets"""
+        batches = []
+        current, current_size, current_tokens = {}, 0, 0
+        for field_name, field_value in fields.items():
+            size = len(field_value)
+            tokens = estimate_tokens(field_value)
+            too_many_tokens = max_tokens is not None and current_tokens + tokens > max_tokens
+            if current and (current_size + size > max_chars or too_many_tokens):
+                batches.append(current)
+                current, current_size, current_tokens = {}, 0, 0
+            current[field_name] = field_value
+            current_size += size
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _generate_json_batch(self, model_name, batch, source_lang, target_lang):
+        """
+        Translate a batch of fields in one JSON-mode request
+        
+        Returns:
+            dict: Field name -> translated text for the keys that came back
+                as non-empty strings; empty if the reply couldn't be parsed
+        """
+        try:
             payload = {
                 "model": model_name,
-                "prompt": prompt,
-                "stream": False
+                "prompt": self._batch_prompt(batch, source_lang, target_lang),
+                "format": "json"
             }
             
-            response = requests.post(f"{self.base_url}/api/generate", json=payload)
+            response_text = self._generate(payload, self._batch_reply_length(batch), target_lang)
+            if response_text is None:
+                return {}
             
-            if response.status_code == 200:
-                return response.json().get('response', '').strip()
-            else:
-                print(f"Error from Ollama API: {response.status_code}, {response.text}")
-                return None
+            return self._parse_batch_reply(batch, response_text)
         except Exception as e:
-            print(f"Error generating translation: {e}")
-            return None
\ No newline at end of file
+            logger.error("Error generating batch translation: %s", e)
+            return {}
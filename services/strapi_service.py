@@ -1,9 +1,21 @@
-import requests
+import logging
+from services.http_client import get_session
+from services.metrics import STRAPI_REQUEST_SECONDS, timed
+from services.logging_config import SAMPLED
 from config import Config
 
+logger = logging.getLogger(__name__)
+
+class StrapiError(Exception):
+    """Strapi failed a request whose data can't be skipped, e.g. a page of entries"""
+
 class StrapiService:
-    def __init__(self, base_url=None, api_token=None, source_locale=None):
+    def __init__(self, base_url=None, api_token=None, source_locale=None, session=None):
         self.base_url = base_url or Config.STRAPI_BASE_URL
+        # Pooled keep-alive session with timeouts and retries, shared by all clients
+        self.session = session or get_session(
+            'strapi', Config.STRAPI_CONNECT_TIMEOUT, Config.STRAPI_READ_TIMEOUT
+        )
         self.api_token = api_token or Config.STRAPI_API_TOKEN
         self.source_locale = source_locale or Config.STRAPI_SOURCE_LOCALE
         self.headers = {
@@ -15,15 +27,14 @@ class StrapiService:
         """Fetch available content types from Strapi"""
         try:
             # This endpoint is for Strapi v5+
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/content-type-builder/content-types",
                 headers=self.headers
             )
             
             if response.status_code == 200:
                 json_data = response.json()
-                # debug
-                print(f"content_types: {json_data}")
+                logger.debug("Fetched %d content types", len(json_data.get('data', [])))
                 
                 content_types = json_data.get('data', [])
                 # Filter to include only collection types with i18n enabled in pluginOptions
@@ -35,13 +46,28 @@ class StrapiService:
                 ]
             return []
         except Exception as e:
-            print(f"Error fetching content types: {e}")
+            logger.error("Error fetching content types: %s", e)
+            return []
+    
+    def get_components(self):
+        """Fetch component schemas from Strapi"""
+        try:
+            response = self.session.get(
+                f"{self.base_url}/api/content-type-builder/components",
+                headers=self.headers
+            )
+            
+            if response.status_code == 200:
+                return response.json().get('data', [])
+            return []
+        except Exception as e:
+            logger.error("Error fetching components: %s", e)
             return []
     
     def get_available_locales(self):
         """Fetch available locales from Strapi"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/i18n/locales",
                 headers=self.headers
             )
@@ -50,17 +76,13 @@ class StrapiService:
                 json_data = response.json()
                 # Check if the response is already a list or has a 'data' key
                 if isinstance(json_data, list):
-                    # debug
-                    #print(f"json_data: {json_data}")
                     return json_data
                 elif isinstance(json_data, dict) and 'data' in json_data:
-                    # debug
-                    #print(f"json_data: {json_data}")
                     return json_data.get('data', [])
                 return []
             return []
         except Exception as e:
-            print(f"Error fetching locales: {e}")
+            logger.error("Error fetching locales: %s", e)
             return []
     
     def get_entries(self, content_type, locale=None):
@@ -72,45 +94,152 @@ class StrapiService:
             locale (str, optional): Locale to fetch. Defaults to source locale.
             
         Returns:
-            list: List of entries
-        """
-        try:
-            api_path = self._get_api_path(content_type)
-            locale_param = locale or self.source_locale
+            list: List of entries from every page of the collection
             
-            # Include populate=* to get all relations and nested data
-            url = f"{self.base_url}/api/{api_path}?locale={locale_param}&populate=*"
-            print(f"DEBUG: Fetching entries from URL: {url}")
-            print(f"DEBUG: Headers: {self.headers}")
+        Raises:
+            StrapiError: A page could not be fetched
+        """
+        entries = list(self.iter_entries(content_type, locale))
+        logger.debug("Found %d entries", len(entries))
+        return entries
+    
+    def iter_entries(self, content_type, locale=None, fields=None, populate=None, page_size=None,
+                     on_total=None, filters=None):
+        """
+        Stream entries for a content type page by page
+        
+        Pages are fetched lazily, so callers can start working on the first
+        entries before the rest of the collection has been requested.
+        
+        Args:
+            content_type (str): Content type API ID (e.g., 'api::article.article')
+            locale (str, optional): Locale to fetch. Defaults to source locale.
+            fields (list, optional): Only return these attributes. When given,
+                relations are not populated unless populate is set too.
+            populate (str or dict, optional): Populate parameter, or populate
+                query parameters such as FieldIndex.get_populate returns.
+                Defaults to '*' when no fields are requested.
+            page_size (int, optional): Entries per page. Defaults to Config.STRAPI_PAGE_SIZE.
+            on_total (callable, optional): Called with the collection size
+                reported by Strapi once the first page arrives
+            filters (dict, optional): Extra query parameters, e.g. filters[...]
             
-            response = requests.get(
-                url,
-                headers=self.headers
-            )
+        Yields:
+            dict: Entry data
             
-            print(f"DEBUG: API Response status code for entries: {response.status_code}")
+        Raises:
+            StrapiError: A page could not be fetched; stopping there would
+                pass off part of the collection as all of it
+        """
+        api_path = self._get_api_path(content_type)
+        page_size = page_size or Config.STRAPI_PAGE_SIZE
+        params = self._entries_params(locale, fields, populate, filters)
+        
+        page = 1
+        while True:
+            params['pagination[page]'] = page
+            params['pagination[pageSize]'] = page_size
+            url = f"{self.base_url}/api/{api_path}"
             
-            if response.status_code == 200:
-                data = response.json()
-                print(f"DEBUG: API Response data for entries: {data}")
+            try:
+                logger.debug("Fetching entries page %d from %s", page, url, extra=SAMPLED)
+                with STRAPI_REQUEST_SECONDS.time(operation='list_entries'):
+                    response = self.session.get(url, headers=self.headers, params=params)
                 
-                # Get entries from the data field
-                entries = data.get('data', [])
-                if entries:
-                    print(f"DEBUG: Found {len(entries)} entries")
-                    return entries
-                else:
-                    print("DEBUG: No entries found")
-                    return []
-            else:
-                print(f"ERROR: Failed to fetch entries. Status code: {response.status_code}")
-                print(f"ERROR: Response text: {response.text}")
-            return []
-        except Exception as e:
-            print(f"ERROR in get_entries: {e}")
-            return []
+                if response.status_code != 200:
+                    raise StrapiError(
+                        f"Failed to fetch entries page {page}: {response.status_code} {response.text[:500]}"
+                    )
+                
+                data = response.json()
+            except StrapiError:
+                raise
+            except Exception as e:
+                raise StrapiError(f"Error fetching entries page {page}: {e}") from e
+            
+            entries = data.get('data', [])
+            pagination = data.get('meta', {}).get('pagination', {})
+            if page == 1 and on_total and 'total' in pagination:
+                on_total(pagination['total'])
+            
+            yield from entries
+            
+            if self._is_last_page(page, page_size, entries, pagination):
+                return
+            page += 1
     
-    def get_entry(self, content_type, entry_id, locale=None):
+    def _entries_params(self, locale=None, fields=None, populate=None, filters=None):
+        """Build the query parameters for listing entries"""
+        params = {'locale': locale or self.source_locale}
+        if fields:
+            for index, field_name in enumerate(fields):
+                params[f'fields[{index}]'] = field_name
+        if isinstance(populate, dict):
+            params.update(populate)
+        elif populate or not fields:
+            params['populate'] = populate or '*'
+        if filters:
+            params.update(filters)
+        return params
+    
+    @staticmethod
+    def _is_last_page(page, page_size, entries, pagination):
+        """Stop on the last page, or on a short page if Strapi sent no metadata"""
+        if not entries:
+            return True
+        page_count = pagination.get('pageCount')
+        if page_count is not None:
+            return page >= page_count
+        return len(entries) < page_size
+    
+    @staticmethod
+    def _document_id_filters(entry_ids):
+        """Build a filters[documentId][$in] filter for a list of document IDs"""
+        return {
+            f'filters[documentId][$in][{index}]': entry_id
+            for index, entry_id in enumerate(entry_ids)
+        }
+    
+    def iter_entries_by_ids(self, content_type, entry_ids, locale=None, chunk_size=None, populate=None):
+        """
+        Fetch many entries by document ID with as few requests as possible
+        
+        IDs are requested in chunks with a filters[documentId][$in] filter,
+        so the cost is one request per chunk instead of one per entry.
+        
+        Args:
+            content_type (str): Content type API ID
+            entry_ids (list): Document IDs to fetch
+            locale (str, optional): Locale to fetch. Defaults to source locale.
+            chunk_size (int, optional): IDs per request. Defaults to Config.STRAPI_PAGE_SIZE.
+            populate (str or dict, optional): Populate parameter, see iter_entries
+            
+        Yields:
+            tuple: (entry_id, entry) in request order, with entry set to None
+                for IDs Strapi did not return
+        """
+        chunk_size = chunk_size or Config.STRAPI_PAGE_SIZE
+        entry_ids = [str(entry_id) for entry_id in entry_ids]
+        
+        for start in range(0, len(entry_ids), chunk_size):
+            chunk = entry_ids[start:start + chunk_size]
+            filters = self._document_id_filters(chunk)
+            try:
+                found = {
+                    str(entry.get('documentId')): entry
+                    for entry in self.iter_entries(
+                        content_type, locale, populate=populate, page_size=chunk_size, filters=filters
+                    )
+                }
+            except StrapiError as e:
+                # Callers fetch missing entries one by one and fail only those that still can't be read
+                logger.error("%s", e)
+                found = {}
+            for entry_id in chunk:
+                yield entry_id, found.get(entry_id)
+    
+    @timed(STRAPI_REQUEST_SECONDS, operation='get_entry')
+    def get_entry(self, content_type, entry_id, locale=None, populate=None):
         """
         Fetch a specific entry
         
@@ -118,6 +247,8 @@ class StrapiService:
             content_type (str): Content type API ID
             entry_id (str): Document ID (for Strapi 5) or numeric ID (for Strapi 4)
             locale (str, optional): Locale to fetch. Defaults to source locale.
+            populate (str or dict, optional): Populate parameter, see iter_entries.
+                Defaults to '*'.
             
         Returns:
             dict: Entry data
@@ -128,44 +259,42 @@ class StrapiService:
             api_path = self._get_api_path(content_type)
             locale_param = locale or self.source_locale
             
-            # Include populate=* to get all relations and nested data
-            url = f"{self.base_url}/api/{api_path}/{entry_id}?locale={locale_param}&populate=*"
-            print(f"DEBUG: Fetching entry from URL: {url}")
-            print(f"DEBUG: Headers: {self.headers}")
-            print(f"DEBUG: Entry ID type: {type(entry_id)}")
+            # populate=* unless the caller asks for the nested data too
+            url = f"{self.base_url}/api/{api_path}/{entry_id}"
+            logger.debug("Fetching entry from %s", url, extra=SAMPLED)
             
-            response = requests.get(
+            response = self.session.get(
                 url,
-                headers=self.headers
+                headers=self.headers,
+                params=self._entries_params(locale_param, populate=populate)
             )
             
-            print(f"DEBUG: API Response status: {response.status_code}")
-            print(f"DEBUG: Response headers: {response.headers}")
-            
             if response.status_code == 200:
                 data = response.json()
-                print(f"DEBUG: API Response data structure: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
                 
                 # Handle both direct data and nested data structures
                 entry_data = data.get('data')
                 if entry_data:
-                    print(f"DEBUG: Successfully fetched entry with documentId: {entry_data.get('documentId', entry_id)}")
                     return entry_data
                 else:
-                    print("ERROR: Response data.data field is empty or null")
+                    logger.error("Entry %s came back without data", entry_id)
                     return None
             elif response.status_code == 404:
-                print(f"ERROR: Entry not found. This could mean the documentId {entry_id} doesn't exist or locale {locale_param} is not available for this entry.")
-                print(f"ERROR: Response text: {response.text}")
+                logger.error(
+                    "Entry not found. This could mean the documentId %s doesn't exist "
+                    "or locale %s is not available for this entry.", entry_id, locale_param
+                )
             else:
-                print(f"ERROR: Failed to fetch entry. Status code: {response.status_code}")
-                print(f"ERROR: Response text: {response.text}")
+                logger.error(
+                    "Failed to fetch entry %s: %s %.500s", entry_id, response.status_code, response.text
+                )
             return None
         except Exception as e:
-            print(f"ERROR in get_entry: {str(e)}")
+            logger.error("Error fetching entry %s: %s", entry_id, e)
             return None
     
-    def create_update_translation(self, content_type, entry_id, target_locale, translated_data):
+    @timed(STRAPI_REQUEST_SECONDS, operation='write')
+    def create_update_translation(self, content_type, entry_id, target_locale, translated_data, session=None):
         """
         Create or update a translation for an entry
         
@@ -174,6 +303,8 @@ class StrapiService:
             entry_id (str): Document ID
             target_locale (str): Target locale code
             translated_data (dict): Translated fields
+            session (requests.Session, optional): Session to send the PUT
+                with instead of the client's own, e.g. one without retries
             
         Returns:
             dict: Updated entry or None if there was an error
@@ -187,11 +318,10 @@ class StrapiService:
             }
             
             url = f"{self.base_url}/api/{api_path}/{entry_id}?locale={target_locale}"
-            print(f"DEBUG: Updating translation at URL: {url}")
-            print(f"DEBUG: Payload: {payload}")
+            logger.debug("Updating translation at %s (%d fields)", url, len(translated_data), extra=SAMPLED)
             
             # Use PUT to update or create a localization
-            response = requests.put(
+            response = (session or self.session).put(
                 url,
                 headers=self.headers,
                 json=payload
@@ -201,10 +331,13 @@ class StrapiService:
                 data = response.json()
                 return data.get('data')
             else:
-                print(f"Error updating translation: {response.status_code}, {response.text}")
+                logger.error(
+                    "Error updating translation of %s (%s): %s %.500s",
+                    entry_id, target_locale, response.status_code, response.text
+                )
                 return None
         except Exception as e:
-            print(f"Error creating/updating translation: {e}")
+            logger.error("Error creating/updating translation of %s (%s): %s", entry_id, target_locale, e)
             return None
     
     def _get_api_path(self, content_type):
@@ -217,7 +350,6 @@ class StrapiService:
         Returns:
             str: API path (e.g., 'articles')
         """
-        print(f"DEBUG: Converting content type '{content_type}' to API path")
         try:
             # Split on :: and . to get the middle component
             # For example: 'api::page.page' -> ['api', 'page', 'page']
@@ -225,12 +357,11 @@ class StrapiService:
             if len(parts) > 0:
                 # Use the plural form from Strapi's convention
                 api_path = parts[0] + 's'
-                print(f"DEBUG: Converted to API path: '{api_path}'")
                 return api_path
         except Exception as e:
-            print(f"ERROR: Failed to parse content type: {e}")
+            logger.warning("Failed to parse content type %s: %s", content_type, e)
         
         # Fallback: remove 'api::' prefix and use the rest
         fallback = content_type.replace('api::', '').split('.')[0] + 's'
-        print(f"DEBUG: Using fallback API path: '{fallback}'")
+        logger.debug("Using fallback API path '%s' for %s", fallback, content_type)
         return fallback
\ No newline at end of file
@@ -0,0 +1,176 @@
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from services.http_client import get_session
+from services.metrics import STRAPI_WRITE_QUEUE_DEPTH, STRAPI_WRITE_RETRIES, STRAPI_WRITES_COALESCED
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class StrapiWriter:
+    """
+    Write translated entries back to Strapi on a dedicated pool of threads
+
+    Translators hand over a finished (entry, locale) payload and go on
+    generating while the write happens. The writer has its own concurrency
+    and an optional rate limit, so Strapi sees a steady load however many
+    jobs run. While a write is still queued, later payloads for the same
+    entry and locale are merged into it and sent as one PUT. A failed write
+    is retried with backoff using the payload it already has, so nothing is
+    translated twice; callers get None only after the last attempt. Writes
+    go out on a session without HTTP-level retries, so a failing write
+    costs Strapi at most STRAPI_WRITE_RETRIES + 1 requests.
+    """
+
+    def __init__(self, workers=None, rate=None, max_retries=None, backoff=None, max_pending=None, session=None):
+        # The writer's own retries are the only ones; the session's would multiply them
+        self.session = session or get_session(
+            'strapi-writes', Config.STRAPI_CONNECT_TIMEOUT, Config.STRAPI_READ_TIMEOUT, max_retries=0
+        )
+        self.workers = workers or Config.STRAPI_WRITE_WORKERS
+        self.rate = rate if rate is not None else Config.STRAPI_WRITE_RATE
+        self.max_retries = max_retries if max_retries is not None else Config.STRAPI_WRITE_RETRIES
+        self.backoff = backoff if backoff is not None else Config.STRAPI_WRITE_BACKOFF
+        self.max_pending = max_pending or Config.STRAPI_WRITE_QUEUE_SIZE
+        # Heap of (ready_at, sequence, write); retries wait in it until their backoff ends
+        self.queue = []
+        # Writes waiting in the queue by (base URL, content type, entry, locale)
+        self.queued = {}
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.threads = []
+        self.rate_lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def submit(self, strapi_service, content_type, entry_id, target_locale, payload):
+        """
+        Queue a translation write, merging it into a queued write for the same locale
+
+        Blocks while STRAPI_WRITE_QUEUE_SIZE writes are already waiting.
+
+        Args:
+            strapi_service (StrapiService): Client to write with
+            content_type (str): Content type API ID
+            entry_id (str): Document ID
+            target_locale (str): Target locale code
+            payload (dict): Field name -> translated value
+
+        Returns:
+            concurrent.futures.Future: Resolves to the updated entry, or None
+                if every attempt failed
+        """
+        key = (strapi_service.base_url, content_type, str(entry_id), target_locale)
+        with self.condition:
+            self._start_workers()
+            self.condition.wait_for(lambda: key in self.queued or len(self.queue) < self.max_pending)
+            write = self.queued.get(key)
+            if write is not None:
+                write['payload'].update(payload)
+                STRAPI_WRITES_COALESCED.inc()
+                return write['future']
+
+            write = {
+                'key': key,
+                'strapi_service': strapi_service,
+                'payload': dict(payload),
+                'future': Future(),
+                'attempt': 0,
+                # Log records from the write carry the submitting job's ID
+                'context': contextvars.copy_context()
+            }
+            self._push(write, time.monotonic())
+            return write['future']
+
+    def _push(self, write, ready_at):
+        """Queue a write to be sent at ready_at (caller holds the condition)"""
+        heapq.heappush(self.queue, (ready_at, next(self.sequence), write))
+        self.queued[write['key']] = write
+        STRAPI_WRITE_QUEUE_DEPTH.set(len(self.queue))
+        self.condition.notify_all()
+
+    def _start_workers(self):
+        """Start the writer threads on first use (caller holds the condition)"""
+        if self.threads:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"strapi-writer-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _next_write(self):
+        """Wait for the earliest write whose backoff has ended and take it off the queue"""
+        with self.condition:
+            while True:
+                if self.queue:
+                    delay = self.queue[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self.condition.wait(delay)
+                else:
+                    self.condition.wait()
+            _, _, write = heapq.heappop(self.queue)
+            del self.queued[write['key']]
+            STRAPI_WRITE_QUEUE_DEPTH.set(len(self.queue))
+            # Wake submitters waiting for room
+            self.condition.notify_all()
+            return write
+
+    def _wait_for_rate_slot(self):
+        """Space writes out to at most STRAPI_WRITE_RATE per second"""
+        if not self.rate:
+            return
+        with self.rate_lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + 1 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _work(self):
+        """Writer thread: send queued writes one at a time"""
+        while True:
+            write = self._next_write()
+            self._wait_for_rate_slot()
+            write['context'].run(self._send, write)
+
+    def _send(self, write):
+        """Send one write, requeueing it with backoff if it fails"""
+        _, content_type, entry_id, target_locale = write['key']
+        try:
+            result = write['strapi_service'].create_update_translation(
+                content_type, entry_id, target_locale, write['payload'], session=self.session
+            )
+        except Exception as e:
+            logger.error("Error writing %s (%s): %s", entry_id, target_locale, e)
+            result = None
+        if result is None and write['attempt'] < self.max_retries:
+            self._retry(write)
+        else:
+            write['future'].set_result(result)
+
+    def _retry(self, write):
+        """Requeue a failed write after its backoff, or fold it into a newer queued write"""
+        write['attempt'] += 1
+        STRAPI_WRITE_RETRIES.inc()
+        delay = self.backoff * 2 ** (write['attempt'] - 1)
+        _, _, entry_id, target_locale = write['key']
+        logger.warning(
+            "Write of %s (%s) failed, retrying in %.2fs (attempt %d of %d)",
+            entry_id, target_locale, delay, write['attempt'], self.max_retries
+        )
+        with self.condition:
+            newer = self.queued.get(write['key'])
+            if newer is None:
+                self._push(write, time.monotonic() + delay)
+                return
+            # A newer payload for the same locale is queued; send both together
+            newer['payload'] = dict(write['payload'], **newer['payload'])
+            STRAPI_WRITES_COALESCED.inc()
+        newer['future'].add_done_callback(lambda future: write['future'].set_result(future.result()))
+
+# Shared by all translators so the write concurrency and rate limit hold across jobs
+strapi_writer = StrapiWriter()
@@ -0,0 +1,80 @@
+import re
+
+# Boundaries to split long text on, widest first
+PARAGRAPH_BREAK = re.compile(r'(\n[ \t]*\n\s*)')
+LINE_BREAK = re.compile(r'(\n\s*)')
+# Whitespace after a sentence end, or nothing after a CJK full stop
+SENTENCE_BREAK = re.compile(r'(?:(?<=[.!?])(\s+)|(?<=[。！？])())')
+WORD_BREAK = re.compile(r'(\s+)')
+BOUNDARIES = (PARAGRAPH_BREAK, LINE_BREAK, SENTENCE_BREAK, WORD_BREAK)
+
+def estimate_tokens(text):
+    """
+    Rough token count of a text without loading the model's tokenizer
+
+    Latin-script text averages about four characters per token; other
+    scripts are counted at one token per character, which errs on the
+    side of smaller chunks.
+    """
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return ascii_chars // 4 + (len(text) - ascii_chars)
+
+def split_text(text, max_tokens):
+    """
+    Split text into chunks of at most max_tokens on the widest boundary that fits
+
+    Paragraphs are kept together where possible, then lines, sentences and
+    words; a single word longer than the budget is cut.
+
+    Args:
+        text (str): Text to split
+        max_tokens (int): Estimated tokens allowed per chunk
+
+    Returns:
+        list: (chunk, separator) pairs; joining each chunk and the separator
+            after it gives back the original text
+    """
+    return _split(text, max(max_tokens, 1), BOUNDARIES)
+
+def context_tail(text, max_tokens):
+    """The last sentences of a chunk, within max_tokens, to carry over as context for the next"""
+    text = text.strip()
+    for boundary in (SENTENCE_BREAK, WORD_BREAK):
+        # The earliest sentence (or word) start whose tail fits is the longest tail
+        for start in [0] + [match.end() for match in boundary.finditer(text)]:
+            if estimate_tokens(text[start:]) <= max_tokens:
+                return text[start:]
+    return ''
+
+def _split(text, max_tokens, boundaries):
+    """Split on the first boundary, packing parts greedily and recursing into parts that don't fit"""
+    if estimate_tokens(text) <= max_tokens:
+        return [(text, '')]
+    if not boundaries:
+        return [(text[start:start + max_tokens], '') for start in range(0, len(text), max_tokens)]
+
+    parts = boundaries[0].split(text)
+    # A pattern with two groups yields both; the one that didn't match is None
+    step = boundaries[0].groups + 1
+    texts = parts[::step]
+    separators = [
+        ''.join(group or '' for group in parts[index:index + step - 1])
+        for index in range(1, len(parts), step)
+    ] + ['']
+
+    chunks = []
+    current, separator = None, ''
+    for part, next_separator in zip(texts, separators):
+        if current is not None and estimate_tokens(current + separator + part) <= max_tokens:
+            current += separator + part
+        else:
+            if current is not None:
+                chunks.append((current, separator))
+            if estimate_tokens(part) > max_tokens:
+                *pieces, (current, _) = _split(part, max_tokens, boundaries[1:])
+                chunks.extend(pieces)
+            else:
+                current = part
+        separator = next_separator
+    chunks.append((current, separator))
+    return chunks
@@ -0,0 +1,275 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class TranslationMemory:
+    """
+    Persistent cache of translations keyed on the normalized source text,
+    locale pair, model and prompt version, with LRU and TTL eviction
+    """
+
+    # Share of max_entries evicted at once, so the least recently used scan runs rarely
+    EVICT_FRACTION = 0.01
+    # Hits refresh last_used_at together, once this many are pending or this many seconds passed
+    TOUCH_BATCH = 100
+    TOUCH_INTERVAL = 5.0
+
+    def __init__(self, path=None, max_entries=None, ttl=None):
+        self.path = path or Config.TRANSLATION_MEMORY_PATH
+        self.max_entries = max_entries if max_entries is not None else Config.TRANSLATION_MEMORY_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else Config.TRANSLATION_MEMORY_TTL
+        self.lock = threading.Lock()
+        self.connection = None
+        # Rows in the table as last counted, plus this process's changes since; other
+        # processes sharing the file change it too, so it is re-read before evicting
+        self.count = 0
+        self.puts_since_count = 0
+        # Key -> time of its latest hit, not yet written to last_used_at
+        self.touches = {}
+        self.touched_at = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        """Open the database on first use (caller holds the lock)"""
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS translations (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    source_locale TEXT NOT NULL,
+                    target_locale TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )"""
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_translations_model ON translations (model, target_locale)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used_at)"
+            )
+            self.connection.commit()
+            self._recount(self.connection)
+        return self.connection
+
+    @staticmethod
+    def normalize(text):
+        """Normalize source text so trivially different copies share an entry"""
+        text = unicodedata.normalize('NFC', text).strip()
+        return re.sub(r'[ \t]+', ' ', text)
+
+    @staticmethod
+    def make_key(source_text, source_locale, target_locale, model_name, prompt_version):
+        """Hash the normalized text, locale pair, model and prompt version"""
+        parts = [
+            TranslationMemory.normalize(source_text),
+            source_locale,
+            target_locale,
+            model_name,
+            str(prompt_version)
+        ]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached translation
+
+        Args:
+            key (str): Key built by make_key()
+
+        Returns:
+            str: Cached translation or None on a miss
+        """
+        now = time.time()
+        try:
+            with self.lock:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT translation, created_at FROM translations WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if row and self.ttl and row[1] + self.ttl < now:
+                    self.count -= connection.execute("DELETE FROM translations WHERE key = ?", (key,)).rowcount
+                    connection.commit()
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                self.touches[key] = now
+                if len(self.touches) >= self.TOUCH_BATCH or time.monotonic() - self.touched_at >= self.TOUCH_INTERVAL:
+                    self._flush_touches(connection)
+                    connection.commit()
+                self.hits += 1
+                return row[0]
+        except sqlite3.Error as e:
+            logger.error("Error reading translation memory: %s", e)
+            return None
+
+    def cached_keys(self, keys):
+        """
+        Check which keys have a cached translation, without counting hits or refreshing them
+
+        Args:
+            keys (iterable): Keys built by make_key()
+
+        Returns:
+            set: The keys a lookup would hit
+        """
+        keys = list(keys)
+        found = set()
+        now = time.time()
+        try:
+            with self.lock:
+                connection = self._connect()
+                # Stay well under SQLite's limit on bound parameters
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    rows = connection.execute(
+                        f"SELECT key, created_at FROM translations WHERE key IN ({','.join('?' * len(batch))})",
+                        batch
+                    ).fetchall()
+                    found.update(key for key, created_at in rows if not self.ttl or created_at + self.ttl >= now)
+        except sqlite3.Error as e:
+            logger.error("Error reading translation memory: %s", e)
+        return found
+
+    def put(self, key, model_name, source_locale, target_locale, translation):
+        """
+        Store a translation, evicting the least recently used entries once over the limit
+
+        Eviction removes EVICT_FRACTION of max_entries beyond the excess, so
+        it runs once per that many new entries rather than on every put. The
+        row count is re-read from the table before evicting, and after that
+        many puts, so inserts by other processes are counted too.
+        """
+        now = time.time()
+        values = (model_name, source_locale, target_locale, translation, now, now, key)
+        try:
+            with self.lock:
+                connection = self._connect()
+                self.touches.pop(key, None)
+                updated = connection.execute(
+                    """UPDATE translations SET model = ?, source_locale = ?, target_locale = ?,
+                    translation = ?, created_at = ?, last_used_at = ? WHERE key = ?""",
+                    values
+                ).rowcount
+                if not updated:
+                    connection.execute(
+                        """INSERT INTO translations
+                        (model, source_locale, target_locale, translation, created_at, last_used_at, key)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                        values
+                    )
+                    self.count += 1
+                self.puts_since_count += 1
+                if self.max_entries and (
+                    self.count > self.max_entries or self.puts_since_count >= self._evict_batch()
+                ):
+                    self._recount(connection)
+                    if self.count > self.max_entries:
+                        self._evict(connection)
+                connection.commit()
+        except sqlite3.Error as e:
+            logger.error("Error writing translation memory: %s", e)
+
+    def _flush_touches(self, connection):
+        """Write the pending last_used_at refreshes (caller holds the lock and commits)"""
+        if self.touches:
+            connection.executemany(
+                "UPDATE translations SET last_used_at = ? WHERE key = ?",
+                [(used_at, key) for key, used_at in self.touches.items()]
+            )
+            self.touches.clear()
+        self.touched_at = time.monotonic()
+
+    def _recount(self, connection):
+        """Re-read the number of rows in the table (caller holds the lock)"""
+        self.count = connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        self.puts_since_count = 0
+
+    def _evict_batch(self):
+        """Entries evicted beyond the excess at once"""
+        return max(int(self.max_entries * self.EVICT_FRACTION), 1)
+
+    def _evict(self, connection):
+        """Drop the least recently used entries over the limit, and a batch more (caller holds the lock)"""
+        # Recent hits must count, or just-used entries could be evicted
+        self._flush_touches(connection)
+        excess = self.count - self.max_entries + self._evict_batch()
+        removed = connection.execute(
+            """DELETE FROM translations WHERE key IN (
+                SELECT key FROM translations ORDER BY last_used_at LIMIT ?
+            )""",
+            (excess,)
+        ).rowcount
+        self.count -= removed
+        logger.debug("Evicted %d least recently used translations", removed)
+
+    def invalidate_model(self, model_name, target_locale=None):
+        """
+        Drop cached translations produced by a model
+
+        Args:
+            model_name (str): Model whose entries should be removed
+            target_locale (str, optional): Only remove entries for this locale
+
+        Returns:
+            int: Number of entries removed
+        """
+        try:
+            with self.lock:
+                connection = self._connect()
+                if target_locale:
+                    cursor = connection.execute(
+                        "DELETE FROM translations WHERE model = ? AND target_locale = ?",
+                        (model_name, target_locale)
+                    )
+                else:
+                    cursor = connection.execute(
+                        "DELETE FROM translations WHERE model = ?",
+                        (model_name,)
+                    )
+                connection.commit()
+                self.count -= cursor.rowcount
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.error("Error invalidating translation memory: %s", e)
+            return 0
+
+    def get_stats(self):
+        """Get hit/miss counters and the number of stored entries"""
+        try:
+            with self.lock:
+                self._connect()
+                entries = self.count
+        except sqlite3.Error:
+            entries = None
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': entries
+        }
+
+    def collect_metrics(self):
+        """Report the hit and miss counters to the metrics registry"""
+        return [(
+            'translation_memory_lookups_total', 'counter',
+            'Translation memory lookups by result',
+            [({'result': 'hit'}, self.hits), ({'result': 'miss'}, self.misses)]
+        )]
+
+# Shared by all translator instances so every job reads and fills the same memory
+translation_memory = TranslationMemory()
@@ -1,38 +1,127 @@
 from services.strapi_service import StrapiService
 from services.ollama_service import OllamaService
+from services.concurrency import ollama_limiter
+from services.translation_memory import translation_memory
+from services.fingerprint_store import fingerprint_store
+from services.job_events import JobEvents
+from services.content_extractor import ContentExtractor
+from services.field_index import field_index
+from services.strapi_writer import strapi_writer
+from services.metrics import TRANSLATION_UNITS, TRANSLATION_UNITS_IN_FLIGHT
+from services.logging_config import SAMPLED, in_current_context
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
+import functools
+import json
 import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
 
 class TranslatorService:
-    def __init__(self):
+    def __init__(self, concurrency=None, limiter=None, job_store=None, job_id=None, skip_units=None):
+        self.cancel_event = threading.Event()
         self.strapi_service = StrapiService()
-        self.ollama_service = OllamaService()
+        self.ollama_service = OllamaService(cancel_event=self.cancel_event, limiter=limiter)
         self.model_mappings = Config.get_model_mappings()
+        # Locales derived from another target locale of the current job; see _set_pivots
+        self.derived_locales = Config.get_derived_locales()
+        self.pivots = {}
+        self.pivot_depths = {}
+        # (entry_id, locale) -> translated segments, kept for the locales derived from it
+        self.pivot_texts = {}
+        self.concurrency = concurrency or Config.TRANSLATION_CONCURRENCY
+        self.limiter = limiter or ollama_limiter
+        # Writes go through the shared writer; their outcomes are recorded on this thread
+        self.writer = strapi_writer
+        self.pending_writes = []
+        self.batch_fields = Config.OLLAMA_BATCH_FIELDS
+        self.extractor = ContentExtractor()
+        self.field_index = field_index
+        self.translation_memory = translation_memory if Config.TRANSLATION_MEMORY_ENABLED else None
+        self.fingerprint_store = fingerprint_store
+        self.pipeline = Config.TRANSLATION_PIPELINE
+        self.schedule_window = Config.SCHEDULE_WINDOW
+        self.preload_next_model = Config.OLLAMA_PRELOAD_NEXT_MODEL
+        # Durable per-unit state; units in skip_units were done by an earlier run
+        self.job_store = job_store
+        self.job_id = job_id
+        self.skip_units = skip_units or set()
+        # Units planned for translation whose outcome is not recorded yet
+        self.active_units = set()
+        self.units_lock = threading.Lock()
+        # Progress events for live listeners; job_status keeps only recent errors
+        self.events = JobEvents()
+        self.error_buffer = Config.JOB_ERROR_BUFFER
         self.job_status = {
             'current_job': None,
             'completed': 0,
             'total': 0,
             'errors': [],
+            'error_count': 0,
             'current_entry': None,
             'current_locale': None,
-            'status': 'idle'  # idle, running, completed, error
+            'status': 'idle'  # idle, queued, running, completed, cancelled, error
         }
     
     def get_job_status(self):
         """Get current job status"""
         return self.job_status
     
-    def is_text_field(self, field_name, field_value):
-        """Check if a field is a text field that should be translated"""
-        # Skip specific fields that shouldn't be translated
-        skip_fields = ['id', 'documentId', 'locale', 'createdAt', 'updatedAt', 'publishedAt']
-        if field_name in skip_fields:
-            return False
-            
-        # Check if it's a string/text field
-        return isinstance(field_value, str) and field_value.strip() != ''
+    def cancel(self):
+        """Stop the running job, including generations that are in flight"""
+        self.cancel_event.set()
+    
+    def is_cancelled(self):
+        """Check whether the job was cancelled"""
+        return self.cancel_event.is_set()
+    
+    def _add_error(self, message):
+        """Record an error, keeping only the most recent ones in the job status"""
+        errors = self.job_status['errors']
+        errors.append(message)
+        if len(errors) > self.error_buffer:
+            del errors[:len(errors) - self.error_buffer]
+        self.job_status['error_count'] += 1
+        self.events.publish('error', {'message': message})
+    
+    def _mark_unit(self, entry_id, target_locale, status, error=None):
+        """Announce the state of one (entry, locale) unit and persist it when the job is stored"""
+        logger.debug("Unit %s/%s %s", entry_id, target_locale, status, extra=SAMPLED)
+        self.events.publish('unit', {'entry_id': entry_id, 'locale': target_locale, 'status': status})
+        if self.job_store is not None and self.job_id is not None:
+            self.job_store.record_unit(self.job_id, entry_id, target_locale, status, error)
+        TRANSLATION_UNITS.inc(locale=target_locale, status=status)
+        with self.units_lock:
+            active = (entry_id, target_locale) in self.active_units
+            self.active_units.discard((entry_id, target_locale))
+        if active:
+            TRANSLATION_UNITS_IN_FLIGHT.dec()
     
-    def translate_entry(self, content_type, entry_id, target_locales):
+    def _start_units(self, entry_id, target_locales):
+        """Count units as in flight until _mark_unit records their outcome"""
+        with self.units_lock:
+            self.active_units.update((entry_id, target_locale) for target_locale in target_locales)
+        TRANSLATION_UNITS_IN_FLIGHT.inc(len(target_locales))
+    
+    def _abandon_units(self):
+        """Stop counting units that never finished, e.g. after cancellation"""
+        with self.units_lock:
+            abandoned = len(self.active_units)
+            self.active_units.clear()
+        TRANSLATION_UNITS_IN_FLIGHT.dec(abandoned)
+    
+    def _pending_locales(self, entry_id, target_locales):
+        """Drop locales an earlier run of the job already finished, counting them as completed"""
+        pending = [
+            target_locale for target_locale in target_locales
+            if (entry_id, target_locale) not in self.skip_units
+        ]
+        self.job_status['completed'] += len(target_locales) - len(pending)
+        return pending
+    
+    def translate_entry(self, content_type, entry_id, target_locales, incremental=False, source_entry=None):
         """
         Translate a specific entry to multiple locales
         
@@ -40,6 +129,10 @@ class TranslatorService:
             content_type (str): Content type API ID
             entry_id (str): Document ID for the entry
             target_locales (list): List of target locale codes
+            incremental (bool): Only translate fields whose source changed
+                since they were last written for a locale
+            source_entry (dict, optional): Source-locale entry payload that was
+                already fetched; it is fetched from Strapi when omitted
             
         Returns:
             dict: Results of the translation job
@@ -53,127 +146,561 @@ class TranslatorService:
             'completed': 0,
             'total': len(target_locales),
             'errors': [],
+            'error_count': 0,
             'current_entry': entry_id,
             'current_locale': None,
             'status': 'running'
         }
         
-        print(f"DEBUG: Attempting to fetch source entry: {content_type}/{entry_id} with locale {self.strapi_service.source_locale}")
-        
-        # Get source entry
-        source_entry = self.strapi_service.get_entry(
-            content_type, 
-            entry_id, 
-            self.strapi_service.source_locale
+        self._set_pivots(target_locales)
+        results = self._translate_entry(
+            content_type, entry_id, target_locales, incremental, source_entry
         )
+        self._drain_writes(wait=True)
+        self.pivot_texts.clear()
         
-        print(f"DEBUG: Source entry fetch result type: {type(source_entry)}")
-        print(f"DEBUG: Source entry fetch result: {source_entry}")
+        # Set job status to completed
+        if self.is_cancelled():
+            self.job_status['status'] = 'cancelled'
+        else:
+            self.job_status['status'] = 'error' if 'error' in results else 'completed'
+        return results
+    
+    def _translate_entry(self, content_type, entry_id, target_locales, incremental=False, source_entry=None,
+                         results=None):
+        """
+        Translate one entry without resetting the job status, so that
+        batch_translate can report progress across all of its entries
         
-        if not source_entry:
-            error_msg = f"Failed to fetch source entry: {content_type}/{entry_id}"
-            print(f"ERROR: {error_msg}")
-            self.job_status['status'] = 'error'
-            self.job_status['errors'].append(error_msg)
-            return {
+        Writes are only queued here; results (a new dict unless given) gets
+        their outcomes once _drain_writes records them.
+        """
+        if results is None:
+            results = {
                 'entry_id': entry_id,
-                'error': error_msg,
                 'translations': {}
             }
         
-        results = {
-            'entry_id': entry_id,
-            'translations': {}
-        }
+        target_locales = self._pending_locales(entry_id, target_locales)
+        if not target_locales:
+            return results
         
-        # Get translatable fields (text/string fields)
-        # In Strapi 5, fields are directly on the entry object
-        translatable_fields = {
-            key: value for key, value in source_entry.items()
-            if self.is_text_field(key, value)
-        }
+        # Get source entry, unless the caller already has it
+        if source_entry is None:
+            source_entry = self.strapi_service.get_entry(
+                content_type, 
+                entry_id, 
+                self.strapi_service.source_locale,
+                self.field_index.get_populate(content_type)
+            )
         
-        print(f"DEBUG: Found translatable fields: {list(translatable_fields.keys())}")
+        if not source_entry:
+            return self._fail_entry(content_type, entry_id, target_locales, results)
         
-        if not translatable_fields:
-            warning_msg = f"No translatable fields found in entry {entry_id}"
-            print(f"WARNING: {warning_msg}")
-            self.job_status['errors'].append(warning_msg)
+        locale_models, locale_fields, extraction = self._plan_entry(
+            content_type, entry_id, source_entry, target_locales, incremental, results
+        )
+        
+        source_updated_at = source_entry.get('updatedAt')
+        if self.concurrency > 1 and locale_models:
+            # Fan out every field/locale pair; the limiter caps Ollama load
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                pending = {
+                    target_locale: [
+                        executor.submit(
+                            in_current_context(self._translate_fields), model_name, fields, target_locale
+                        )
+                        for fields in self._field_groups(locale_fields[target_locale])
+                    ]
+                    for target_locale, model_name in locale_models.items()
+                    # Derived locales wait for their parent, in _write_locales
+                    if target_locale not in self.pivots
+                }
+                self._write_locales(
+                    content_type, entry_id, extraction, locale_models, locale_fields, results,
+                    source_updated_at, pending
+                )
+        else:
+            self._write_locales(
+                content_type, entry_id, extraction, locale_models, locale_fields, results,
+                source_updated_at
+            )
         
-        # Translate to each target locale
+        return results
+    
+    def _fail_entry(self, content_type, entry_id, target_locales, results):
+        """Fail every locale of an entry whose source couldn't be fetched"""
+        error_msg = f"Failed to fetch source entry: {content_type}/{entry_id}"
+        logger.error(error_msg)
+        self._add_error(error_msg)
+        # Count the skipped locales so progress still reaches the total
+        self.job_status['completed'] += len(target_locales)
         for target_locale in target_locales:
-            self.job_status['current_locale'] = target_locale
-            
+            self._mark_unit(entry_id, target_locale, 'failed', error_msg)
+        results['error'] = error_msg
+        return results
+    
+    def _plan_entry(self, content_type, entry_id, source_entry, target_locales, incremental, results):
+        """
+        Work out which text segments of an entry each target locale needs
+        
+        Locales that are skipped (source locale, no model, nothing changed)
+        are counted as completed here.
+        
+        Returns:
+            tuple: (locale_models, locale_fields, extraction) mapping each
+                locale that needs work to its model and to its segment ID ->
+                source text, plus the extraction used to rebuild the fields
+        """
+        extraction, locale_models, locale_fields, skipped = self._resolve_entry(
+            content_type, entry_id, source_entry, target_locales, incremental
+        )
+        
+        if extraction is not None:
+            logger.debug(
+                "Entry %s has %d translatable fields (%d segments)",
+                entry_id, len(extraction.leaves), len(extraction.segments), extra=SAMPLED
+            )
+            if not extraction.segments:
+                warning_msg = f"No translatable fields found in entry {entry_id}"
+                logger.warning(warning_msg)
+                self._add_error(warning_msg)
+        
+        for target_locale, reason in skipped.items():
+            self.job_status['completed'] += 1
+            if reason == 'no_model':
+                error_msg = f"No model configured for locale: {target_locale}"
+                self._add_error(error_msg)
+                self._mark_unit(entry_id, target_locale, 'failed', error_msg)
+                continue
+            if reason == 'unchanged':
+                # Every field matched its fingerprint, so the next run can skip on updatedAt alone
+                self.fingerprint_store.record(content_type, entry_id, target_locale, {}, self._source_key(
+                    content_type, source_entry.get('updatedAt'), self._locale_model(target_locale)
+                ))
+            if reason in ('unchanged', 'not_updated'):
+                results['translations'][target_locale] = 'unchanged'
+            self._mark_unit(entry_id, target_locale, 'skipped')
+        
+        self._start_units(entry_id, locale_models)
+        return locale_models, locale_fields, extraction
+    
+    def _resolve_entry(self, content_type, entry_id, source_entry, target_locales, incremental):
+        """
+        Work out what each target locale of an entry needs, without recording anything
+        
+        Returns:
+            tuple: (extraction, locale_models, locale_fields, skipped) with the
+                entry's segments, the model and segment ID -> source text of
+                each locale that needs work, and the reason every other locale
+                needs none: 'source', 'no_model', 'not_updated', 'unchanged'
+                or 'no_fields'. extraction is None when incremental locales
+                were all skipped on updatedAt before extracting the entry.
+        """
+        # Resolve the model for each target locale up front; parents come
+        # before the locales derived from them
+        locale_models, skipped = {}, {}
+        for target_locale in sorted(target_locales, key=lambda locale: self.pivot_depths.get(locale, 0)):
             # Skip source locale if it's in the target list
             if target_locale == self.strapi_service.source_locale:
+                skipped[target_locale] = 'source'
                 continue
-                
+            
             # Get model for this locale
-            model_name = self.model_mappings.get(target_locale)
+            model_name = self._locale_model(target_locale)
             if not model_name:
-                self.job_status['errors'].append(
-                    f"No model configured for locale: {target_locale}"
-                )
+                skipped[target_locale] = 'no_model'
                 continue
             
-            # Translate each field
-            translated_fields = {}
-            for field_name, field_value in translatable_fields.items():
-                translated_text = self.ollama_service.generate_translation(
-                    model_name,
-                    field_value,
-                    self.strapi_service.source_locale,
-                    target_locale
+            locale_models[target_locale] = model_name
+        
+        if incremental and locale_models:
+            # Locales last written in full from this same updatedAt need nothing,
+            # and if that is all of them the entry isn't extracted at all
+            source_keys = self.fingerprint_store.get_source_keys(content_type, entry_id)
+            for target_locale, model_name in list(locale_models.items()):
+                source_key = self._source_key(content_type, source_entry.get('updatedAt'), model_name)
+                if source_key and source_keys.get(target_locale) == source_key:
+                    del locale_models[target_locale]
+                    skipped[target_locale] = 'not_updated'
+            if not locale_models:
+                return None, {}, {}, skipped
+        
+        # Pull text out of the schema's translatable attributes (or, without a
+        # schema, any string, component, dynamic zone or blocks value);
+        # in Strapi 5, fields are directly on the entry object
+        extraction = self.extractor.extract(source_entry, self.field_index.get(content_type))
+        translatable_fields = extraction.segments
+        
+        # Work out which fields each locale needs
+        locale_fields = {}
+        for target_locale, model_name in list(locale_models.items()):
+            fields = translatable_fields
+            if incremental:
+                changed = self._changed_fields(
+                    content_type, entry_id, target_locale, model_name, translatable_fields
                 )
-                
-                if translated_text:
-                    translated_fields[field_name] = translated_text
-                else:
-                    self.job_status['errors'].append(
-                        f"Failed to translate field '{field_name}' to {target_locale}"
+                # Fields are rewritten whole, so resend all segments of a changed field
+                fields = extraction.segments_for_fields_of(changed)
+                if not fields:
+                    del locale_models[target_locale]
+                    skipped[target_locale] = 'unchanged'
+                    continue
+            locale_fields[target_locale] = fields
+        
+        if not translatable_fields:
+            # Nothing to send; the locales are done
+            skipped.update((target_locale, 'no_fields') for target_locale in locale_models)
+            return extraction, {}, {}, skipped
+        
+        return extraction, locale_models, locale_fields, skipped
+    
+    def _set_pivots(self, target_locales):
+        """
+        Work out which target locales are derived from another target locale
+        
+        A derived locale whose parent is not translated in the same job is
+        translated from the source like any other locale.
+        """
+        self.pivots, self.pivot_depths, self.pivot_texts = {}, {}, {}
+        targets = set(target_locales) - {self.strapi_service.source_locale}
+        for target_locale in target_locales:
+            depth, locale, seen = 0, target_locale, {target_locale}
+            while locale in self.derived_locales and self.derived_locales[locale]['from'] in targets:
+                locale = self.derived_locales[locale]['from']
+                if locale in seen:
+                    logger.warning("Derived locales form a cycle at %s, translating it from the source", target_locale)
+                    depth = 0
+                    break
+                seen.add(locale)
+                depth += 1
+            if depth:
+                self.pivots[target_locale] = self.derived_locales[target_locale]
+            self.pivot_depths[target_locale] = depth
+    
+    def _is_pivot(self, target_locale):
+        """Check whether another target locale of the job is derived from this one"""
+        return any(pivot['from'] == target_locale for pivot in self.pivots.values())
+    
+    def _locale_model(self, target_locale):
+        """Model that translates a locale; unmapped derived locales fall back to their parent's"""
+        locale, seen = target_locale, set()
+        while locale not in seen:
+            seen.add(locale)
+            model_name = self.model_mappings.get(locale)
+            derived = self.derived_locales.get(locale)
+            # Copies are fingerprinted with the model of the text they copy
+            copied = locale in self.pivots and derived['mode'] == 'copy'
+            if not derived or (model_name and not copied):
+                return model_name
+            locale = derived['from']
+        return None
+    
+    def _derive_fields(self, model_name, fields, target_locale, parent_fields):
+        """
+        Produce a derived locale's segments from its parent's translation
+        
+        Copy mode takes the parent's text as is; localize mode sends it
+        through a same-language localization pass. Either way the locale's
+        overrides are applied afterwards. Segments the parent has no
+        translation for are translated from the source.
+        
+        Args:
+            model_name (str): Model for the localization pass and the fallback
+            fields (dict): Segment ID -> source text the locale needs
+            target_locale (str): Derived locale code
+            parent_fields (dict): Segment ID -> the parent locale's translation
+        
+        Returns:
+            dict: Segment ID -> text for the segments that succeeded
+        """
+        pivot = self.pivots[target_locale]
+        parent_texts = {name: parent_fields[name] for name in fields if name in parent_fields}
+        if pivot['mode'] == 'copy':
+            derived = parent_texts
+        else:
+            derived = self._translate_fields(model_name, parent_texts, target_locale, pivot['from'])
+        derived = self._apply_overrides(derived, pivot['overrides'])
+        
+        rest = {name: value for name, value in fields.items() if name not in parent_texts}
+        if rest:
+            derived.update(self._translate_fields(model_name, rest, target_locale))
+        return derived
+    
+    @staticmethod
+    def _apply_overrides(translations, overrides):
+        """Replace text a derived locale words differently from its parent"""
+        if not overrides:
+            return dict(translations)
+        replaced = {}
+        for name, text in translations.items():
+            for old, new in overrides.items():
+                # Whole words only, so an override never rewrites part of a longer word
+                text = re.sub(rf'(?<!\w){re.escape(old)}(?!\w)', lambda match: new, text)
+            replaced[name] = text
+        return replaced
+    
+    def _fingerprints(self, model_name, fields):
+        """Fingerprint each field's source text for the model that translates it"""
+        return {
+            field_name: self.fingerprint_store.fingerprint(
+                value, model_name, self.ollama_service.PROMPT_VERSION
+            )
+            for field_name, value in fields.items()
+        }
+    
+    def _source_key(self, content_type, source_updated_at, model_name):
+        """Source key of an entry version for a locale's model, see FingerprintStore.source_key"""
+        schema = json.dumps(self.field_index.get(content_type), sort_keys=True)
+        return self.fingerprint_store.source_key(
+            source_updated_at, model_name, self.ollama_service.PROMPT_VERSION, schema
+        )
+    
+    def _changed_fields(self, content_type, entry_id, target_locale, model_name, translatable_fields):
+        """Get the fields whose source changed since they were last written for a locale"""
+        stored = self.fingerprint_store.get_fingerprints(content_type, entry_id, target_locale)
+        current = self._fingerprints(model_name, translatable_fields)
+        return {
+            field_name: value for field_name, value in translatable_fields.items()
+            if stored.get(field_name) != current[field_name]
+        }
+    
+    def _field_groups(self, translatable_fields):
+        """Split fields into units of work: one batch, or one unit per field"""
+        if self.batch_fields:
+            return [translatable_fields]
+        return [{field_name: value} for field_name, value in translatable_fields.items()]
+    
+    def _translate_fields(self, model_name, fields, target_locale, source_locale=None):
+        """
+        Translate a group of fields while holding a concurrency slot for the model
+        
+        Args:
+            source_locale (str, optional): Locale of the given text, when it is
+                a parent locale's translation rather than the source entry
+        
+        Returns:
+            dict: Field name -> translated text for the fields that succeeded
+        """
+        source_locale = source_locale or self.strapi_service.source_locale
+        if self.is_cancelled():
+            return {}
+        
+        # Serve what we can from the translation memory
+        translations, memory_keys = self._lookup_memory(model_name, fields, target_locale, source_locale)
+        fields = {name: value for name, value in fields.items() if name not in translations}
+        if not fields:
+            return translations
+        
+        with self.limiter.slot(model_name):
+            # The job may have been cancelled while waiting for a slot
+            if self.is_cancelled():
+                return translations
+            if self.batch_fields:
+                generated = self.ollama_service.generate_batch_translation(
+                    model_name, fields, source_locale, target_locale
+                )
+            else:
+                generated = {}
+                for field_name, field_value in fields.items():
+                    translated_text = self.ollama_service.generate_translation(
+                        model_name, field_value, source_locale, target_locale
                     )
+                    if translated_text:
+                        generated[field_name] = translated_text
+        
+        self._store_memory(model_name, target_locale, memory_keys, generated, source_locale)
+        translations.update(generated)
+        return translations
+    
+    def _lookup_memory(self, model_name, fields, target_locale, source_locale=None):
+        """
+        Look fields up in the translation memory
+        
+        Returns:
+            tuple: (cached, memory_keys) with the cached translations and the
+                memory key of every field that missed
+        """
+        cached, memory_keys = {}, {}
+        if not self.translation_memory:
+            return cached, memory_keys
+        
+        source_locale = source_locale or self.strapi_service.source_locale
+        for field_name, field_value in fields.items():
+            key = self.translation_memory.make_key(
+                field_value, source_locale, target_locale, model_name,
+                self.ollama_service.PROMPT_VERSION
+            )
+            translation = self.translation_memory.get(key)
+            if translation is not None:
+                cached[field_name] = translation
+            else:
+                memory_keys[field_name] = key
+        return cached, memory_keys
+    
+    def _store_memory(self, model_name, target_locale, memory_keys, generated, source_locale=None):
+        """Save freshly generated translations to the translation memory"""
+        if not self.translation_memory:
+            return
+        source_locale = source_locale or self.strapi_service.source_locale
+        for field_name, translated_text in generated.items():
+            self.translation_memory.put(
+                memory_keys[field_name], model_name, source_locale, target_locale, translated_text
+            )
+    
+    def _write_locales(self, content_type, entry_id, extraction, locale_models, locale_fields,
+                       results, source_updated_at=None, pending=None):
+        """
+        Gather the translated segments for each locale, rebuild the fields
+        and queue their write to Strapi
+        
+        Args:
+            content_type (str): Content type API ID
+            entry_id (str): Document ID for the entry
+            extraction (Extraction): Segments of the source entry
+            locale_models (dict): Target locale code -> model name
+            locale_fields (dict): Target locale code -> segment ID -> source text
+            results (dict): Entry results to fill in
+            source_updated_at (str, optional): updatedAt of the source entry,
+                recorded once a locale is written in full
+            pending (dict, optional): Locale -> futures from a concurrent fan-out,
+                each resolving to a dict of translated fields. Fields are
+                translated inline when omitted.
+        """
+        for target_locale, model_name in locale_models.items():
+            if self.is_cancelled():
+                return
+            self.job_status['current_locale'] = target_locale
+            translatable_fields = locale_fields[target_locale]
             
-            # Update Strapi with translated content
-            if translated_fields:
-                result = self.strapi_service.create_update_translation(
-                    content_type,
-                    entry_id,
-                    target_locale,
-                    translated_fields
+            # Translate the fields, or collect the fan-out results
+            translated_fields = {}
+            if target_locale in self.pivots:
+                parent_fields = self.pivot_texts.get((entry_id, self.pivots[target_locale]['from']), {})
+                translated_fields = self._derive_fields(
+                    model_name, translatable_fields, target_locale, parent_fields
                 )
-                
-                if result:
-                    results['translations'][target_locale] = 'success'
-                else:
-                    results['translations'][target_locale] = 'failed'
-                    self.job_status['errors'].append(
-                        f"Failed to update entry {entry_id} with {target_locale} translation"
+            elif pending:
+                for future in pending[target_locale]:
+                    translated_fields.update(future.result())
+            else:
+                for fields in self._field_groups(translatable_fields):
+                    translated_fields.update(
+                        self._translate_fields(model_name, fields, target_locale)
                     )
+            if self._is_pivot(target_locale):
+                # Kept until the entry's window is done; derived locales may come in a later pass
+                self.pivot_texts[(entry_id, target_locale)] = translated_fields
             
-            # Update completion counter
-            self.job_status['completed'] += 1
+            # Don't write partial results once the job is cancelled
+            if self.is_cancelled():
+                return
+            
+            self._report_missing_fields(target_locale, translatable_fields, translated_fields)
+            
+            # Update Strapi with translated content, once per locale, while
+            # the next locale is translated
+            payload, written = extraction.rebuild(translated_fields)
+            if payload:
+                future = self.writer.submit(
+                    self.strapi_service, content_type, entry_id, target_locale, payload
+                )
+                self.pending_writes.append((future, functools.partial(
+                    self._record_write, content_type, entry_id, target_locale, model_name,
+                    translatable_fields, {segment_id: translated_fields[segment_id] for segment_id in written}
+                ), results, source_updated_at))
+            else:
+                self._mark_unit(entry_id, target_locale, 'failed', "No fields were translated")
+                self.job_status['completed'] += 1
+    
+    def _drain_writes(self, wait=False):
+        """
+        Record the outcome of finished writes and count their units as completed
         
-        # Set job status to completed
-        self.job_status['status'] = 'completed'
-        return results
+        Args:
+            wait (bool): Block until every queued write has finished
+        """
+        pending_writes = []
+        for future, record, results, source_updated_at in self.pending_writes:
+            if wait or future.done():
+                record(future.result(), results, source_updated_at)
+                self.job_status['completed'] += 1
+            else:
+                pending_writes.append((future, record, results, source_updated_at))
+        self.pending_writes = pending_writes
+    
+    def _report_missing_fields(self, target_locale, translatable_fields, translated_fields):
+        """Record an error for every field that didn't get a translation"""
+        for field_name in translatable_fields:
+            if field_name not in translated_fields:
+                self._add_error(
+                    f"Failed to translate field '{field_name}' to {target_locale}"
+                )
+    
+    def _record_write(self, content_type, entry_id, target_locale, model_name, translatable_fields,
+                      translated_fields, result, results, source_updated_at=None):
+        """Record the outcome of writing a locale, fingerprinting what was written"""
+        if result:
+            results['translations'][target_locale] = 'success'
+            missing = [name for name in translatable_fields if name not in translated_fields]
+            self.fingerprint_store.record(
+                content_type, entry_id, target_locale,
+                self._fingerprints(model_name, {
+                    field_name: translatable_fields[field_name]
+                    for field_name in translated_fields
+                }),
+                # Only a locale with nothing missing is up to date with this updatedAt
+                None if missing else self._source_key(content_type, source_updated_at, model_name)
+            )
+            if missing:
+                # Keep the unit retryable; translated fields come back from memory
+                self._mark_unit(
+                    entry_id, target_locale, 'failed',
+                    f"Missing translations for: {', '.join(missing)}"
+                )
+            else:
+                self._mark_unit(entry_id, target_locale, 'completed')
+        else:
+            error_msg = f"Failed to update entry {entry_id} with {target_locale} translation"
+            results['translations'][target_locale] = 'failed'
+            self._add_error(error_msg)
+            self._mark_unit(entry_id, target_locale, 'failed', error_msg)
     
-    def batch_translate(self, content_type, entry_ids, target_locales):
+    def batch_translate(self, content_type, entry_ids, target_locales, incremental=False):
         """
         Batch translate multiple entries
         
         Args:
             content_type (str): Content type API ID
-            entry_ids (list): List of document IDs to translate
+            entry_ids (list): List of document IDs to translate. When empty,
+                every entry of the content type is streamed from Strapi page
+                by page and translated as it arrives.
             target_locales (list): List of target locale codes
+            incremental (bool): Skip entries and fields unchanged since their
+                last successful translation
             
         Returns:
             dict: Results of the batch job
         """
+        self._set_pivots(target_locales)
+        if self.pipeline == 'async':
+            # Imported here so aiohttp is only needed when the async pipeline is used
+            from services.async_translator import AsyncTranslatorService
+            return AsyncTranslatorService(self).batch_translate(
+                content_type, entry_ids, target_locales, incremental
+            )
+        
+        if entry_ids:
+            current_job = f"Batch translating {len(entry_ids)} entries of {content_type}"
+        else:
+            current_job = f"Batch translating all entries of {content_type}"
+        
         self.job_status = {
-            'current_job': f"Batch translating {len(entry_ids)} entries of {content_type}",
+            'current_job': current_job,
             'completed': 0,
             'total': len(entry_ids) * len(target_locales),
             'errors': [],
+            'error_count': 0,
             'current_entry': None,
             'current_locale': None,
             'status': 'running'
@@ -184,13 +711,147 @@ class TranslatorService:
             'entries': []
         }
         
-        # Ensure we're working with strings for documentId
-        entry_ids = [str(id) for id in entry_ids]
+        if entry_ids:
+            # Load the requested entries in bulk instead of one request each
+            source_entries = self.strapi_service.iter_entries_by_ids(
+                content_type, entry_ids, populate=self.field_index.get_populate(content_type)
+            )
+        else:
+            source_entries = self._stream_source_entries(content_type, len(target_locales))
         
-        for entry_id in entry_ids:
-            self.job_status['current_entry'] = entry_id
-            result = self.translate_entry(content_type, entry_id, target_locales)
-            batch_results['entries'].append(result)
+        # Run one model at a time over each window of entries, so Ollama
+        # loads each model once per window instead of switching per entry
+        groups = self._model_groups(target_locales)
+        windows = self._entry_windows(content_type, source_entries, target_locales, batch_results)
+        try:
+            for window, more_windows in self._with_lookahead(windows):
+                for group_index, (model_name, locales) in enumerate(groups):
+                    for position, (entry_id, source_entry, results) in enumerate(window):
+                        if self.is_cancelled():
+                            break
+                        if position == len(window) - 1:
+                            self._preload_next_model(groups, group_index, more_windows)
+                        self.job_status['current_entry'] = entry_id
+                        self._translate_entry(
+                            content_type, entry_id, locales, incremental, source_entry, results
+                        )
+                        self._drain_writes()
+                self.pivot_texts.clear()
+        finally:
+            # Writes already queued still land, even after cancellation
+            self._drain_writes(wait=True)
+            self._abandon_units()
+        
+        self.job_status['status'] = 'cancelled' if self.is_cancelled() else 'completed'
+        return batch_results
+    
+    def _model_groups(self, target_locales):
+        """
+        Group target locales by the model that translates them
+        
+        Locales that need no model (the source locale, unmapped locales) come
+        first, then models Ollama already has loaded, then the rest in
+        mapping order. Derived locales get groups of their own after the
+        locales they are derived from.
+        
+        Returns:
+            list: (model_name, locales) pairs; model_name is None for the
+                locales that need no model
+        """
+        groups = {}
+        for target_locale in target_locales:
+            model_name = None
+            if target_locale != self.strapi_service.source_locale:
+                model_name = self._locale_model(target_locale)
+            depth = self.pivot_depths.get(target_locale, 0)
+            groups.setdefault((depth, model_name), []).append(target_locale)
+        
+        loaded = []
+        if len({model_name for _, model_name in groups if model_name}) > 1:
+            loaded = self.ollama_service.get_loaded_models()
+        ordered = sorted(
+            groups.items(),
+            key=lambda group: (group[0][1] is not None, group[0][0], group[0][1] not in loaded)
+        )
+        return [(model_name, locales) for (_, model_name), locales in ordered]
+    
+    def _preload_next_model(self, groups, group_index, more_windows):
+        """
+        Load the model of the group after this one in the background, if enabled
+        
+        After the last group the next model is the first group's, but only if
+        another window follows; otherwise nothing runs next, and loading a
+        model could evict the one still in use on a single-GPU server.
+        """
+        if not self.preload_next_model or self.is_cancelled():
+            return
+        if group_index + 1 < len(groups):
+            next_model = groups[group_index + 1][0]
+        elif more_windows:
+            next_model = groups[0][0]
+        else:
+            return
+        model_name = groups[group_index][0]
+        if next_model and next_model != model_name:
+            threading.Thread(
+                target=in_current_context(self.ollama_service.preload_model), args=(next_model,), daemon=True
+            ).start()
+    
+    @staticmethod
+    def _with_lookahead(windows):
+        """Pair each window with whether another follows, reading one window ahead"""
+        previous = None
+        for window in windows:
+            if previous is not None:
+                yield previous, True
+            previous = window
+        if previous is not None:
+            yield previous, False
+    
+    def _entry_windows(self, content_type, source_entries, target_locales, batch_results):
+        """
+        Collect source entries into scheduling windows
+        
+        Entries missing from a bulk response are fetched here, once, and
+        entries that can't be fetched fail for every locale.
+        
+        Yields:
+            list: Up to SCHEDULE_WINDOW (entry_id, source_entry, results) tuples
+        """
+        window = []
+        for entry_id, source_entry in source_entries:
+            if self.is_cancelled():
+                return
+            results = {
+                'entry_id': entry_id,
+                'translations': {}
+            }
+            batch_results['entries'].append(results)
+            
+            if source_entry is None:
+                source_entry = self.strapi_service.get_entry(
+                    content_type, entry_id, self.strapi_service.source_locale,
+                    self.field_index.get_populate(content_type)
+                )
+            if not source_entry:
+                self._fail_entry(
+                    content_type, entry_id, self._pending_locales(entry_id, target_locales), results
+                )
+                continue
+            
+            window.append((entry_id, source_entry, results))
+            if len(window) >= self.schedule_window:
+                yield window
+                window = []
+        if window:
+            yield window
+    
+    def _stream_source_entries(self, content_type, locale_count):
+        """Yield (entry_id, entry) for every entry, sizing the job from Strapi's total"""
+        def set_total(total):
+            self.job_status['total'] = total * locale_count
         
-        self.job_status['status'] = 'completed'
-        return batch_results
\ No newline at end of file
+        populate = self.field_index.get_populate(content_type)
+        for entry in self.strapi_service.iter_entries(content_type, populate=populate, on_total=set_total):
+            # Use documentId for Strapi 5
+            yield str(entry.get('documentId', entry.get('id'))), entry
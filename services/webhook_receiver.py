@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from services.metrics import WEBHOOK_EVENTS, WEBHOOK_PENDING_ENTRIES
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class WebhookReceiver:
+    """
+    Turn Strapi entry webhooks into small incremental translation jobs
+
+    Only entry.create, entry.update and entry.publish events for
+    source-locale entries of localized content types are used. Writing a
+    translation fires a webhook for the target locale, and those events are
+    ignored. A document is translated once it has gone WEBHOOK_DEBOUNCE_SECONDS
+    without another event, or WEBHOOK_MAX_DELAY after its first one if the
+    edits keep coming, so a burst of saves becomes one translation.
+    Documents that come due close together are queued as one incremental
+    job per content type, which sends only the changed fields to Ollama.
+    """
+
+    EVENTS = ('entry.create', 'entry.update', 'entry.publish')
+    # Seconds to wait after the first document comes due, so documents due
+    # close together, e.g. from a bulk import, share a job
+    BATCH_WINDOW = 5.0
+
+    def __init__(self, submit, content_types, source_locale=None, target_locales=None,
+                 debounce=None, max_delay=None):
+        """
+        Args:
+            submit (callable): Queues a job, called as submit(content_type,
+                entry_ids, target_locales, incremental)
+            content_types (callable): Returns the localized content types
+            source_locale (str, optional): Locale whose edits are translated
+            target_locales (list, optional): Locales to translate into;
+                defaults to WEBHOOK_TARGET_LOCALES, or every mapped locale
+        """
+        self.submit = submit
+        self.content_types = content_types
+        self.source_locale = source_locale or Config.STRAPI_SOURCE_LOCALE
+        self.target_locales = target_locales or [
+            locale.strip() for locale in Config.WEBHOOK_TARGET_LOCALES.split(',') if locale.strip()
+        ]
+        self.debounce = debounce if debounce is not None else Config.WEBHOOK_DEBOUNCE_SECONDS
+        self.max_delay = max_delay if max_delay is not None else Config.WEBHOOK_MAX_DELAY
+        # (content type, document ID) -> {'first_seen', 'due'} in monotonic seconds
+        self.pending = {}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.jobs_submitted = 0
+
+    def receive(self, payload):
+        """
+        Handle one webhook call from Strapi
+
+        Args:
+            payload (dict): Webhook body with event, model or uid, and entry
+
+        Returns:
+            tuple: (queued, reason) where reason says why an event was ignored
+        """
+        event = payload.get('event')
+        queued, reason = self._receive(event, payload)
+        WEBHOOK_EVENTS.inc(
+            event=event if event in self.EVENTS else 'other',
+            result='queued' if queued else 'ignored'
+        )
+        if not queued:
+            logger.debug("Ignoring webhook %s: %s", event, reason)
+        return queued, reason
+
+    def _receive(self, event, payload):
+        """Check an event and schedule its document, see receive"""
+        if event not in self.EVENTS:
+            return False, f"Event {event} does not trigger translation"
+
+        entry = payload.get('entry')
+        if not isinstance(entry, dict) or not entry.get('documentId'):
+            return False, "Entry has no documentId"
+        # Writing a translation fires a webhook for the target locale too
+        if entry.get('locale', self.source_locale) != self.source_locale:
+            return False, f"Entry is in locale {entry.get('locale')}, not the source locale"
+
+        content_type = self._content_type(payload)
+        if content_type is None:
+            return False, f"Not a localized content type: {payload.get('uid') or payload.get('model')}"
+
+        self._schedule(content_type, str(entry['documentId']))
+        return True, None
+
+    def _content_type(self, payload):
+        """Resolve the content type UID of an event; Strapi 5 sends uid, older versions only model"""
+        uid, model = payload.get('uid'), payload.get('model')
+        for content_type in self.content_types():
+            if uid and content_type.get('uid') == uid:
+                return uid
+            if not uid and model and model in (
+                content_type.get('schema', {}).get('singularName'),
+                str(content_type.get('uid', '')).rsplit('.', 1)[-1]
+            ):
+                return content_type['uid']
+        return None
+
+    def _schedule(self, content_type, document_id):
+        """Hold a document until it has been quiet for the debounce delay"""
+        now = time.monotonic()
+        with self.condition:
+            self._start_thread()
+            item = self.pending.setdefault((content_type, document_id), {'first_seen': now})
+            item['due'] = min(now + self.debounce, item['first_seen'] + self.max_delay)
+            WEBHOOK_PENDING_ENTRIES.set(len(self.pending))
+            self.condition.notify()
+
+    def _start_thread(self):
+        """Start the thread that queues due documents, on first use (caller holds the condition)"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='webhook-receiver', daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        """Receiver thread: wait for documents to come due and queue them"""
+        while True:
+            self._submit(self._take_due())
+
+    def _take_due(self):
+        """Wait for documents to come due and take them, grouped by content type"""
+        with self.condition:
+            while True:
+                if not self.pending:
+                    self.condition.wait()
+                    continue
+                now = time.monotonic()
+                first_due = min(item['due'] for item in self.pending.values())
+                if first_due + self.BATCH_WINDOW > now:
+                    self.condition.wait(first_due + self.BATCH_WINDOW - now)
+                    continue
+                due = [key for key, item in self.pending.items() if item['due'] <= now]
+                for key in due:
+                    del self.pending[key]
+                WEBHOOK_PENDING_ENTRIES.set(len(self.pending))
+                break
+
+        groups = {}
+        for content_type, document_id in due:
+            groups.setdefault(content_type, []).append(document_id)
+        return groups
+
+    def _submit(self, groups):
+        """Queue one incremental job per content type"""
+        target_locales = self._target_locales()
+        if not target_locales:
+            logger.warning("No target locales for webhook translations; configure model mappings first")
+            return
+        for content_type, entry_ids in groups.items():
+            try:
+                job_id = self.submit(content_type, entry_ids, target_locales, True)
+            except Exception as e:
+                logger.error("Error queueing webhook translation of %s: %s", content_type, e)
+                continue
+            self.jobs_submitted += 1
+            logger.info(
+                "Queued webhook translation of %d %s entries as job %s",
+                len(entry_ids), content_type, job_id
+            )
+
+    def _target_locales(self):
+        """Locales webhook jobs translate into, read when each job is queued"""
+        if self.target_locales:
+            return self.target_locales
+        locales = list(Config.get_model_mappings()) + list(Config.get_derived_locales())
+        return [locale for locale in dict.fromkeys(locales) if locale != self.source_locale]
+
+    def get_stats(self):
+        """Documents waiting out their debounce delay and jobs queued so far"""
+        with self.condition:
+            return {'pending': len(self.pending), 'jobs_submitted': self.jobs_submitted}